@@ -0,0 +1,487 @@
+"""
+Benchmarks of the mapping and formatting hot paths, run on an in-memory
+SQLite database. The results are printed as JSON (or written to --output),
+and can be compared to the results of an older run with --compare, which
+makes the process exit with 1 if something got slower than allowed.
+
+    python -m benchmarks.hot_paths --output new.json --compare old.json
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Type
+
+from sql_mapper import ModelBase, lazy
+from sql_mapper.dialects import DOLLAR, split_parameter_marks
+from sql_mapper.pagination import encode_cursor
+from sql_mapper.parallel_scan import parallel_scan
+from sql_mapper.routing import LEAST_BUSY, RoutingSQLExecutor
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+from sql_mapper.string_dump import (
+    StringDump, FormattableString, QUESTION_MARK_PATTERN
+)
+from sql_mapper.type_adapters import TypeAdapters
+
+DEFAULT_ROWS_AMOUNTS = (1_000, 100_000, 1_000_000)
+
+
+class Narrow(ModelBase):
+    _tablename = "narrow"
+    id: int = "INTEGER"
+    name: str = "TEXT"
+
+
+class Typed(ModelBase):
+    _tablename = "typed"
+    id: int = "INTEGER"
+    day: datetime.date = "DATE"
+    done: bool = "BOOLEAN"
+
+
+Wide = type("Wide", (ModelBase,), {
+    "_tablename": "wide",
+    **{f"field_{index}": "INTEGER" for index in range(50)}
+})
+
+
+def measure(
+        function: Callable[[], None], operations: int, repeats: int
+) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    best = min(timings)
+    return {
+        "seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "operations": operations,
+        "operations_per_second": operations / best if best else 0.0,
+    }
+
+
+def _new_sql_executor(*models: Type[ModelBase]) -> SQLiteSQLExecutor:
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(*models)
+    return sql_executor
+
+
+def benchmark_reformatting(results: dict, repeats: int):
+    iterations = 1000
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    for parameters_amount in (0, 10, 1000):
+        string_dump = StringDump()
+        string_dump.strings.append(FormattableString(
+            "SELECT " + ",".join("?" for _ in range(parameters_amount))
+        ))
+        arguments = list(range(parameters_amount))
+
+        def reformat():
+            for _ in range(iterations):
+                string_dump.reformat_collected_query(arguments, "?")
+
+        def prepare():
+            for _ in range(iterations):
+                sql_executor._prepare_query_and_arguments(
+                    string_dump, arguments
+                )
+
+        results[f"reformat_collected_query/{parameters_amount}"] = measure(
+            reformat, iterations, repeats
+        )
+        results[f"cached_prepare/{parameters_amount}"] = measure(
+            prepare, iterations, repeats
+        )
+
+
+def make_statements_corpus() -> List[str]:
+    """
+    Statements like the ones of the executors: short ones, long IN lists and
+    multi-row inserts, and a quarter of them with literals and comments
+    """
+    statements = []
+    for index in range(400):
+        marks = ",".join("?" for _ in range(1 + index % 50))
+        statements.append([
+            "SELECT id,name FROM narrow WHERE id=? AND name=?",
+            f"SELECT id,name FROM narrow WHERE id IN ({marks})",
+            f"INSERT INTO narrow(id,name)VALUES({marks})",
+            "UPDATE narrow SET name='a?' WHERE id=? -- ?\n AND name=?",
+        ][index % 4])
+    return statements
+
+
+def _rewrite_with_pattern(statement: str) -> str:
+    indexes = itertools.count(1)
+    return QUESTION_MARK_PATTERN.sub(
+        lambda _: f"${next(indexes)}", statement
+    )
+
+
+def benchmark_dialects(results: dict, repeats: int):
+    """
+    Splitting and rewriting the "?" marks of a corpus of statements with
+    the dialects tokenizer, which skips literals and comments, and with
+    QUESTION_MARK_PATTERN, which doesn't
+    """
+    statements = make_statements_corpus()
+    for statement in statements:
+        if "'" not in statement:
+            assert DOLLAR.rewrite(statement) == (
+                _rewrite_with_pattern(statement)
+            )
+
+    def split_with_pattern():
+        for statement in statements:
+            QUESTION_MARK_PATTERN.split(statement)
+
+    def split_with_tokenizer():
+        for statement in statements:
+            split_parameter_marks(statement)
+
+    def rewrite_with_pattern():
+        for statement in statements:
+            _rewrite_with_pattern(statement)
+
+    def rewrite_with_tokenizer():
+        for statement in statements:
+            DOLLAR.rewrite(statement)
+
+    for name, function in (
+        ("split/pattern", split_with_pattern),
+        ("split/tokenizer", split_with_tokenizer),
+        ("rewrite/pattern", rewrite_with_pattern),
+        ("rewrite/tokenizer", rewrite_with_tokenizer),
+    ):
+        results[f"dialects/{name}"] = measure(
+            function, len(statements), repeats
+        )
+
+
+def benchmark_hydration(results: dict, repeats: int):
+    iterations = 100_000
+    for name, model in (("narrow", Narrow), ("wide", Wide)):
+        row = tuple(range(len(model._fields)))
+        row_class = model._row_class
+
+        def construct():
+            for _ in range(iterations):
+                model(*row)
+
+        def hydrate():
+            for _ in range(iterations):
+                row_class(*row)
+
+        results[f"model_init/{name}"] = measure(construct, iterations, repeats)
+        results[f"row_class_init/{name}"] = measure(
+            hydrate, iterations, repeats
+        )
+
+
+def benchmark_inserts(results: dict, rows_amounts: List[int], repeats: int):
+    for rows_amount in rows_amounts:
+        models = [Narrow(index, str(index)) for index in range(rows_amount)]
+
+        def execute():
+            sql_executor = _new_sql_executor(Narrow)
+            for model in models:
+                sql_executor.execute("INSERT INTO ?", [model])
+
+        def execute_many():
+            sql_executor = _new_sql_executor(Narrow)
+            sql_executor.execute_many(
+                "INSERT INTO ?", ([model] for model in models)
+            )
+
+        def execute_multiple_rows():
+            _new_sql_executor(Narrow).execute("INSERT INTO ?", [models])
+
+        results[f"insert/execute/{rows_amount}"] = measure(
+            execute, rows_amount, repeats
+        )
+        results[f"insert/execute_many/{rows_amount}"] = measure(
+            execute_many, rows_amount, repeats
+        )
+        results[f"insert/multiple_rows/{rows_amount}"] = measure(
+            execute_multiple_rows, rows_amount, repeats
+        )
+
+        def load():
+            _new_sql_executor(Narrow).load(Narrow, models)
+
+        results[f"insert/load/{rows_amount}"] = measure(
+            load, rows_amount, repeats
+        )
+
+
+def benchmark_selects(results: dict, rows_amounts: List[int], repeats: int):
+    for rows_amount in rows_amounts:
+        sql_executor = _new_sql_executor(Narrow)
+        sql_executor.execute("INSERT INTO ?", [[
+            Narrow(index, str(index)) for index in range(rows_amount)
+        ]])
+
+        def select_rows():
+            for _ in sql_executor.execute("SELECT * FROM narrow"):
+                pass
+
+        def select_models():
+            for _ in sql_executor.execute(
+                "SELECT * FROM narrow", model=Narrow
+            ):
+                pass
+
+        def select_lazy_models():
+            for _ in sql_executor.execute(
+                "SELECT * FROM narrow", model=lazy(Narrow)
+            ):
+                pass
+
+        results[f"select/rows/{rows_amount}"] = measure(
+            select_rows, rows_amount, repeats
+        )
+        results[f"select/models/{rows_amount}"] = measure(
+            select_models, rows_amount, repeats
+        )
+        results[f"select/lazy_models/{rows_amount}"] = measure(
+            select_lazy_models, rows_amount, repeats
+        )
+        benchmark_wide_selects(results, rows_amount, repeats)
+
+
+def benchmark_wide_selects(results: dict, rows_amount: int, repeats: int):
+    """
+    Reads one field of every row of a wide table
+    """
+    sql_executor = _new_sql_executor(Wide)
+    sql_executor.execute_many("INSERT INTO ?", (
+        [Wide(*range(len(Wide._fields)))] for _ in range(rows_amount)
+    ))
+
+    def select(model):
+        for row in sql_executor.execute("SELECT * FROM wide", model=model):
+            row.field_0
+
+    results[f"select/wide_models/{rows_amount}"] = measure(
+        lambda: select(Wide), rows_amount, repeats
+    )
+    results[f"select/wide_lazy_models/{rows_amount}"] = measure(
+        lambda: select(lazy(Wide)), rows_amount, repeats
+    )
+
+
+def benchmark_type_adapters(
+        results: dict, rows_amounts: List[int], repeats: int):
+    for rows_amount in rows_amounts:
+        sql_executor = _new_sql_executor(Typed)
+        sql_executor.execute("INSERT INTO ?", [[
+            Typed(index, datetime.date(2000, 1, 1), index % 2)
+            for index in range(rows_amount)
+        ]])
+
+        def convert_afterwards():
+            sql_executor.type_adapters = None
+            for row in sql_executor.execute(
+                "SELECT * FROM typed", model=Typed
+            ):
+                row.day = datetime.date.fromisoformat(row.day)
+                row.done = bool(row.done)
+
+        def convert_on_hydration():
+            sql_executor.type_adapters = type_adapters
+            for _ in sql_executor.execute("SELECT * FROM typed", model=Typed):
+                pass
+
+        type_adapters = TypeAdapters()
+        results[f"type_adapters/afterwards/{rows_amount}"] = measure(
+            convert_afterwards, rows_amount, repeats
+        )
+        results[f"type_adapters/on_hydration/{rows_amount}"] = measure(
+            convert_on_hydration, rows_amount, repeats
+        )
+
+
+def count_rows(rows: list) -> int:
+    return len(rows)
+
+
+def benchmark_parallel_scan(
+        results: dict, rows_amounts: List[int], repeats: int):
+    """
+    Hydration in one process and in every core (the rows are mapped to the
+    model and counted by the workers)
+    """
+    for rows_amount in rows_amounts:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "database.sqlite3")
+            sql_executor = SQLiteSQLExecutor.new(file_path)
+            sql_executor.create_tables(Wide)
+            sql_executor.load(Wide, (
+                tuple(range(len(Wide._fields))) for _ in range(rows_amount)
+            ))
+            sql_executor.close()
+            for processes in sorted({1, os.cpu_count() or 1}):
+
+                def scan():
+                    sum(parallel_scan(
+                        file_path,
+                        "SELECT * FROM wide WHERE rowid >= ? AND rowid < ?",
+                        model=Wide, processes=processes, map_batch=count_rows
+                    ))
+
+                results[
+                    f"parallel_scan/{processes}_processes/{rows_amount}"
+                ] = measure(scan, rows_amount, repeats)
+
+
+def benchmark_pagination(
+        results: dict, rows_amounts: List[int], repeats: int):
+    """
+    The last page of 100 rows selected with OFFSET and with a keyset cursor
+    """
+    for rows_amount in rows_amounts:
+        sql_executor = _new_sql_executor(Narrow)
+        sql_executor.load(Narrow, (
+            (index, str(index)) for index in range(rows_amount)
+        ))
+        sql_executor.execute("CREATE INDEX narrow_id ON narrow(id)")
+        paginator = sql_executor.paginate(
+            Narrow, "id", page_size=100, unique=True
+        )
+        last_page_start = max(rows_amount - 100, 0)
+        cursor = encode_cursor(paginator.order, [last_page_start - 1])
+
+        def select_with_offset():
+            list(sql_executor.execute(
+                "SELECT * FROM narrow ORDER BY id LIMIT 100 OFFSET ?",
+                [last_page_start], Narrow
+            ))
+
+        results[f"paginate/offset/{rows_amount}"] = measure(
+            select_with_offset, 100, repeats
+        )
+        results[f"paginate/keyset/{rows_amount}"] = measure(
+            lambda: paginator.fetch_page(cursor), 100, repeats
+        )
+
+
+def benchmark_routing(results: dict, rows_amounts: List[int], repeats: int):
+    """
+    Aggregating reads of 8 threads over 1 replica connection and over one
+    replica connection per core
+    """
+    queries = 64
+    for rows_amount in rows_amounts:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "database.sqlite3")
+            sql_executor = SQLiteSQLExecutor.new(file_path)
+            sql_executor.create_tables(Narrow)
+            sql_executor.load(Narrow, (
+                (index, str(index)) for index in range(rows_amount)
+            ))
+            sql_executor.close()
+            for replicas_amount in sorted({1, os.cpu_count() or 1}):
+                routing_executor = RoutingSQLExecutor.new(
+                    file_path, replicas_amount=replicas_amount,
+                    strategy=LEAST_BUSY
+                )
+
+                def read():
+                    with ThreadPoolExecutor(8) as threads:
+                        list(threads.map(
+                            lambda _: list(routing_executor.execute(
+                                "SELECT SUM(id), MAX(name) FROM narrow"
+                            )),
+                            range(queries)
+                        ))
+
+                results[
+                    f"routing/{replicas_amount}_replicas/{rows_amount}"
+                ] = measure(read, queries, repeats)
+                routing_executor.close()
+
+
+def run(rows_amounts: List[int], repeats: int) -> dict:
+    results = {}
+    benchmark_reformatting(results, repeats)
+    benchmark_dialects(results, repeats)
+    benchmark_hydration(results, repeats)
+    benchmark_inserts(results, rows_amounts, repeats)
+    benchmark_selects(results, rows_amounts, repeats)
+    benchmark_type_adapters(results, rows_amounts, repeats)
+    benchmark_parallel_scan(results, rows_amounts, repeats)
+    benchmark_pagination(results, rows_amounts, repeats)
+    benchmark_routing(results, rows_amounts, repeats)
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": results,
+    }
+
+
+def compare(
+        old_report: dict, new_report: dict, max_slowdown: float
+) -> List[str]:
+    """
+    Returns the descriptions of the benchmarks that got more than max_slowdown
+    times slower
+    """
+    regressions = []
+    for name, new_result in new_report["results"].items():
+        old_result = old_report["results"].get(name)
+        if not old_result or not old_result["seconds"]:
+            continue
+        slowdown = new_result["seconds"] / old_result["seconds"]
+        if slowdown > max_slowdown:
+            regressions.append(
+                f"{name}: {old_result['seconds']:.6f}s -> "
+                f"{new_result['seconds']:.6f}s ({slowdown:.2f}x)"
+            )
+    return regressions
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=list(DEFAULT_ROWS_AMOUNTS),
+        help="amounts of rows for the insert and select benchmarks"
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="file to write the JSON report to")
+    parser.add_argument(
+        "--compare", help="JSON report of an older run to compare with"
+    )
+    parser.add_argument(
+        "--max-slowdown", type=float, default=1.25,
+        help="how many times slower a benchmark may get (with --compare)"
+    )
+    arguments = parser.parse_args(arguments)
+    report = run(arguments.rows, arguments.repeats)
+    report_json = json.dumps(report, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(report_json)
+    else:
+        print(report_json)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(
+                json.load(file), report, arguments.max_slowdown
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Benchmarks of the cold start: importing sql_mapper, declaring a catalog of
+models and the first query of every one of them, each measured in fresh
+interpreters, so nothing is cached. The results are printed as JSON (or
+written to --output), and can be compared to the results of an older run
+with --compare like the hot path ones.
+
+    python -m benchmarks.startup --output new.json --compare old.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from typing import List, Optional
+
+from benchmarks.hot_paths import compare
+
+DEFAULT_MODELS_AMOUNTS = (100, 1_000)
+FIELDS_AMOUNT = 10
+
+# Run as "python -c _SCRIPT models_amount fields_amount part", prints how
+# long the part ("import", "declare" or "first_select") took, in seconds
+_SCRIPT = """
+import sys
+import time
+
+models_amount, fields_amount = int(sys.argv[1]), int(sys.argv[2])
+started_at = time.perf_counter()
+import sql_mapper
+timings = {"import": time.perf_counter() - started_at}
+started_at = time.perf_counter()
+models = [
+    type(f"Model{index}", (sql_mapper.ModelBase,), {
+        "__annotations__": {
+            f"field_{field}": int for field in range(fields_amount)
+        },
+        "_tablename": f"model_{index}",
+        **{f"field_{field}": "INTEGER" for field in range(fields_amount)}
+    })
+    for index in range(models_amount)
+]
+timings["declare"] = time.perf_counter() - started_at
+if sys.argv[3] == "first_select":
+    from sql_mapper.sql_executors import SQLiteSQLExecutor
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(*models)
+    started_at = time.perf_counter()
+    for model in models:
+        list(sql_executor.execute(
+            f"SELECT * FROM {model._tablename}", model=model
+        ))
+    timings["first_select"] = time.perf_counter() - started_at
+print(timings[sys.argv[3]])
+"""
+
+
+def _run_script(models_amount: int, part: str, repeats: int) -> float:
+    """
+    The best time of the part of the script out of repeats fresh processes
+    """
+    return min(
+        float(subprocess.run(
+            [
+                sys.executable, "-c", _SCRIPT, str(models_amount),
+                str(FIELDS_AMOUNT), part
+            ],
+            check=True, capture_output=True, text=True
+        ).stdout)
+        for _ in range(repeats)
+    )
+
+
+def _result(seconds: float, operations: int) -> dict:
+    return {
+        "seconds": seconds,
+        "operations": operations,
+        "operations_per_second": operations / seconds if seconds else 0.0,
+    }
+
+
+def run(models_amounts: List[int], repeats: int) -> dict:
+    results = {"import": _result(_run_script(0, "import", repeats), 1)}
+    for models_amount in models_amounts:
+        results[f"declare_models/{models_amount}"] = _result(
+            _run_script(models_amount, "declare", repeats), models_amount
+        )
+        results[f"first_select/{models_amount}"] = _result(
+            _run_script(models_amount, "first_select", repeats), models_amount
+        )
+    return {
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--models", type=int, nargs="+",
+        default=list(DEFAULT_MODELS_AMOUNTS),
+        help=f"amounts of the declared models (of {FIELDS_AMOUNT} fields)"
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="file to write the JSON report to")
+    parser.add_argument(
+        "--compare", help="JSON report of an older run to compare with"
+    )
+    parser.add_argument(
+        "--max-slowdown", type=float, default=1.25,
+        help="how many times slower a benchmark may get (with --compare)"
+    )
+    arguments = parser.parse_args(arguments)
+    report = run(arguments.models, arguments.repeats)
+    report_json = json.dumps(report, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(report_json)
+    else:
+        print(report_json)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(
+                json.load(file), report, arguments.max_slowdown
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,36 @@
-from sql_mapper import abstract_sql_executor
-from sql_mapper import exceptions
-from sql_mapper import sql_executors
-from sql_mapper.model_base import ModelBase
-from sql_mapper.string_dump import raw
+import importlib
+
+from sql_mapper.model_base import Index, ModelBase, Related, lazy
 
 __all__ = [
-    "ModelBase", "raw", "sql_executors", "abstract_sql_executor", "model_base",
-    "string_dump", "exceptions"
+    "ModelBase", "Index", "Related", "lazy", "raw", "sql_executors",
+    "abstract_sql_executor", "model_base", "string_dump", "exceptions",
+    "query_compiler", "columnar",
+    "connection_pool", "async_sql_executors", "prepared_statement",
+    "result_cache", "instrumentation", "transactions", "type_adapters",
+    "bulk_loading", "schema", "query_plans", "parallel_scan", "session",
+    "pagination", "relationships", "routing", "dialects"
 ]
+
+# The submodules (and raw) are imported when they are accessed for the first
+# time (PEP 562), so a process that only declares models and builds queries
+# doesn't pay for the executors, sqlite3 and the rest of them
+_LAZY_ATTRIBUTES = {"raw": "string_dump"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(
+            importlib.import_module(f"{__name__}.{_LAZY_ATTRIBUTES[name]}"),
+            name
+        )
+    elif name in __all__:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,35 +1,218 @@
+import functools
+import itertools
 import re
+import time
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from typing import (
-    Iterable, Optional, Type, TypeVar, Union, Sequence, AsyncIterable
+    Iterable, Optional, Type, TypeVar, Union, Sequence, AsyncIterable, List,
+    Dict, Callable, Tuple, Iterator, AsyncIterator
 )
 
+from sql_mapper import exceptions
+from sql_mapper.bulk_loading import (
+    LoadProgress, ProgressReporter, get_staging_table, iterate_batches,
+    make_conflict_clause, make_insert_statement, make_staging_statements
+)
+from sql_mapper.columnar import Column, ColumnsBuilder
+from sql_mapper.dialects import Dialect
+from sql_mapper.instrumentation import QueryEvent, QueryHook, fingerprint
 from sql_mapper.model_base import ModelBase
+from sql_mapper.pagination import Paginator
+from sql_mapper.prepared_statement import PreparedStatement
+from sql_mapper.query_compiler import (
+    CompiledQuery, CompiledQueriesCache, compile_query, get_arguments_shape,
+    get_parameters_amount, split_models_sequence, count_parameter_marks,
+    is_read_statement
+)
+from sql_mapper.query_plans import make_unbound_parameters
+from sql_mapper.relationships import prefetch
+from sql_mapper.result_cache import (
+    ResultCache, get_read_tables, get_written_tables
+)
 from sql_mapper.string_dump import (
     StringDump, FormattableString, QUESTION_MARK_PATTERN,
     NewQueryStringWithArguments
 )
+from sql_mapper.transactions import AutoCommitPolicy
+from sql_mapper.type_adapters import TypeAdapters
 
 GenericModel = TypeVar("GenericModel", bound=ModelBase)
 MaybeModel = Optional[Type[GenericModel]]
 
 
+def hydrate(
+        model: Type[GenericModel], rows: Iterable[Sequence],
+        convert: Optional[Callable[[Sequence], tuple]] = None
+) -> Iterable[GenericModel]:
+    """
+    Maps the rows to the model using its generated row class, which skips
+    the checks of ModelBase.__init__ (or wraps them, if the model is made by
+    model_base.lazy()). The rows are converted by convert on the way. Rows
+    with an unusual amount of columns are passed to the usual constructor as
+    they are
+    """
+    fields_amount = len(model._fields)
+    if model._wraps_rows:
+        full_model = model._model
+        for row in rows:
+            if len(row) != fields_amount:
+                yield full_model(*row)
+            elif convert is None:
+                yield model(row)
+            else:
+                yield model(convert(row))
+        return
+    row_class = model._row_class
+    if convert is None:
+        for row in rows:
+            if len(row) == fields_amount:
+                yield row_class(*row)
+            else:
+                yield model(*row)
+        return
+    for row in rows:
+        if len(row) == fields_amount:
+            yield row_class(*convert(row))
+        else:
+            yield model(*row)
+
+
 class AbstractSQLExecutor(ABC):
     new_parameter_mark: str
     old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
+    # Finds and writes the parameter marks in place of the two above (see
+    # dialects.Dialect), if it is not None. A subclass that sets one of the
+    # two marks and not the dialect gets no dialect (see __init_subclass__)
+    dialect: Optional[Dialect] = None
+    compiled_queries_cache_size: int = 512
+    # How many parameters one statement can have (None if there is no limit)
+    max_parameters_amount: Optional[int] = None
+    # How many rows .stream() fetches at once by default
+    stream_chunk_size: int = 1000
+    # Used by .execute_cached(), no rows are cached if it is None
+    result_cache: Optional[ResultCache] = None
+    # Converters of the fields of the models by their declared SQL types, no
+    # values are converted if it is None
+    type_adapters: Optional[TypeAdapters] = None
+    _hooks: Tuple[QueryHook, ...] = ()
+    # How many rows .load() inserts at once if there is no parameters limit
+    default_load_batch_size: int = 500
+    _transaction_depth: int = 0
+    _auto_commit_policy: Optional[AutoCommitPolicy] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        namespace = vars(cls)
+        if "dialect" not in namespace and (
+            "old_parameter_mark" in namespace
+            or "new_parameter_mark" in namespace
+        ):
+            # The marks of the subclass would be ignored by the dialect of
+            # its base otherwise
+            cls.dialect = None
+
+    @property
+    def compiled_queries_cache(self) -> CompiledQueriesCache:
+        try:
+            return self.__dict__["_compiled_queries_cache"]
+        except KeyError:
+            cache = CompiledQueriesCache(self.compiled_queries_cache_size)
+            self.__dict__["_compiled_queries_cache"] = cache
+            return cache
+
+    def _compile_query(
+            self, sql_statement: Union[str, StringDump], parameters: Sequence
+    ) -> CompiledQuery:
+        """
+        Gets the compiled query from the cache or compiles it (and caches it)
+        """
+        arguments_shape = get_arguments_shape(parameters)
+        if isinstance(sql_statement, str):
+            statement_key = sql_statement
+        else:
+            statement_key = sql_statement.get_cache_key()
+        key = (
+            statement_key, arguments_shape, self.new_parameter_mark,
+            self.old_parameter_mark, self.dialect
+        )
+        cache = self.compiled_queries_cache
+        compiled_query = cache.get(key)
+        if compiled_query is None:
+            if isinstance(sql_statement, str):
+                sql_statement = [FormattableString(sql_statement)]
+            compiled_query = compile_query(
+                sql_statement, arguments_shape, self.new_parameter_mark,
+                self.old_parameter_mark, self.dialect
+            )
+            cache.put(key, compiled_query)
+        return compiled_query
 
     def _prepare_query_and_arguments(
-            self, sql_statement: str, parameters: Iterable
+            self, sql_statement: Union[str, StringDump], parameters: Iterable
     ) -> NewQueryStringWithArguments:
+        if not isinstance(parameters, (list, tuple)):
+            parameters = tuple(parameters)
+        compiled_query = self._compile_query(sql_statement, parameters)
+        return NewQueryStringWithArguments(
+            compiled_query.query,
+            compiled_query.bind(parameters, self.type_adapters)
+        )
+
+    def _prepare_queries_and_arguments(
+            self, sql_statement: Union[str, StringDump], parameters: Iterable
+    ) -> List[NewQueryStringWithArguments]:
+        """
+        Like ._prepare_query_and_arguments(), but splits a sequence of models
+        into multiple statements if one statement would have more parameters
+        than the .max_parameters_amount
+        """
+        if not isinstance(parameters, (list, tuple)):
+            parameters = tuple(parameters)
+        return [
+            self._prepare_query_and_arguments(sql_statement, parameters_chunk)
+            for parameters_chunk in split_models_sequence(
+                parameters, self.max_parameters_amount
+            )
+        ]
+
+    def prepare(
+            self, sql_statement: Union[str, StringDump],
+            *argument_models: Optional[Type[ModelBase]],
+            model: MaybeModel = None
+    ) -> PreparedStatement:
+        """
+        Compiles the statement once and returns a PreparedStatement, which
+        only binds the arguments when it is called. argument_models are the
+        models of the arguments (one for every parameter mark, None for plain
+        values; missing ones are None too), model= is the model of the rows,
+        like in .execute()
+
+        insert_a = sql_executor.prepare("INSERT INTO ?", A)
+        insert_a(A(1, "a"))
+        insert_a(A(c="b"))  # The same query text, b is NULL
+        """
         if isinstance(sql_statement, str):
-            string_dump = StringDump()
-            string_dump.strings.append(FormattableString(sql_statement))
-            sql_statement = string_dump
-        return sql_statement.reformat_collected_query(
-            old_arguments=parameters,
-            new_parameter_mark=self.new_parameter_mark,
-            old_parameter_mark=self.old_parameter_mark
+            sql_statement = [FormattableString(sql_statement)]
+        marks_amount = count_parameter_marks(
+            sql_statement,
+            self.old_parameter_mark if self.dialect is None else self.dialect
+        )
+        if len(argument_models) > marks_amount:
+            raise exceptions.WrongArgumentsAmount(
+                expected_amount=marks_amount,
+                given_amount=len(argument_models)
+            )
+        arguments_shape = tuple(
+            None if argument_model is None
+            else (argument_model, tuple(argument_model._fields))
+            for argument_model in argument_models
+        ) + (None,) * (marks_amount - len(argument_models))
+        compiled_query = compile_query(
+            sql_statement, arguments_shape, self.new_parameter_mark,
+            self.old_parameter_mark, self.dialect
         )
+        return PreparedStatement(self, compiled_query, model)
 
     def execute(
             self, sql_statement: Union[str, StringDump],
@@ -37,20 +220,435 @@ class AbstractSQLExecutor(ABC):
     ) -> Iterable[Union[Sequence, GenericModel]]:
         """
         sql_statement's parameter marks will be ?, if not overridden
-        (.old_parameter_mark attribute). Every instance of ModelBase's
-        inherited class will alter the sql_statement, so instead of question
-        mark it will have a sequence of question marks, their amount will be
-        equal to the amount of members of passed model (in parameters, not in
-        model=)
+        (.old_parameter_mark or .dialect attribute). Every instance of
+        ModelBase's inherited class will alter the sql_statement, so instead
+        of question mark it will have a sequence of question marks, their
+        amount will be equal to the amount of members of passed model (in
+        parameters, not in model=). A list of instances of the same model
+        will be turned into multiple rows of values, like
+        "tablename(a,b)VALUES(?,?),(?,?)"; if there are too many of them,
+        multiple statements will be executed
 
         This function should NOT be a generator!!! It should execute a query
         when it is called!
         """
-        query, arguments = self._prepare_query_and_arguments(
+        if self._hooks:
+            started_at = time.perf_counter()
+            queries_and_arguments = self._prepare_queries_and_arguments(
+                sql_statement, parameters
+            )
+            return self._instrument(
+                queries_and_arguments[0].query,
+                time.perf_counter() - started_at,
+                functools.partial(self._run_queries, queries_and_arguments),
+                model
+            )
+        rows = self._run_queries(self._prepare_queries_and_arguments(
+            sql_statement, parameters
+        ))
+        return self._hydrate(model, rows) if model else rows
+
+    def execute_cached(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: MaybeModel = None,
+            ttl: Optional[float] = None
+    ) -> Iterable[Union[Sequence, GenericModel]]:
+        """
+        Like .execute(), but the rows of read queries are kept in the
+        .result_cache (if there is one) for ttl seconds (or for the default
+        TTL of the cache). Every write made through this executor to a table
+        the query mentions removes the rows from the cache
+        """
+        started_at = time.perf_counter()
+        queries_and_arguments = self._prepare_queries_and_arguments(
             sql_statement, parameters
         )
-        rows = self._execute_sql_statement(query, arguments)
-        return (model(*row) for row in rows) if model else rows
+        if self._hooks:
+            return self._instrument(
+                queries_and_arguments[0].query,
+                time.perf_counter() - started_at,
+                functools.partial(
+                    self._run_cached_queries, queries_and_arguments, ttl
+                ),
+                model
+            )
+        rows = self._run_cached_queries(queries_and_arguments, ttl)
+        return self._hydrate(model, rows) if model else rows
+
+    def _run_cached_queries(
+            self, queries_and_arguments: List[NewQueryStringWithArguments],
+            ttl: Optional[float]) -> Iterable[Sequence]:
+        cache = self.result_cache
+        query, arguments = queries_and_arguments[0]
+        if (
+            cache is None or len(queries_and_arguments) != 1
+            or not is_read_statement(query)
+        ):
+            return self._run_queries(queries_and_arguments)
+        if isinstance(arguments, dict):
+            key = (query, tuple(arguments.items()))
+        else:
+            key = (query, tuple(arguments))
+        try:
+            rows = cache.get(key)
+        except TypeError:  # Unhashable arguments
+            return self._run_queries(queries_and_arguments)
+        if rows is None:
+            rows = tuple(self._run_sql_statement(query, arguments))
+            cache.put(key, rows, get_read_tables(query), ttl)
+        return rows
+
+    def _run_queries(
+            self, queries_and_arguments: List[NewQueryStringWithArguments]
+    ) -> Iterable[Sequence]:
+        if len(queries_and_arguments) == 1:
+            return self._run_sql_statement(*queries_and_arguments[0])
+        rows = []
+        for query, arguments in queries_and_arguments:
+            rows.extend(self._run_sql_statement(query, arguments))
+        return rows
+
+    def _on_statement(self, statement: str):
+        """
+        Called before every statement is executed
+        """
+        if self.result_cache is not None:
+            written_tables = get_written_tables(statement)
+            if written_tables:
+                self.result_cache.invalidate_tables(written_tables)
+        policy = self._auto_commit_policy
+        if policy is not None:
+            # The statements of the savepoints count too, but the commit
+            # waits until they are released
+            if self._transaction_depth == 1:
+                self._commit_if_due()
+            policy.statements += 1
+
+    def _commit_if_due(self):
+        """
+        Commits (and begins again) the outermost transaction, if its
+        automatic commit is due
+        """
+        policy = self._auto_commit_policy
+        if policy is not None and policy.is_due():
+            self.commit()
+            self._begin_transaction()
+            policy.commits += 1
+            policy.reset()
+
+    @contextmanager
+    def transaction(
+            self, commit_every: Optional[int] = None,
+            commit_interval: Optional[float] = None
+    ) -> Iterator["AbstractSQLExecutor"]:
+        """
+        with sql_executor.transaction():
+            ...
+
+        The outermost transaction is committed when the block ends and rolled
+        back if it raises. Nested transactions are savepoints, which are
+        rolled back alone.
+
+        The outermost transaction can also be committed (and begun again)
+        after every commit_every statements or every commit_interval seconds,
+        which is handy for long loading jobs. Only the last part is rolled
+        back then, if the block raises. The statements of nested
+        transactions are counted too, but the commit waits until they are
+        released (.load() runs right in such a transaction instead of a
+        nested one, so it is committed between its batches)
+        """
+        depth = self._transaction_depth
+        savepoint = f"sql_mapper_savepoint_{depth}"
+        if depth == 0:
+            self._begin_transaction()
+            if commit_every or commit_interval is not None:
+                self._auto_commit_policy = AutoCommitPolicy(
+                    commit_every, commit_interval
+                )
+        else:
+            if commit_every or commit_interval is not None:
+                raise exceptions.NestedAutoCommit()
+            self._execute_sql_statement(f"SAVEPOINT {savepoint}", [])
+        self._transaction_depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth = depth
+            if depth == 0:
+                self._auto_commit_policy = None
+                self.rollback()
+            else:
+                self._execute_sql_statement(
+                    f"ROLLBACK TO SAVEPOINT {savepoint}", []
+                )
+                self._execute_sql_statement(
+                    f"RELEASE SAVEPOINT {savepoint}", []
+                )
+                self._after_rollback()
+            raise
+        self._transaction_depth = depth
+        if depth == 0:
+            self._auto_commit_policy = None
+            self.commit()
+        else:
+            self._execute_sql_statement(f"RELEASE SAVEPOINT {savepoint}", [])
+            if depth == 1:
+                self._commit_if_due()
+
+    def _begin_transaction(self):
+        self._execute_sql_statement("BEGIN", [])
+
+    def rollback(self):
+        self._execute_sql_statement("ROLLBACK", [])
+        self._after_rollback()
+
+    def _after_rollback(self):
+        """
+        Called after every rollback (of a transaction or of a savepoint):
+        the result cache could keep the rows with the changes that are gone
+        now. Every executor overriding .rollback() should call it
+        """
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def explain_query_plan(
+            self, statement: str, parameters: Optional[list] = None
+    ) -> List[Sequence]:
+        """
+        Rows of "EXPLAIN QUERY PLAN" of the (already formatted) statement.
+        Every parameter is NULL if the parameters are not given. Neither the
+        hooks nor the transactions notice it
+        """
+        if parameters is None:
+            parameters = make_unbound_parameters(statement, self.dialect)
+        return list(self._execute_sql_statement(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ))
+
+    def _run_sql_statement(
+            self, statement: str, parameters: list) -> Iterable[Sequence]:
+        self._on_statement(statement)
+        return self._execute_sql_statement(statement, parameters)
+
+    def _run_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        self._on_statement(statement)
+        self._execute_many_sql_statement(statement, parameters)
+
+    def _run_stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        self._on_statement(statement)
+        return self._stream_sql_statement(statement, parameters, chunk_size)
+
+    def stream(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: MaybeModel = None,
+            chunk_size: Optional[int] = None
+    ) -> Iterable[Union[Sequence, GenericModel]]:
+        """
+        Like .execute(), but the rows are fetched from the database and
+        mapped to the model chunk by chunk (.stream_chunk_size rows at a time,
+        if chunk_size is not given), so only one chunk is in memory at once.
+        Every query gets its own cursor (if the executor supports it), so
+        other queries don't interfere with the rows that were not fetched yet
+
+        This function should NOT be a generator too!
+        """
+        chunk_size = chunk_size or self.stream_chunk_size
+        if self._hooks:
+            started_at = time.perf_counter()
+            queries_and_arguments = self._prepare_queries_and_arguments(
+                sql_statement, parameters
+            )
+            return self._instrument(
+                queries_and_arguments[0].query,
+                time.perf_counter() - started_at,
+                lambda: itertools.chain.from_iterable(
+                    self._run_stream_queries(queries_and_arguments, chunk_size)
+                ),
+                model
+            )
+        return self._iterate_chunks(
+            self._stream_chunks(sql_statement, parameters, chunk_size), model
+        )
+
+    def execute_columns(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: Type[ModelBase] = None,
+            typed: bool = True, as_numpy: bool = False,
+            chunk_size: Optional[int] = None
+    ) -> Dict[str, Column]:
+        """
+        Like .stream(), but instead of the rows returns the columns: a dict
+        of field names of the model (in the ._fields order) and their values.
+        No model instances are created, but the model is required
+        (ColumnsModelNotSpecified is raised before the query is executed
+        without it). Columns of fields declared as INTEGER or REAL are
+        array.array's if typed is true, and every column is a NumPy array if
+        as_numpy is true (NumPy should be installed then)
+        """
+        columns_builder = ColumnsBuilder(model, typed, self.type_adapters)
+        for chunk in self._stream_chunks(
+            sql_statement, parameters, chunk_size
+        ):
+            columns_builder.add_chunk(chunk)
+        return columns_builder.build(as_numpy)
+
+    def _stream_chunks(
+            self, sql_statement: Union[str, StringDump], parameters: Iterable,
+            chunk_size: Optional[int]
+    ) -> Iterable[Sequence[Sequence]]:
+        return self._run_stream_queries(
+            self._prepare_queries_and_arguments(sql_statement, parameters),
+            chunk_size or self.stream_chunk_size
+        )
+
+    def _run_stream_queries(
+            self, queries_and_arguments: List[NewQueryStringWithArguments],
+            chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        chunks = [
+            self._run_stream_sql_statement(query, arguments, chunk_size)
+            for query, arguments in queries_and_arguments
+        ]
+        return itertools.chain.from_iterable(chunks)
+
+    def _iterate_chunks(
+            self, chunks: Iterable[Sequence[Sequence]], model: MaybeModel
+    ) -> Iterable[Union[Sequence, GenericModel]]:
+        for chunk in chunks:
+            if model:
+                yield from self._hydrate(model, chunk)
+            else:
+                yield from chunk
+
+    def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        """
+        Executes the statement immediately and returns an iterable of chunks
+        of rows. Override this if the driver can fetch the rows in chunks on
+        its own cursor (fetchmany or something like that)
+        """
+        rows = iter(self._execute_sql_statement(statement, parameters))
+        return iter(lambda: list(itertools.islice(rows, chunk_size)), [])
+
+    def add_hook(self, hook: QueryHook):
+        """
+        The hook will get the events of every query executed by .execute(),
+        .execute_cached(), .execute_many(), .stream() and prepared
+        statements. Executors without hooks don't measure anything
+        """
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook: QueryHook):
+        self._hooks = tuple(
+            other_hook for other_hook in self._hooks if other_hook is not hook
+        )
+
+    def _instrument(
+            self, statement: str, prepare_time: float,
+            run: Callable[[], Optional[Iterable[Sequence]]],
+            model: MaybeModel
+    ) -> Iterable[Union[Sequence, GenericModel]]:
+        """
+        Executes run() and measures it, the fetching of the rows it returns
+        and their mapping to the model (if there is a model)
+        """
+        event = QueryEvent(
+            statement, fingerprint(statement), prepare_time=prepare_time
+        )
+        for hook in self._hooks:
+            hook.before_query(event)
+        started_at = time.perf_counter()
+        try:
+            rows = run()
+        except BaseException as error:
+            event.execute_time = time.perf_counter() - started_at
+            event.error = error
+            self._finish_event(event)
+            raise
+        event.execute_time = time.perf_counter() - started_at
+        rows = self._instrument_rows(event, rows or (), model)
+        if not is_read_statement(statement):
+            # Nobody may iterate over the result of a write, so it is
+            # finished right now
+            rows = iter(list(rows))
+        return rows
+
+    def _instrument_rows(
+            self, event: QueryEvent, rows: Iterable[Sequence],
+            model: MaybeModel) -> Iterable[Union[Sequence, GenericModel]]:
+        map_row = self._make_row_mapper(model) if model else None
+        perf_counter = time.perf_counter
+        rows = iter(rows)
+        try:
+            while True:
+                started_at = perf_counter()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    event.fetch_time += perf_counter() - started_at
+                    break
+                fetched_at = perf_counter()
+                event.fetch_time += fetched_at - started_at
+                if map_row is not None:
+                    row = map_row(row)
+                    event.hydrate_time += perf_counter() - fetched_at
+                event.rows += 1
+                yield row
+        except BaseException as error:
+            event.error = error
+            raise
+        finally:
+            self._finish_event(event)
+
+    def _finish_event(self, event: QueryEvent):
+        for hook in self._hooks:
+            hook.after_query(event)
+
+    def _make_row_mapper(
+            self, model: Type[GenericModel]
+    ) -> Callable[[Sequence], GenericModel]:
+        fields_amount = len(model._fields)
+        convert = self._get_row_converter(model)
+        if model._wraps_rows:
+            full_model = model._model
+
+            def map_row(row: Sequence) -> GenericModel:
+                if len(row) != fields_amount:
+                    return full_model(*row)
+                if convert is not None:
+                    row = convert(row)
+                return model(row)
+
+            return map_row
+        row_class = model._row_class
+
+        def map_row(row: Sequence) -> GenericModel:
+            if len(row) != fields_amount:
+                return model(*row)
+            if convert is not None:
+                row = convert(row)
+            return row_class(*row)
+
+        return map_row
+
+    def _get_row_converter(
+            self, model: Type[GenericModel]
+    ) -> Optional[Callable[[Sequence], tuple]]:
+        if self.type_adapters is None:
+            return None
+        return self.type_adapters.get_row_converter(model)
+
+    def _hydrate(
+            self, model: Type[GenericModel], rows: Iterable[Sequence]
+    ) -> Iterable[GenericModel]:
+        """
+        See hydrate(), the values are converted by the .type_adapters
+        """
+        return hydrate(model, rows, self._get_row_converter(model))
 
     def execute_many(
             self, sql_statement: Union[str, StringDump],
@@ -58,13 +656,231 @@ class AbstractSQLExecutor(ABC):
     ) -> Iterable[Iterable[Union[Sequence, GenericModel]]]:
         """
         Like .execute(), but executes the same query multiple times with
-        different arguments
+        different arguments.
+
+        If every parameters list has the same shape (models of the same class
+        with the same fields at the same places) and the query returns
+        nothing, it is compiled once and passed to the driver's batched
+        execution. Otherwise it is executed once per parameters list
         """
+        parameters = [
+            parameters_list if isinstance(parameters_list, (list, tuple))
+            else tuple(parameters_list)
+            for parameters_list in parameters
+        ]
+        started_at = time.perf_counter()
+        compiled_query = self._compile_batch(sql_statement, parameters)
+        if compiled_query is not None:
+            run = functools.partial(
+                self._run_many_sql_statement, compiled_query.query,
+                map(
+                    compiled_query.bind, parameters,
+                    itertools.repeat(self.type_adapters)
+                )
+            )
+            if self._hooks:
+                self._instrument(
+                    compiled_query.query, time.perf_counter() - started_at,
+                    run, None
+                )
+            else:
+                run()
+            return [() for _ in parameters]
         results = []
         for parameters_list in parameters:
-            results.append(self.execute(sql_statement, parameters_list, model))
+            # .stream() is used, so the results don't share a cursor
+            results.append(self.stream(sql_statement, parameters_list, model))
         return results
 
+    def _compile_batch(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Sequence[Sequence]
+    ) -> Optional[CompiledQuery]:
+        """
+        Returns the compiled query if the parameters can be executed in one
+        batch, None otherwise (also if the statement would have more
+        parameters than the .max_parameters_amount, so it is split like in
+        .execute())
+        """
+        if not parameters:
+            return None
+        arguments_shape = get_arguments_shape(parameters[0])
+        for parameters_list in parameters:
+            if get_arguments_shape(parameters_list) != arguments_shape:
+                return None
+        if (
+            self.max_parameters_amount is not None
+            and get_parameters_amount(arguments_shape)
+            > self.max_parameters_amount
+        ):
+            return None
+        compiled_query = self._compile_query(sql_statement, parameters[0])
+        return compiled_query if compiled_query.is_batchable else None
+
+    def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        """
+        Executes the statement once for every parameters list. Override this
+        if the driver can do it faster (executemany or something like that)
+        """
+        for parameters_list in parameters:
+            self._execute_sql_statement(statement, parameters_list)
+
+    def load(
+            self, model: Type[ModelBase], rows: Iterable,
+            on_conflict: Optional[str] = None,
+            key: Optional[Sequence[str]] = None,
+            batch_size: Optional[int] = None, staging: bool = False,
+            progress: Optional[Callable[[LoadProgress], None]] = None,
+            progress_interval: float = 1.0) -> LoadProgress:
+        """
+        Inserts a lot of rows (instances of the model or tuples with every
+        field of it in the ._fields order) into the table of the model. The
+        rows are consumed lazily and inserted in multi-row statements of
+        batch_size rows (as many as the parameters limit allows by default).
+
+        on_conflict is None (conflicts are errors), "ignore" (the existing
+        rows are kept) or "update" (they are overwritten). Conflicts are
+        detected by the key fields, the primary key by default (see
+        bulk_loading.get_primary_key). Every field of the existing rows is
+        overwritten, so with "update" the instances without some of the
+        fields are rejected with MissingFieldsOnUpdate instead of writing
+        NULLs over them.
+
+        If staging is true, the rows are inserted into a temporary table
+        without any constraints first and then moved to the table of the
+        model by one statement, which is faster for very large loads into
+        indexed tables.
+
+        Everything is done in a transaction (a savepoint, if there is an
+        outer one), except in an outermost transaction with automatic commits
+        (see .transaction()): the batches are a part of it then, so a long
+        load is committed as it goes, and a failed load leaves the batches
+        of the committed parts in the table. progress is called with the
+        LoadProgress at most once every progress_interval seconds and when
+        the load is finished
+        """
+        tablename = model.get_tablename()
+        if not tablename:
+            raise exceptions.TablenameNotSpecifiedOnInsertion(
+                model_name=model.__name__
+            )
+        conflict_clause = make_conflict_clause(model, on_conflict, key)
+        field_names = tuple(model._fields)
+        max_batch_size = self.default_load_batch_size
+        if self.max_parameters_amount:
+            max_batch_size = max(
+                self.max_parameters_amount // max(len(field_names), 1), 1
+            )
+        batch_size = min(batch_size or max_batch_size, max_batch_size)
+        convert = None
+        if self.type_adapters is not None:
+            convert = self.type_adapters.get_fields_converter(
+                model, field_names
+            )
+        if staging:
+            staging_table = get_staging_table(model)
+            create_staging, move_staging, drop_staging = (
+                make_staging_statements(model, staging_table, conflict_clause)
+            )
+            tablename, conflict_clause = staging_table, ""
+        statements: Dict[int, CompiledQuery] = {}
+        reporter = ProgressReporter(progress, progress_interval)
+        if self._auto_commit_policy is not None and (
+            self._transaction_depth == 1
+        ):
+            transaction = nullcontext()
+        else:
+            transaction = self.transaction()
+        with transaction:
+            if staging:
+                self._run_statement_now(create_staging, [])
+            for batch in iterate_batches(
+                model, rows, batch_size, convert, on_conflict == "update"
+            ):
+                statement = statements.get(len(batch))
+                if statement is None:
+                    statement = statements[len(batch)] = compile_query(
+                        [FormattableString(make_insert_statement(
+                            tablename, field_names, "?", len(batch),
+                            conflict_clause
+                        ))],
+                        (None,) * (len(field_names) * len(batch)),
+                        self.new_parameter_mark, QUESTION_MARK_PATTERN,
+                        self.dialect
+                    )
+                self._run_statement_now(statement.query, statement.pack(
+                    list(itertools.chain.from_iterable(batch))
+                ))
+                reporter.add_batch(len(batch))
+            if staging:
+                self._run_statement_now(move_staging, [])
+                self._run_statement_now(drop_staging, [])
+        return reporter.finish()
+
+    def paginate(
+            self, model: Type[ModelBase], order_by: Union[str, Sequence[str]],
+            page_size: int = 100, where: Optional[str] = None,
+            parameters: Iterable = (), cursor: Optional[str] = None,
+            prefetch: bool = False, unique: bool = False) -> Paginator:
+        """
+        Pages (pagination.Page) of the rows of the table of the model, in the
+        order of the order_by fields ("-" before a field makes it
+        descending, and the primary key is added to the end). The pages are
+        selected by keyset ("WHERE (a,b) > (?,?)") instead of OFFSET, so with
+        an index on the order fields every page costs the same:
+
+        for page in sql_executor.paginate(A, "-b", page_size=50):
+            send(page.rows, page.cursor)
+
+        where is a condition with its parameters. Every page has the cursor
+        of the next one (an opaque string), which resumes the pagination
+        when it is passed here. With prefetch the next page is fetched on a
+        background thread while the current one is consumed.
+
+        Models without a primary key raise OrderNotUnique (rows with equal
+        order fields would be skipped), unless unique is true. Order fields
+        that may be NULL are handled, but they make the seek slower
+        """
+        return Paginator(
+            self, model, order_by, page_size, where, parameters, cursor,
+            prefetch, unique
+        )
+
+    def prefetch(
+            self, instances: Iterable[GenericModel], *relationships: str
+    ) -> List[GenericModel]:
+        """
+        Loads the relationships (see model_base.Related) of the instances of
+        a model with one query per relationship (chunked to fit the
+        parameters limit) instead of one query per instance, and sets them
+        as the attributes of the instances. Nested relationships are
+        separated by dots:
+
+        books = sql_executor.prefetch(
+            sql_executor.execute("SELECT * FROM books", model=Book),
+            "links.author"
+        )
+        authors = [link.author for link in books[0].links]
+
+        Returns the instances as a list
+        """
+        return prefetch(self, instances, relationships)
+
+    def _run_statement_now(self, statement: str, parameters: list):
+        """
+        Executes the statement and ignores its rows (if there are any)
+        """
+        if self._hooks:
+            self._instrument(
+                statement, 0.0, functools.partial(
+                    self._run_sql_statement, statement, parameters
+                ),
+                None
+            )
+        else:
+            self._run_sql_statement(statement, parameters)
+
     @abstractmethod
     def _execute_sql_statement(
             self, statement: str, parameters: list) -> Iterable[Sequence]:
@@ -85,27 +901,68 @@ class AbstractSQLExecutor(ABC):
 
 class EmptyAsyncIterator:
 
-    def __anext__(self):
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
         raise StopAsyncIteration
 
 
 class EmptyAsyncIterable:
 
-    def __aenter__(self):
+    def __aiter__(self):
         return EmptyAsyncIterator()
 
 
+class AsyncRowsIterator:
+    """
+    Asynchronous iterator over rows that are already fetched
+    """
+
+    def __init__(self, rows: Iterable):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
 class AbstractAsyncSQLExecutor(AbstractSQLExecutor, ABC):
 
     async def execute(
         self, sql_statement: Union[str, StringDump],
         parameters: Iterable = (), model: MaybeModel = None
     ) -> AsyncIterable[Union[Sequence, GenericModel]]:
-        query, arguments = self._prepare_query_and_arguments(
+        queries_and_arguments = self._prepare_queries_and_arguments(
             sql_statement, parameters
         )
-        rows = await self._execute_sql_statement(query, arguments)
-        return (model(*row) async for row in rows) if model else rows
+        for query, _ in queries_and_arguments:
+            await self._on_statement(query)
+        if len(queries_and_arguments) == 1:
+            rows = await self._execute_sql_statement(
+                *queries_and_arguments[0]
+            )
+        else:
+            rows_list = []
+            for query, arguments in queries_and_arguments:
+                async for row in await self._execute_sql_statement(
+                    query, arguments
+                ):
+                    rows_list.append(row)
+            rows = AsyncRowsIterator(rows_list)
+        return self._hydrate_async(model, rows) if model else rows
+
+    async def _hydrate_async(
+            self, model: Type[GenericModel], rows: AsyncIterable[Sequence]
+    ) -> AsyncIterable[GenericModel]:
+        map_row = self._make_row_mapper(model)
+        async for row in rows:
+            yield map_row(row)
 
     @abstractmethod
     async def _execute_sql_statement(
@@ -120,13 +977,189 @@ class AbstractAsyncSQLExecutor(AbstractSQLExecutor, ABC):
     async def execute_many(
         self, sql_statement: Union[str, StringDump],
         parameters: Iterable[Iterable] = (()), model: MaybeModel = None
-    ) -> Iterable[Iterable[Union[Sequence, GenericModel]]]:
+    ) -> List[AsyncIterable[Union[Sequence, GenericModel]]]:
         """
         Like .execute(), but executes the same query multiple times with
-        different arguments
+        different arguments (batched, like the synchronous version does)
         """
+        parameters = [
+            parameters_list if isinstance(parameters_list, (list, tuple))
+            else tuple(parameters_list)
+            for parameters_list in parameters
+        ]
+        compiled_query = self._compile_batch(sql_statement, parameters)
+        if compiled_query is not None:
+            await self._on_statement(compiled_query.query)
+            await self._execute_many_sql_statement(
+                compiled_query.query, map(
+                    compiled_query.bind, parameters,
+                    itertools.repeat(self.type_adapters)
+                )
+            )
+            return [EmptyAsyncIterable() for _ in parameters]
+        results = []
+        for parameters_list in parameters:
+            results.append(await self.stream(
+                sql_statement, parameters_list, model
+            ))
+        return results
+
+    async def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
         for parameters_list in parameters:
-            yield await self.execute(sql_statement, parameters_list, model)
+            await self._execute_sql_statement(statement, parameters_list)
+
+    async def stream(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: MaybeModel = None,
+            chunk_size: Optional[int] = None
+    ) -> AsyncIterable[Union[Sequence, GenericModel]]:
+        """
+        Like the synchronous .stream(): the query is executed when this
+        coroutine is awaited, the rows are fetched chunk by chunk while the
+        returned asynchronous iterable is iterated over
+        """
+        chunk_size = chunk_size or self.stream_chunk_size
+        chunks_iterables = []
+        for query, arguments in self._prepare_queries_and_arguments(
+            sql_statement, parameters
+        ):
+            await self._on_statement(query)
+            chunks_iterables.append(
+                await self._stream_sql_statement(query, arguments, chunk_size)
+            )
+        return self._iterate_async_chunks(chunks_iterables, model)
+
+    async def _iterate_async_chunks(
+            self, chunks_iterables: List[AsyncIterable[Sequence[Sequence]]],
+            model: MaybeModel
+    ) -> AsyncIterable[Union[Sequence, GenericModel]]:
+        for chunks in chunks_iterables:
+            async for chunk in chunks:
+                if model:
+                    for row in self._hydrate(model, chunk):
+                        yield row
+                else:
+                    for row in chunk:
+                        yield row
+
+    async def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> AsyncIterable[Sequence[Sequence]]:
+        rows = await self._execute_sql_statement(statement, parameters)
+        return self._chunk_async_rows(rows, chunk_size)
+
+    @staticmethod
+    async def _chunk_async_rows(
+            rows: AsyncIterable[Sequence], chunk_size: int
+    ) -> AsyncIterable[Sequence[Sequence]]:
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def execute_columns(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: Type[ModelBase] = None,
+            typed: bool = True, as_numpy: bool = False,
+            chunk_size: Optional[int] = None
+    ) -> Dict[str, Column]:
+        chunk_size = chunk_size or self.stream_chunk_size
+        columns_builder = ColumnsBuilder(model, typed, self.type_adapters)
+        for query, arguments in self._prepare_queries_and_arguments(
+            sql_statement, parameters
+        ):
+            await self._on_statement(query)
+            async for chunk in await self._stream_sql_statement(
+                query, arguments, chunk_size
+            ):
+                columns_builder.add_chunk(chunk)
+        return columns_builder.build(as_numpy)
+
+    async def _on_statement(self, statement: str):
+        """
+        Like the synchronous ._on_statement(), but awaits the automatic
+        commits
+        """
+        if self.result_cache is not None:
+            written_tables = get_written_tables(statement)
+            if written_tables:
+                self.result_cache.invalidate_tables(written_tables)
+        policy = self._auto_commit_policy
+        if policy is not None:
+            if self._transaction_depth == 1:
+                await self._commit_if_due()
+            policy.statements += 1
+
+    async def _commit_if_due(self):
+        policy = self._auto_commit_policy
+        if policy is not None and policy.is_due():
+            await self.commit()
+            await self._begin_transaction()
+            policy.commits += 1
+            policy.reset()
+
+    @asynccontextmanager
+    async def transaction(
+            self, commit_every: Optional[int] = None,
+            commit_interval: Optional[float] = None
+    ) -> AsyncIterator["AbstractAsyncSQLExecutor"]:
+        """
+        async with sql_executor.transaction():
+            ...
+
+        See the synchronous .transaction()
+        """
+        depth = self._transaction_depth
+        savepoint = f"sql_mapper_savepoint_{depth}"
+        if depth == 0:
+            await self._begin_transaction()
+            if commit_every or commit_interval is not None:
+                self._auto_commit_policy = AutoCommitPolicy(
+                    commit_every, commit_interval
+                )
+        else:
+            if commit_every or commit_interval is not None:
+                raise exceptions.NestedAutoCommit()
+            await self._execute_sql_statement(f"SAVEPOINT {savepoint}", [])
+        self._transaction_depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth = depth
+            if depth == 0:
+                self._auto_commit_policy = None
+                await self.rollback()
+            else:
+                await self._execute_sql_statement(
+                    f"ROLLBACK TO SAVEPOINT {savepoint}", []
+                )
+                await self._execute_sql_statement(
+                    f"RELEASE SAVEPOINT {savepoint}", []
+                )
+                self._after_rollback()
+            raise
+        self._transaction_depth = depth
+        if depth == 0:
+            self._auto_commit_policy = None
+            await self.commit()
+        else:
+            await self._execute_sql_statement(
+                f"RELEASE SAVEPOINT {savepoint}", []
+            )
+            if depth == 1:
+                await self._commit_if_due()
+
+    async def _begin_transaction(self):
+        await self._execute_sql_statement("BEGIN", [])
+
+    async def rollback(self):
+        await self._execute_sql_statement("ROLLBACK", [])
+        self._after_rollback()
 
     @abstractmethod
     async def commit(self):
@@ -0,0 +1,432 @@
+import asyncio
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List,
+    Optional, Sequence, Type, Union
+)
+
+from sql_mapper.abstract_sql_executor import (
+    AbstractAsyncSQLExecutor, AbstractSQLExecutor, AsyncRowsIterator,
+    GenericModel, MaybeModel
+)
+from sql_mapper.bulk_loading import LoadProgress
+from sql_mapper.columnar import Column
+from sql_mapper.instrumentation import QueryHook
+from sql_mapper.dialects import SQLITE
+from sql_mapper.model_base import ModelBase
+from sql_mapper.pagination import Page, Paginator
+from sql_mapper.prepared_statement import PreparedStatement
+from sql_mapper.result_cache import ResultCache
+from sql_mapper.sql_executors import (
+    SQLiteSQLExecutor, PooledSQLiteSQLExecutor
+)
+from sql_mapper.string_dump import StringDump
+from sql_mapper.type_adapters import TypeAdapters
+
+
+class AsyncPreparedStatement:
+    """
+    A PreparedStatement of the synchronous executor of an
+    AsyncSQLiteSQLExecutor, executed on the threads of it:
+
+    insert_a = sql_executor.prepare("INSERT INTO ?", A)
+    await insert_a(A(1, "a"))
+
+    Get it from AsyncSQLiteSQLExecutor.prepare()
+    """
+
+    def __init__(
+            self, sql_executor: "AsyncSQLiteSQLExecutor",
+            prepared_statement: PreparedStatement):
+        self.sql_executor = sql_executor
+        self.prepared_statement = prepared_statement
+
+    @property
+    def query(self) -> str:
+        return self.prepared_statement.query
+
+    async def __call__(
+            self, *arguments
+    ) -> AsyncIterable[Union[Sequence, ModelBase]]:
+        rows = await self.sql_executor._run(
+            self._call_synchronously, arguments
+        )
+        return AsyncRowsIterator(rows)
+
+    def _call_synchronously(self, arguments: Sequence) -> list:
+        return list(self.prepared_statement(*arguments))
+
+    async def execute_many(
+            self, arguments_lists: Iterable[Sequence]
+    ) -> List[AsyncIterable[Union[Sequence, ModelBase]]]:
+        results = await self.sql_executor._run(
+            self._execute_many_synchronously, arguments_lists
+        )
+        return [AsyncRowsIterator(rows) for rows in results]
+
+    def _execute_many_synchronously(
+            self, arguments_lists: Iterable[Sequence]) -> List[list]:
+        return [
+            list(rows)
+            for rows in self.prepared_statement.execute_many(arguments_lists)
+        ]
+
+
+class AsyncSQLiteSQLExecutor(AbstractAsyncSQLExecutor):
+    """
+    Runs a synchronous SQLite executor (SQLiteSQLExecutor or
+    PooledSQLiteSQLExecutor) on its own threads, so the event loop is never
+    blocked by the database or by the mapping of the rows. A plain
+    SQLiteSQLExecutor should get only one thread, because its connection
+    can't be used by multiple threads at once.
+
+    At most max_concurrency statements are handed to the threads at once, the
+    rest wait for their turn on the event loop. Keep in mind that an
+    unfinished .stream() of a pooled executor holds a reader connection
+    """
+    new_parameter_mark = "?"
+    dialect = SQLITE
+
+    def __init__(
+            self, sync_executor: AbstractSQLExecutor, threads_amount: int = 1,
+            max_concurrency: int = 64):
+        self.sync_executor = sync_executor
+        self.max_parameters_amount = sync_executor.max_parameters_amount
+        self.max_concurrency = max_concurrency
+        self.threads_amount = threads_amount
+        self._threads = ThreadPoolExecutor(
+            threads_amount, thread_name_prefix="sql_mapper"
+        )
+        # The thread of the transaction (see .transaction()), if there are
+        # several threads
+        self._transaction_thread: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def new(
+            cls, file_path: str, pool_size: Optional[int] = None,
+            max_concurrency: int = 64):
+        """
+        Without pool_size everything is executed on one dedicated thread with
+        one connection, with pool_size there is a PooledSQLiteSQLExecutor
+        underneath and a thread for every connection of it
+        """
+        if pool_size is None:
+            connection = sqlite3.connect(file_path, check_same_thread=False)
+            return cls(
+                SQLiteSQLExecutor(connection, connection.cursor()),
+                threads_amount=1, max_concurrency=max_concurrency
+            )
+        return cls(
+            PooledSQLiteSQLExecutor.new(file_path, pool_size),
+            threads_amount=pool_size + 1, max_concurrency=max_concurrency
+        )
+
+    @property
+    def type_adapters(self) -> Optional[TypeAdapters]:
+        """
+        The rows are mapped by the synchronous executor, so it is its
+        .type_adapters
+        """
+        return self.sync_executor.type_adapters
+
+    @type_adapters.setter
+    def type_adapters(self, type_adapters: Optional[TypeAdapters]):
+        self.sync_executor.type_adapters = type_adapters
+
+    @property
+    def result_cache(self) -> Optional[ResultCache]:
+        """
+        The rows are cached and the writes invalidate them in the
+        synchronous executor, so it is its .result_cache
+        """
+        return self.sync_executor.result_cache
+
+    @result_cache.setter
+    def result_cache(self, result_cache: Optional[ResultCache]):
+        self.sync_executor.result_cache = result_cache
+
+    def add_hook(self, hook: QueryHook):
+        """
+        The statements are executed by the synchronous executor, so the hook
+        is added to it and gets the events on the threads of this executor
+        """
+        self.sync_executor.add_hook(hook)
+
+    def remove_hook(self, hook: QueryHook):
+        self.sync_executor.remove_hook(hook)
+
+    async def _run(self, function: Callable, *arguments):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._transaction_thread or self._threads, function,
+                *arguments
+            )
+
+    async def execute(
+        self, sql_statement: Union[str, StringDump],
+        parameters: Iterable = (), model: MaybeModel = None
+    ) -> AsyncIterable[Union[Sequence, GenericModel]]:
+        rows = await self._run(
+            self._execute_synchronously, sql_statement, parameters, model
+        )
+        return AsyncRowsIterator(rows)
+
+    def _execute_synchronously(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable, model: MaybeModel) -> list:
+        return list(self.sync_executor.execute(
+            sql_statement, parameters, model
+        ))
+
+    async def execute_cached(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: MaybeModel = None,
+            ttl: Optional[float] = None
+    ) -> AsyncIterable[Union[Sequence, GenericModel]]:
+        rows = await self._run(
+            self._execute_cached_synchronously, sql_statement, parameters,
+            model, ttl
+        )
+        return AsyncRowsIterator(rows)
+
+    def _execute_cached_synchronously(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable, model: MaybeModel,
+            ttl: Optional[float]) -> list:
+        return list(self.sync_executor.execute_cached(
+            sql_statement, parameters, model, ttl
+        ))
+
+    def prepare(
+            self, sql_statement: Union[str, StringDump],
+            *argument_models: Optional[Type[ModelBase]],
+            model: MaybeModel = None
+    ) -> AsyncPreparedStatement:
+        """
+        See AbstractSQLExecutor.prepare(), the statement is compiled right
+        away and executed on the threads of the executor
+        """
+        return AsyncPreparedStatement(self, self.sync_executor.prepare(
+            sql_statement, *argument_models, model=model
+        ))
+
+    async def _execute_sql_statement(
+            self, statement: str, parameters: list) -> AsyncIterable[Sequence]:
+        rows = await self._run(
+            self._execute_sql_statement_synchronously, statement, parameters
+        )
+        return AsyncRowsIterator(rows)
+
+    def _execute_sql_statement_synchronously(
+            self, statement: str, parameters: list) -> list:
+        return list(self.sync_executor._execute_sql_statement(
+            statement, parameters
+        ))
+
+    async def execute_many(
+        self, sql_statement: Union[str, StringDump],
+        parameters: Iterable[Iterable] = (()), model: MaybeModel = None
+    ) -> List[AsyncIterable[Union[Sequence, GenericModel]]]:
+        results = await self._run(
+            self._execute_many_synchronously, sql_statement, parameters, model
+        )
+        return [AsyncRowsIterator(rows) for rows in results]
+
+    def _execute_many_synchronously(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable[Iterable], model: MaybeModel
+    ) -> List[list]:
+        return [
+            list(rows) for rows in self.sync_executor.execute_many(
+                sql_statement, parameters, model
+            )
+        ]
+
+    async def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        await self._run(
+            self.sync_executor._execute_many_sql_statement, statement,
+            parameters
+        )
+
+    async def stream(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: MaybeModel = None,
+            chunk_size: Optional[int] = None
+    ) -> AsyncIterable[Union[Sequence, GenericModel]]:
+        chunk_size = chunk_size or self.stream_chunk_size
+        chunks = await self._run(
+            self.sync_executor._stream_chunks, sql_statement, parameters,
+            chunk_size
+        )
+        return self._iterate_chunks_on_threads(chunks, model)
+
+    async def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> AsyncIterable[Sequence[Sequence]]:
+        chunks = await self._run(
+            self.sync_executor._stream_sql_statement, statement, parameters,
+            chunk_size
+        )
+        return self._iterate_chunks_on_threads(iter(chunks), None, flat=False)
+
+    async def _iterate_chunks_on_threads(
+            self, chunks: Iterator[Sequence[Sequence]], model: MaybeModel,
+            flat: bool = True) -> AsyncIterable:
+        while True:
+            chunk = await self._run(self._next_chunk, chunks, model)
+            if chunk is None:
+                break
+            if flat:
+                for row in chunk:
+                    yield row
+            else:
+                yield chunk
+
+    def _next_chunk(
+            self, chunks: Iterator[Sequence[Sequence]], model: MaybeModel
+    ) -> Optional[Sequence]:
+        chunk = next(chunks, None)
+        if chunk is None or not model:
+            return chunk
+        return list(self._hydrate(model, chunk))
+
+    async def execute_columns(
+            self, sql_statement: Union[str, StringDump],
+            parameters: Iterable = (), model: Type[ModelBase] = None,
+            typed: bool = True, as_numpy: bool = False,
+            chunk_size: Optional[int] = None
+    ) -> Dict[str, Column]:
+        return await self._run(
+            self.sync_executor.execute_columns, sql_statement, parameters,
+            model, typed, as_numpy, chunk_size
+        )
+
+    async def load(
+            self, model: Type[ModelBase], rows: Iterable,
+            on_conflict: Optional[str] = None,
+            key: Optional[Sequence[str]] = None,
+            batch_size: Optional[int] = None, staging: bool = False,
+            progress: Optional[Callable[[LoadProgress], None]] = None,
+            progress_interval: float = 1.0) -> LoadProgress:
+        """
+        See AbstractSQLExecutor.load(), the rows are consumed (and progress
+        is called) on a thread of the executor
+        """
+        return await self._run(
+            self.sync_executor.load, model, rows, on_conflict, key,
+            batch_size, staging, progress, progress_interval
+        )
+
+    async def paginate(
+            self, model: Type[ModelBase], order_by: Union[str, Sequence[str]],
+            page_size: int = 100, where: Optional[str] = None,
+            parameters: Iterable = (), cursor: Optional[str] = None,
+            prefetch: bool = False,
+            unique: bool = False) -> AsyncIterator[Page]:
+        """
+        See AbstractSQLExecutor.paginate(), the pages are fetched on the
+        threads of the executor, and with prefetch the next one is fetched
+        while the current one is consumed:
+
+        async for page in sql_executor.paginate(A, "b"):
+            ...
+        """
+        paginator = Paginator(
+            self.sync_executor, model, order_by, page_size, where, parameters,
+            cursor, unique=unique
+        )
+        next_page: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if next_page is None:
+                    page = await self._run(paginator.fetch_page, cursor)
+                else:
+                    page = await next_page
+                    next_page = None
+                cursor = page.cursor
+                if cursor is not None and prefetch:
+                    next_page = asyncio.ensure_future(
+                        self._run(paginator.fetch_page, cursor)
+                    )
+                yield page
+                if cursor is None:
+                    return
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def prefetch(
+            self, instances: Iterable[GenericModel], *relationships: str
+    ) -> List[GenericModel]:
+        """
+        See AbstractSQLExecutor.prefetch(), the relationships are loaded on
+        a thread of the executor
+        """
+        return await self._run(
+            self.sync_executor.prefetch, instances, *relationships
+        )
+
+    async def commit(self):
+        await self._run(self.sync_executor.commit)
+
+    async def rollback(self):
+        # The synchronous executor clears the result cache
+        await self._run(self.sync_executor.rollback)
+
+    async def _begin_transaction(self):
+        await self._run(self.sync_executor._begin_transaction)
+
+    @asynccontextmanager
+    async def transaction(
+            self, commit_every: Optional[int] = None,
+            commit_interval: Optional[float] = None
+    ) -> AsyncIterator["AsyncSQLiteSQLExecutor"]:
+        """
+        async with sql_executor.transaction():
+            ...
+
+        Works like AbstractSQLExecutor.transaction() of the synchronous
+        executor. Every statement executed by this executor while the block
+        runs becomes a part of the transaction, so don't run unrelated
+        statements concurrently with it. They are all executed on one thread,
+        because the transactions of PooledSQLiteSQLExecutor are per thread
+        """
+        outermost = (
+            self._transaction_thread is None and self.threads_amount > 1
+        )
+        if outermost:
+            self._transaction_thread = ThreadPoolExecutor(
+                1, thread_name_prefix="sql_mapper_transaction"
+            )
+        transaction = self.sync_executor.transaction(
+            commit_every, commit_interval
+        )
+        try:
+            await self._run(transaction.__enter__)
+            try:
+                yield self
+            except BaseException:
+                if not await self._run(
+                    transaction.__exit__, *sys.exc_info()
+                ):
+                    raise
+            else:
+                await self._run(transaction.__exit__, None, None, None)
+        finally:
+            if outermost:
+                self._transaction_thread.shutdown(wait=False)
+                self._transaction_thread = None
+
+    async def create_tables(self, *tables: Type[ModelBase]):
+        await self._run(self.sync_executor.create_tables, *tables)
+
+    async def close(self):
+        await self._run(self.sync_executor.close)
+        self._threads.shutdown()
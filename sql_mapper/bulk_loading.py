@@ -0,0 +1,196 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import (
+    Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+)
+
+from sql_mapper import exceptions
+from sql_mapper.model_base import ModelBase
+
+CONFLICT_ACTIONS = (None, "ignore", "update")
+PRIMARY_KEY_PATTERN = re.compile(r"\bPRIMARY\s+KEY\s*\(([^)]*)\)", re.I)
+COLUMN_PRIMARY_KEY_PATTERN = re.compile(r"\bPRIMARY\s+KEY\b", re.I)
+
+
+def get_primary_key(model: Type[ModelBase]) -> Tuple[str, ...]:
+    """
+    The fields of the ._primary_key of the model (a tuple of field names),
+    or the ones of "PRIMARY KEY (...)" in its ._additional_table_lines, or
+    the ones declared with "PRIMARY KEY" in their types. Empty if there are
+    none of them
+    """
+    primary_key = getattr(model, "_primary_key", None)
+    if primary_key:
+        return tuple(primary_key)
+    match = PRIMARY_KEY_PATTERN.search(
+        getattr(model, "_additional_table_lines", None) or ""
+    )
+    if match:
+        return tuple(
+            field_name.strip().split()[0]
+            for field_name in match.group(1).split(",")
+            if field_name.strip()
+        )
+    return tuple(
+        field_name for field_name, sql_type in model._fields.items()
+        if isinstance(sql_type, str)
+        and COLUMN_PRIMARY_KEY_PATTERN.search(sql_type)
+    )
+
+
+def make_conflict_clause(
+        model: Type[ModelBase], on_conflict: Optional[str],
+        key: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Makes the "ON CONFLICT ..." part of an upsert (an empty string if
+    on_conflict is None, so the conflicts are errors). "ignore" keeps the
+    existing rows, "update" overwrites every field of them except the key
+    ones (so the loaded rows should have all the fields). The key is the
+    primary key of the model by default
+    """
+    if on_conflict not in CONFLICT_ACTIONS:
+        raise exceptions.UnknownConflictAction(on_conflict)
+    if on_conflict is None:
+        return ""
+    if on_conflict == "ignore" and not key:
+        return " ON CONFLICT DO NOTHING"
+    key = tuple(key or get_primary_key(model))
+    if not key:
+        raise exceptions.ConflictKeyNotSpecified(model_name=model.__name__)
+    target = f" ON CONFLICT({','.join(key)})"
+    if on_conflict == "ignore":
+        return target + " DO NOTHING"
+    assignments = ",".join(
+        f"{field_name}=excluded.{field_name}"
+        for field_name in model._fields if field_name not in key
+    )
+    if not assignments:
+        return target + " DO NOTHING"
+    return f"{target} DO UPDATE SET {assignments}"
+
+
+def make_insert_statement(
+        tablename: str, field_names: Sequence[str], new_parameter_mark: str,
+        rows_amount: int, conflict_clause: str = "") -> str:
+    row = "(" + ",".join(new_parameter_mark for _ in field_names) + ")"
+    return (
+        f"INSERT INTO {tablename}({','.join(field_names)})VALUES"
+        + ",".join(row for _ in range(rows_amount))
+        + conflict_clause
+    )
+
+
+def get_staging_table(model: Type[ModelBase]) -> str:
+    return "sql_mapper_staging_" + re.sub(r"\W", "_", model.get_tablename())
+
+
+def make_staging_statements(
+        model: Type[ModelBase], staging_table: str, conflict_clause: str
+) -> Tuple[str, str, str]:
+    """
+    Statements that create the staging table (with the columns of the table
+    of the model, but without its constraints), move its rows to the table of
+    the model and drop it
+    """
+    tablename = model.get_tablename()
+    field_names = ",".join(model._fields)
+    # "WHERE true" tells the parser the ON CONFLICT is not a part of a join
+    return (
+        f"CREATE TEMP TABLE {staging_table} AS "
+        f"SELECT {field_names} FROM {tablename} WHERE 0",
+        f"INSERT INTO {tablename}({field_names}) "
+        f"SELECT {field_names} FROM {staging_table} WHERE true"
+        + conflict_clause,
+        f"DROP TABLE {staging_table}"
+    )
+
+
+@dataclass
+class LoadProgress:
+    rows: int = 0
+    batches: int = 0
+    elapsed_time: float = 0.0
+    finished: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_time if self.elapsed_time else 0.0
+
+
+class ProgressReporter:
+    """
+    Calls the callback with the LoadProgress at most once every interval
+    seconds (and once more when the load is finished)
+    """
+
+    def __init__(
+            self, callback: Optional[Callable[[LoadProgress], None]],
+            interval: float = 1.0):
+        self.callback = callback
+        self.interval = interval
+        self.progress = LoadProgress()
+        self._started_at = time.perf_counter()
+        self._reported_at = self._started_at
+
+    def add_batch(self, rows_amount: int):
+        progress = self.progress
+        progress.rows += rows_amount
+        progress.batches += 1
+        now = time.perf_counter()
+        progress.elapsed_time = now - self._started_at
+        if (
+            self.callback is not None
+            and now - self._reported_at >= self.interval
+        ):
+            self._reported_at = now
+            self.callback(progress)
+
+    def finish(self) -> LoadProgress:
+        progress = self.progress
+        progress.elapsed_time = time.perf_counter() - self._started_at
+        progress.finished = True
+        if self.callback is not None:
+            self.callback(progress)
+        return progress
+
+
+def iterate_batches(
+        model: Type[ModelBase], rows: Iterable, batch_size: int,
+        convert: Optional[Callable[[Iterable], tuple]] = None,
+        complete: bool = False) -> Iterator[List[tuple]]:
+    """
+    Turns the rows (instances of the model or tuples with every field of it
+    in the ._fields order) into batches of tuples. The missing fields of the
+    instances are NULLs, or MissingFieldsOnUpdate is raised if complete is
+    true
+    """
+    field_names = tuple(model._fields)
+    fields_amount = len(field_names)
+    batch = []
+    for row in rows:
+        if isinstance(row, ModelBase):
+            instance_fields = row.instance_fields
+            if complete and len(instance_fields) < fields_amount:
+                raise exceptions.MissingFieldsOnUpdate(
+                    model_name=model.__name__, field_names=[
+                        field_name for field_name in field_names
+                        if field_name not in instance_fields
+                    ]
+                )
+            row = tuple(
+                instance_fields.get(field_name) for field_name in field_names
+            )
+        elif len(row) != fields_amount:
+            raise exceptions.RowLengthMismatch(
+                model_name=model.__name__, fields_amount=fields_amount,
+                row_length=len(row)
+            )
+        if convert is not None:
+            row = convert(row)
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,104 @@
+from array import array
+from typing import Dict, Iterable, Optional, Sequence, Type, Union, List
+
+from sql_mapper import exceptions
+from sql_mapper.model_base import ModelBase
+from sql_mapper.type_adapters import TypeAdapters, get_type_name
+
+# array.array type codes for the declared SQL types (see get_type_name)
+SQL_TYPE_CODES = {
+    "INTEGER": "q", "INT": "q", "BIGINT": "q", "SMALLINT": "q",
+    "REAL": "d", "FLOAT": "d", "DOUBLE": "d"
+}
+
+Column = Union[list, array]
+
+
+def get_type_code(sql_type) -> Optional[str]:
+    return SQL_TYPE_CODES.get(get_type_name(sql_type))
+
+
+def _new_column(type_code: Optional[str]) -> Column:
+    return [] if type_code is None else array(type_code)
+
+
+class ColumnsBuilder:
+    """
+    Turns chunks of rows into columns, one column per field of the model (in
+    the ._fields order). If typed is true, INTEGER and REAL columns are
+    array.array's (until they meet something that is not a number, like
+    NULL, then they become lists). Columns of fields with a to_python
+    adapter in the type_adapters are converted a chunk at a time. The model
+    is required
+    """
+
+    def __init__(
+            self, model: Type[ModelBase], typed: bool = True,
+            type_adapters: Optional[TypeAdapters] = None):
+        if model is None:
+            raise exceptions.ColumnsModelNotSpecified()
+        self.model = model
+        self.field_names = tuple(model._fields)
+        self.converters = (
+            type_adapters.get_python_converters(model)
+            if type_adapters is not None else (None,) * len(self.field_names)
+        )
+        self.columns: List[Column] = [
+            _new_column(get_type_code(sql_type) if typed else None)
+            for sql_type in model._fields.values()
+        ]
+
+    def add_chunk(self, chunk: Sequence[Sequence]):
+        if not chunk:
+            return
+        if len(chunk[0]) != len(self.field_names):
+            raise exceptions.ColumnsAmountMismatch(
+                model_name=self.model.__name__,
+                fields_amount=len(self.field_names),
+                columns_amount=len(chunk[0])
+            )
+        columns = self.columns
+        converters = self.converters
+        for index, values in enumerate(zip(*chunk)):
+            convert = converters[index]
+            if convert is not None:
+                values = [
+                    value if value is None else convert(value)
+                    for value in values
+                ]
+            column = columns[index]
+            length = len(column)
+            try:
+                column.extend(values)
+            except TypeError:
+                # array.array.extend keeps the values it added before failing
+                del column[length:]
+                column = columns[index] = column.tolist()
+                column.extend(values)
+
+    def build(self, as_numpy: bool = False) -> Dict[str, Column]:
+        """
+        If as_numpy is true, every column becomes a NumPy array (typed arrays
+        are converted without copying)
+        """
+        columns = self.columns
+        if as_numpy:
+            import numpy
+            columns = [
+                numpy.frombuffer(column, dtype=column.typecode)
+                if isinstance(column, array) else
+                numpy.array(column, dtype=object)
+                for column in columns
+            ]
+        return dict(zip(self.field_names, columns))
+
+
+def fill_columns(
+        chunks: Iterable[Sequence[Sequence]], model: Type[ModelBase],
+        typed: bool = True, as_numpy: bool = False,
+        type_adapters: Optional[TypeAdapters] = None
+) -> Dict[str, Column]:
+    columns_builder = ColumnsBuilder(model, typed, type_adapters)
+    for chunk in chunks:
+        columns_builder.add_chunk(chunk)
+    return columns_builder.build(as_numpy)
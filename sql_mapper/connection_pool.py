@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+
+from sql_mapper import exceptions
+
+Connection = TypeVar("Connection")
+
+
+@dataclass
+class PoolMetrics:
+    size: int
+    in_use: int
+    checkouts: int
+    total_wait_time: float
+    max_wait_time: float
+
+    @property
+    def utilization(self) -> float:
+        return self.in_use / self.size if self.size else 0.0
+
+    @property
+    def average_wait_time(self) -> float:
+        return self.total_wait_time / self.checkouts if self.checkouts else 0.0
+
+
+class ConnectionPool(Generic[Connection]):
+    """
+    A fixed amount of connections. Whoever checks out a connection owns it
+    until it is returned, the others wait in a queue
+    """
+
+    def __init__(
+            self, connection_factory: Callable[[], Connection], size: int,
+            timeout: Optional[float] = None):
+        self.size = size
+        self.timeout = timeout
+        self.connections: List[Connection] = [
+            connection_factory() for _ in range(size)
+        ]
+        self._idle_connections: "queue.Queue[Connection]" = queue.Queue()
+        for connection in self.connections:
+            self._idle_connections.put(connection)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @contextmanager
+    def checkout(self) -> Iterator[Connection]:
+        started_waiting_at = time.perf_counter()
+        try:
+            connection = self._idle_connections.get(timeout=self.timeout)
+        except queue.Empty:
+            raise exceptions.PoolTimeout(self.timeout) from None
+        wait_time = time.perf_counter() - started_waiting_at
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle_connections.put(connection)
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        with self._lock:
+            return PoolMetrics(
+                size=self.size, in_use=self._in_use,
+                checkouts=self._checkouts,
+                total_wait_time=self._total_wait_time,
+                max_wait_time=self._max_wait_time
+            )
@@ -0,0 +1,169 @@
+import functools
+import itertools
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Everything a parameter mark may hide in: string literals, quoted
+# identifiers and comments
+_SKIPPED_TOKENS = r"'[^']*'|\"[^\"]*\"|`[^`]*`|--[^\n]*|/\*.*?\*/"
+_BRACKETS_SKIPPED_TOKENS = _SKIPPED_TOKENS + r"|\[[^\]]*\]"
+# The "?" marks are the only matches that are one character long
+_TOKEN_PATTERN = re.compile(_SKIPPED_TOKENS + r"|\?", re.DOTALL)
+_BRACKETS_TOKEN_PATTERN = re.compile(
+    _BRACKETS_SKIPPED_TOKENS + r"|\?", re.DOTALL
+)
+# If none of them is in a statement, every "?" of it is a parameter mark
+# (looking for them one by one is faster than a search of a pattern)
+_TOKEN_STARTS = ("'", '"', "`", "--", "/*")
+_BRACKETS_TOKEN_STARTS = _TOKEN_STARTS + ("[",)
+
+
+def split_parameter_marks(
+        query: str, bracket_identifiers: bool = False) -> List[str]:
+    """
+    Splits the query by its "?" parameter marks, skipping the ones in string
+    literals, quoted identifiers ("a", `a` and [a], if bracket_identifiers)
+    and comments, in one pass. Queries without any of those are split by
+    str.split()
+    """
+    if "?" not in query:
+        return [query]
+    if bracket_identifiers:
+        token_starts, pattern = _BRACKETS_TOKEN_STARTS, _BRACKETS_TOKEN_PATTERN
+    else:
+        token_starts, pattern = _TOKEN_STARTS, _TOKEN_PATTERN
+    for token_start in token_starts:
+        if token_start in query:
+            break
+    else:
+        return query.split("?")
+    parts = []
+    start = 0
+    for match in pattern.finditer(query):
+        if match.end() - match.start() == 1:
+            parts.append(query[start:match.start()])
+            start = match.end()
+    parts.append(query[start:])
+    return parts
+
+
+@dataclass(frozen=True, eq=False)
+class Dialect:
+    """
+    How the parameter marks look in the statements sent to the database
+    connector. The statements are written with "?" marks, which are found by
+    split_parameter_marks() and replaced with .mark: "?" or "%s" for
+    positional marks, a mark with "{index}" for numbered ones (":1", "$1")
+    and with "{name}" for named ones (":p1"), which are bound as a dict.
+
+    Compared by identity, so it is cheap to hash in the keys of the compiled
+    queries
+    """
+    mark: str
+    first_index: int = 1
+    # The names of the named marks are the prefix and the index
+    name_prefix: str = "p"
+    # SQLite quotes identifiers with [...] too
+    bracket_identifiers: bool = False
+
+    @property
+    def is_named(self) -> bool:
+        return "{name}" in self.mark
+
+    @property
+    def is_positional(self) -> bool:
+        return "{" not in self.mark
+
+    def split(self, query: str) -> List[str]:
+        """
+        So a dialect can be passed to get_query_parts() of the formattable
+        strings in place of a pattern
+        """
+        return split_parameter_marks(query, self.bracket_identifiers)
+
+    def make_marks(self, start: int, amount: int) -> List[str]:
+        """
+        The marks of the parameters start, ..., start + amount - 1 (counted
+        from 0)
+        """
+        if self.is_positional:
+            return [self.mark] * amount
+        if self.is_named:
+            before, after = self.mark.split("{name}", 1)
+            before += self.name_prefix
+        else:
+            before, after = self.mark.split("{index}", 1)
+        start += self.first_index
+        return [
+            f"{before}{index}{after}" for index in range(start, start + amount)
+        ]
+
+    def get_parameter_names(self, amount: int) -> Tuple[str, ...]:
+        return tuple(
+            f"{self.name_prefix}{index}"
+            for index in range(self.first_index, self.first_index + amount)
+        )
+
+    def find_keys(self, query: str) -> List[str]:
+        """
+        The names (or the indexes, as strings) of the named (or numbered)
+        marks of the dialect in an already rewritten query, outside of its
+        literals, quoted identifiers and comments. Every positional mark has
+        an empty key
+        """
+        return [
+            match.group("key")
+            for match in _get_marks_pattern(self).finditer(query)
+            if match.group("key") is not None
+        ]
+
+    def escape(self, query_part: str) -> str:
+        """
+        Connectors with "%" marks need the other "%" doubled
+        """
+        if "%" in self.mark:
+            return query_part.replace("%", "%%")
+        return query_part
+
+    def rewrite(self, query: str) -> str:
+        """
+        The query with its "?" marks replaced with the marks of the dialect
+        """
+        parts = self.split(query)
+        if "%" in self.mark:
+            parts = [part.replace("%", "%%") for part in parts]
+        marks = self.make_marks(0, len(parts) - 1)
+        marks.append("")
+        return "".join(itertools.chain.from_iterable(zip(parts, marks)))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_marks_pattern(dialect: Dialect) -> re.Pattern:
+    """
+    Matches the skipped tokens and the marks of the dialect, with the name
+    or the index of a mark in the "key" group
+    """
+    if dialect.is_positional:
+        before, after, key = dialect.mark, "", ""
+    elif dialect.is_named:
+        before, after = dialect.mark.split("{name}", 1)
+        key = re.escape(dialect.name_prefix) + r"\d+"
+    else:
+        before, after = dialect.mark.split("{index}", 1)
+        key = r"\d+"
+    skipped_tokens = (
+        _BRACKETS_SKIPPED_TOKENS if dialect.bracket_identifiers
+        else _SKIPPED_TOKENS
+    )
+    mark = f"{re.escape(before)}(?P<key>{key}){re.escape(after)}"
+    return re.compile(f"{skipped_tokens}|{mark}", re.DOTALL)
+
+
+QMARK = Dialect("?")
+SQLITE = Dialect("?", bracket_identifiers=True)
+FORMAT = Dialect("%s")
+NUMERIC = Dialect(":{index}")
+DOLLAR = Dialect("${index}")
+NAMED = Dialect(":{name}")
+PYFORMAT = Dialect("%({name})s")
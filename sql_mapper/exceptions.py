@@ -59,3 +59,257 @@ class TablenameNotSpecifiedOnInsertion(_ModelNameMixin, Exception):
             f"mapper doesn't know what tablename to use in query parameter "
             f"mark substitution, so add the tablename to the model!"
         )
+
+
+class NotEnoughArguments(Exception):
+
+    def __init__(self, given_amount: int):
+        self.given_amount = given_amount
+
+    def __str__(self):
+        return (
+            f"query has more parameter marks than the {self.given_amount} "
+            f"arguments that were given"
+        )
+
+
+class DifferentModelsInOneSequence(Exception):
+
+    def __init__(self, first_model: str, other_model: str):
+        self.first_model = first_model
+        self.other_model = other_model
+
+    def __str__(self):
+        return (
+            f"every model in a sequence of models should have the same class "
+            f"and the same fields, but {self.first_model} and "
+            f"{self.other_model} differ"
+        )
+
+
+class ColumnsModelNotSpecified(Exception):
+
+    def __str__(self):
+        return (
+            "the columns are named and typed by the fields of a model, so "
+            "pass model="
+        )
+
+
+class ColumnsAmountMismatch(Exception):
+
+    def __init__(
+            self, model_name: str, fields_amount: int, columns_amount: int):
+        self.model_name = model_name
+        self.fields_amount = fields_amount
+        self.columns_amount = columns_amount
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has {self.fields_amount} fields, but "
+            f"the query returned {self.columns_amount} columns"
+        )
+
+
+class PoolTimeout(Exception):
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+
+    def __str__(self):
+        return (
+            f"no connection was returned to the pool in {self.timeout} "
+            f"seconds"
+        )
+
+
+class WrongArgumentsAmount(Exception):
+
+    def __init__(self, expected_amount: int, given_amount: int):
+        self.expected_amount = expected_amount
+        self.given_amount = given_amount
+
+    def __str__(self):
+        return (
+            f"prepared statement expects {self.expected_amount} arguments, "
+            f"but {self.given_amount} were given"
+        )
+
+
+class WrongArgumentModel(Exception):
+
+    def __init__(self, position: int, expected_model: str, argument: str):
+        self.position = position
+        self.expected_model = expected_model
+        self.argument = argument
+
+    def __str__(self):
+        return (
+            f"prepared statement expects an instance of "
+            f"'{self.expected_model}' as the argument {self.position}, but "
+            f"{self.argument} was given"
+        )
+
+
+class NestedAutoCommit(Exception):
+
+    def __str__(self):
+        return (
+            "automatic commits can only be enabled for the outermost "
+            "transaction"
+        )
+
+
+class UnknownConflictAction(Exception):
+
+    def __init__(self, action):
+        self.action = action
+
+    def __str__(self):
+        return (
+            f"unknown conflict action {repr(self.action)}, it should be "
+            f"None, 'ignore' or 'update'"
+        )
+
+
+class ConflictKeyNotSpecified(_ModelNameMixin, Exception):
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has no primary key, so pass the key "
+            f"fields of the conflicts explicitly"
+        )
+
+
+class RowLengthMismatch(Exception):
+
+    def __init__(self, model_name: str, fields_amount: int, row_length: int):
+        self.model_name = model_name
+        self.fields_amount = fields_amount
+        self.row_length = row_length
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has {self.fields_amount} fields, but "
+            f"a row of {self.row_length} values was given"
+        )
+
+
+class MissingFieldsOnUpdate(Exception):
+
+    def __init__(self, model_name: str, field_names: list):
+        self.model_name = model_name
+        self.field_names = field_names
+
+    def __str__(self):
+        return (
+            f"an instance of model '{self.model_name}' without the fields "
+            f"{', '.join(self.field_names)} can't be loaded with "
+            f"on_conflict='update', the fields would be overwritten with NULLs"
+        )
+
+
+class PrimaryKeyNotSpecified(_ModelNameMixin, Exception):
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has no primary key, so its instances "
+            f"can't be found or updated by a session (declare ._primary_key "
+            f"or PRIMARY KEY in ._additional_table_lines)"
+        )
+
+
+class OrderNotSpecified(_ModelNameMixin, Exception):
+
+    def __str__(self):
+        return (
+            f"pages of model '{self.model_name}' need at least one field to "
+            f"be ordered by"
+        )
+
+
+class OrderNotUnique(_ModelNameMixin, Exception):
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has no primary key, so the pages may "
+            f"skip the rows with equal order fields (declare the primary key, "
+            f"or pass unique=True if the order fields are unique)"
+        )
+
+
+class InvalidCursor(Exception):
+
+    def __init__(self, cursor: str):
+        self.cursor = cursor
+
+    def __str__(self):
+        return (
+            f"invalid cursor {repr(self.cursor)}, it should be made by a "
+            f"paginator with the same order"
+        )
+
+
+class UnknownRelationship(_ModelNameMixin, Exception):
+
+    def __init__(self, model_name: str, relationship_name: str):
+        super().__init__(model_name)
+        self.relationship_name = relationship_name
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' has no relationship "
+            f"'{self.relationship_name}' (it is not in ._relationships)"
+        )
+
+
+class RelationshipNotLoaded(UnknownRelationship):
+
+    def __str__(self):
+        return (
+            f"relationship '{self.relationship_name}' of model "
+            f"'{self.model_name}' is not loaded, prefetch it first"
+        )
+
+
+class ForeignKeyNotFound(_ModelNameMixin, Exception):
+
+    def __init__(self, model_name: str, related_model_name: str):
+        super().__init__(model_name)
+        self.related_model_name = related_model_name
+
+    def __str__(self):
+        return (
+            f"there is no single foreign key between models "
+            f"'{self.model_name}' and '{self.related_model_name}' (pass the "
+            f"fields of one with Related(foreign_key=...))"
+        )
+
+
+class AmbiguousRelatedModel(_ModelNameMixin, Exception):
+
+    def __init__(
+            self, model_name: str, related_model_name: str, modules: list):
+        super().__init__(model_name)
+        self.related_model_name = related_model_name
+        self.modules = modules
+
+    def __str__(self):
+        return (
+            f"model '{self.model_name}' is related to '"
+            f"{self.related_model_name}', which is not in its module, and "
+            f"there are models with that name in {', '.join(self.modules)} "
+            f"(pass the model itself to Related)"
+        )
+
+
+class UnknownRoutingStrategy(Exception):
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+
+    def __str__(self):
+        return (
+            f"unknown routing strategy {repr(self.strategy)}, it should be "
+            f"'round_robin' or 'least_busy'"
+        )
@@ -0,0 +1,154 @@
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional
+
+_COMMENT_PATTERN = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_LITERAL_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b|\bx'[0-9a-fA-F]*'"
+)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_MARKS_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS_LIST_PATTERN = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """
+    Normalizes the statement, so the statements that differ only in
+    literals, comments, whitespace, amount of parameter marks in a list or
+    amount of rows in VALUES get the same fingerprint
+    """
+    statement = _COMMENT_PATTERN.sub(" ", statement)
+    statement = _LITERAL_PATTERN.sub("?", statement)
+    statement = _WHITESPACE_PATTERN.sub(" ", statement).strip()
+    statement = _MARKS_LIST_PATTERN.sub("(...)", statement)
+    return _ROWS_LIST_PATTERN.sub("(...)", statement)
+
+
+@dataclass
+class QueryEvent:
+    """
+    Timings are in seconds. "prepare" is the formatting of the query,
+    "execute" is the call to the database connector, "fetch" is the
+    retrieval of the rows and "hydrate" is their mapping to the model
+    """
+    statement: str
+    fingerprint: str
+    prepare_time: float = 0.0
+    execute_time: float = 0.0
+    fetch_time: float = 0.0
+    hydrate_time: float = 0.0
+    rows: int = 0
+    error: Optional[BaseException] = None
+
+    @property
+    def total_time(self) -> float:
+        return (
+            self.prepare_time + self.execute_time + self.fetch_time
+            + self.hydrate_time
+        )
+
+
+class QueryHook:
+    """
+    Pass an instance of a subclass of this to
+    AbstractSQLExecutor.add_hook(). .before_query() is called after the
+    query is prepared, .after_query() is called after the last row is
+    fetched (or right after the execution, if the statement is not a read)
+    """
+
+    def before_query(self, event: QueryEvent):
+        pass
+
+    def after_query(self, event: QueryEvent):
+        pass
+
+
+@dataclass
+class FingerprintStatistics:
+    count: int
+    total_time: float
+    p50: float
+    p99: float
+    max: float
+    rows: int
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+class StatisticsAggregator(QueryHook):
+    """
+    Collects the total times of the queries by their fingerprints. Only the
+    last max_samples times of every fingerprint are used for the percentiles
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._total_times: Dict[str, float] = {}
+        self._rows: Dict[str, int] = {}
+
+    def after_query(self, event: QueryEvent):
+        total_time = event.total_time
+        with self._lock:
+            samples = self._samples.get(event.fingerprint)
+            if samples is None:
+                samples = self._samples[event.fingerprint] = deque(
+                    maxlen=self.max_samples
+                )
+                self._counts[event.fingerprint] = 0
+                self._total_times[event.fingerprint] = 0.0
+                self._rows[event.fingerprint] = 0
+            samples.append(total_time)
+            self._counts[event.fingerprint] += 1
+            self._total_times[event.fingerprint] += total_time
+            self._rows[event.fingerprint] += event.rows
+
+    def get_statistics(self) -> Dict[str, FingerprintStatistics]:
+        with self._lock:
+            statistics = {}
+            for statement_fingerprint, samples in self._samples.items():
+                sorted_samples = sorted(samples)
+                statistics[statement_fingerprint] = FingerprintStatistics(
+                    count=self._counts[statement_fingerprint],
+                    total_time=self._total_times[statement_fingerprint],
+                    p50=_percentile(sorted_samples, 50),
+                    p99=_percentile(sorted_samples, 99),
+                    max=sorted_samples[-1],
+                    rows=self._rows[statement_fingerprint]
+                )
+            return statistics
+
+
+class SlowQueryLog(QueryHook):
+    """
+    Remembers the last max_entries queries that took at least threshold
+    seconds and logs them as warnings to the logger (if it is not None)
+    """
+
+    def __init__(
+            self, threshold: float, max_entries: int = 1000,
+            logger: Optional[logging.Logger] = logging.getLogger(
+                "sql_mapper.slow_queries"
+            )):
+        self.threshold = threshold
+        self.logger = logger
+        self.entries: Deque[QueryEvent] = deque(maxlen=max_entries)
+
+    def after_query(self, event: QueryEvent):
+        if event.total_time >= self.threshold:
+            self.entries.append(event)
+            if self.logger is not None:
+                self.logger.warning(
+                    "slow query (%.6fs, %d rows): %s", event.total_time,
+                    event.rows, event.statement
+                )
@@ -1,38 +1,311 @@
+import keyword
+import re
 from dataclasses import dataclass
-from typing import Dict, Any, Union, Optional
+from typing import Dict, Any, Union, Optional, Type, Sequence, Tuple
 
 from sql_mapper import exceptions
 
 
+@dataclass(frozen=True)
+class Index:
+    """
+    An index of the table of a model, declare it in the ._indexes of the
+    model:
+
+    class A(ModelBase):
+        _tablename = "a"
+        b: int = "INTEGER"
+        c: str = "TEXT"
+        _indexes = (Index("b"), Index(("c", "b"), unique=True, where="b > 0"))
+
+    The fields may be expressions too ("c DESC", "lower(c)"), where makes
+    it a partial index. The name is generated from the tablename and the
+    fields if it is not given
+    """
+    fields: Union[str, Tuple[str, ...]]
+    unique: bool = False
+    where: Optional[str] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if isinstance(self.fields, str):
+            object.__setattr__(self, "fields", (self.fields,))
+        else:
+            object.__setattr__(self, "fields", tuple(self.fields))
+
+    def get_name(self, tablename: str) -> str:
+        if self.name:
+            return self.name
+        return re.sub(
+            r"\W+", "_", f"ix_{tablename}_{'_'.join(self.fields)}"
+        ).strip("_")
+
+
+@dataclass(frozen=True)
+class Related:
+    """
+    A relationship of a model, declare it in the ._relationships of the
+    model by its name:
+
+    class Book(ModelBase):
+        _tablename = "books"
+        id: int = "INTEGER"
+        _additional_table_lines = "PRIMARY KEY (id)"
+        _relationships = {"links": Related("BookToAuthor")}
+
+    It is derived from the foreign key between the tables of the models (see
+    relationships.get_foreign_keys): a list of the instances of the related
+    model if their foreign key references this one, or one instance (or
+    None) if the foreign key of this model references the related one. The
+    related model may be given by its name, so it can be declared later (it
+    is looked up in the module of this model first).
+    foreign_key (the fields of the foreign key) picks one of several foreign
+    keys, and many picks the direction of a foreign key of a table to itself.
+    The relationships are loaded by AbstractSQLExecutor.prefetch()
+    """
+    model: Union[Type["ModelBase"], str]
+    foreign_key: Optional[Tuple[str, ...]] = None
+    many: Optional[bool] = None
+
+    def __post_init__(self):
+        if isinstance(self.foreign_key, str):
+            object.__setattr__(self, "foreign_key", (self.foreign_key,))
+        elif self.foreign_key is not None:
+            object.__setattr__(self, "foreign_key", tuple(self.foreign_key))
+
+
+class _RelationshipAttribute:
+    """
+    Stands for a relationship that is not loaded yet, the loaded ones are in
+    the __dict__ of the instances
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        raise exceptions.RelationshipNotLoaded(
+            model_name=owner.__name__, relationship_name=self.name
+        )
+
+
 @dataclass
 class TableData:
     name: Optional[str]
     fields: Dict[str, str]
     additional_table_lines: Optional[str]
+    indexes: Tuple[Index, ...] = ()
+
+
+def _rebuild_row(model: Type["ModelBase"], values: tuple) -> "ModelBase":
+    """
+    Unpickles the instances of the row class of the model. The row classes
+    are generated, so they can't be pickled by their name
+    """
+    return model._row_class(*values)
+
+
+def _rebuild_lazy_row(model: Type["ModelBase"], row: tuple) -> "ModelBase":
+    return lazy(model)(row)
+
+
+def _make_row_class(model: Type["ModelBase"]) -> Type["ModelBase"]:
+    """
+    Makes a subclass of the model with a slot for every field and a
+    generated positional constructor. It is used to hydrate the rows from
+    the database, so it skips every check ModelBase.__init__ does.
+
+    The slots only make the fields fast to set and read: the models declare
+    no __slots__, so the instances still have a __dict__, and the loaded
+    relationships (relationships.prefetch()) and the tracking of a session
+    (session.track()) are kept in it
+    """
+    field_names = tuple(model._fields)
+    for field_name in field_names:
+        if not field_name.isidentifier() or keyword.iskeyword(field_name):
+            return model
+    namespace = {
+        "__slots__": field_names, "_is_row_class": True,
+        "__module__": model.__module__, "__qualname__": model.__qualname__,
+        "__doc__": model.__doc__
+    }
+    arguments = "".join(f", {field_name}" for field_name in field_names)
+    # The receiver is named __row, so that it can't collide with a field (a
+    # field can be named self, but a field declared as __row is mangled)
+    assignments = "".join(
+        f"    __row.{field_name} = {field_name}\n"
+        for field_name in field_names
+    )
+    fields = ", ".join(
+        f"{repr(field_name)}: __row.{field_name}"
+        for field_name in field_names
+    )
+    source = (
+        f"def __init__(__row{arguments}):\n{assignments or '    pass'}\n"
+        f"def instance_fields(__row):\n    return {{{fields}}}\n"
+    )
+    exec(source, {}, namespace)
+    namespace["instance_fields"] = property(namespace["instance_fields"])
+
+    def __reduce__(self):
+        return (
+            _rebuild_row, (model, tuple(self.instance_fields.values())),
+            self.__dict__ or None
+        )
+
+    namespace["__reduce__"] = __reduce__
+    return type(model.__name__, (model,), namespace)
+
+
+def _make_field_property(index: int) -> property:
+    def get_field(self):
+        return self._row[index]
+
+    def set_field(self, value):
+        row = self._row
+        if not isinstance(row, list):
+            # Copy on write: the wrapped row may be shared (with the result
+            # cache, for example)
+            row = self._row = list(row)
+        row[index] = value
+
+    return property(get_field, set_field)
+
+
+def _make_lazy_row_class(model: Type["ModelBase"]) -> Type["ModelBase"]:
+    """
+    Makes a subclass of the model that wraps a row as it is (a tuple or
+    anything else with the columns by their indexes) and reads the fields
+    from it only when they are accessed. A row is copied only when one of
+    its fields is set
+    """
+    field_names = tuple(model._fields)
+    namespace = {
+        "__slots__": ("_row",), "_is_row_class": True, "_wraps_rows": True,
+        "_model": model, "__module__": model.__module__,
+        "__qualname__": model.__qualname__, "__doc__": model.__doc__
+    }
+
+    def __init__(self, row: Sequence):
+        self._row = row
+
+    def instance_fields(self) -> Dict[str, Any]:
+        return dict(zip(field_names, self._row))
+
+    def to_model(self) -> "ModelBase":
+        """
+        Copies the fields to a usual instance of the model
+        """
+        return model._row_class(*self._row)
+
+    def __reduce__(self):
+        return (
+            _rebuild_lazy_row, (model, tuple(self._row)),
+            self.__dict__ or None
+        )
+
+    namespace.update({
+        "__init__": __init__, "to_model": to_model, "__reduce__": __reduce__,
+        "instance_fields": property(instance_fields)
+    })
+    for index, field_name in enumerate(field_names):
+        namespace[field_name] = _make_field_property(index)
+    return type(model.__name__, (model,), namespace)
+
+
+def lazy(model: Type["ModelBase"]) -> Type["ModelBase"]:
+    """
+    Pass it as the model of the rows to get lazy rows instead of the usual
+    instances of the model (see _make_lazy_row_class). Handy for wide rows
+    of which only a couple of fields are used:
+
+    for row in sql_executor.execute("SELECT * FROM a", model=lazy(A)):
+        print(row.b)
+    """
+    if model._wraps_rows:
+        return model
+    try:
+        return model.__dict__["_lazy_row_class"]
+    except KeyError:
+        lazy_row_class = _make_lazy_row_class(model)
+        model._lazy_row_class = lazy_row_class
+        return lazy_row_class
+
+
+class _RowClassAttribute:
+    """
+    The row class of a model (see _make_row_class) is generated when it is
+    needed for the first time instead of when the model is declared, so
+    declaring a lot of models is cheap
+    """
+
+    def __get__(self, instance, owner):
+        model = get_model(owner)
+        try:
+            return model.__dict__["_generated_row_class"]
+        except KeyError:
+            row_class = _make_row_class(model)
+            model._generated_row_class = row_class
+            return row_class
+
+
+def get_model(model: Type["ModelBase"]) -> Type["ModelBase"]:
+    """
+    The model a generated class (a row class, a lazy row class or a tracked
+    class of a session) is made for, or the model itself
+    """
+    while "_is_row_class" in vars(model):
+        model = model.__bases__[0]
+    return model
 
 
 class ModelBase:
     _fields: Dict[str, Union[str, Any]]
     _tablename: str
     _additional_table_lines: str
+    # Generated for every model, see _make_row_class
+    _row_class: Type["ModelBase"] = _RowClassAttribute()
+    # True for the classes made by lazy(), their ._model is the model they
+    # are made for
+    _wraps_rows: bool = False
+    _model: Type["ModelBase"]
+    _indexes: Sequence[Index] = ()
+    _relationships: Dict[str, Related] = {}
 
     @staticmethod
     def _field_is_valid(field_name: str, field_value: Any):
-        return not (callable(field_value) or field_name.startswith("_"))
+        return not (field_name.startswith("_") or callable(field_value))
 
     def __init_subclass__(cls, **kwargs):
-        cls._fields = {}
-        fields = {
-            field_name: None
-            for field_name in cls.__annotations__
-            if cls._field_is_valid(field_name, None)
-        }
-        fields.update({
-            field_name: field_value
-            for field_name, field_value in vars(cls).items()
-            if cls._field_is_valid(field_name, field_value)
-        })
+        namespace = cls.__dict__
+        if "_is_row_class" in namespace:
+            return cls
+        # The fields of the base models go first, the ones of this model
+        # override them
+        fields = {}
+        for base in reversed(cls.__mro__[1:]):
+            base_fields = base.__dict__.get("_fields")
+            if base_fields:
+                fields.update(base_fields)
+        field_is_valid = cls._field_is_valid
+        for field_name in namespace.get("__annotations__", ()):
+            if field_is_valid(field_name, None):
+                fields.setdefault(field_name, None)
+        for field_name, field_value in namespace.items():
+            # Most of the namespace is private, and that check is cheap
+            if (
+                field_name[0] != "_"
+                and field_is_valid(field_name, field_value)
+            ):
+                fields[field_name] = field_value
         cls._fields = fields
+        for relationship_name in namespace.get("_relationships", ()):
+            setattr(
+                cls, relationship_name,
+                _RelationshipAttribute(relationship_name)
+            )
         return cls
 
     def __init__(self, *ordered_fields, **keyword_fields):
@@ -54,6 +327,9 @@ class ModelBase:
         self._fields = _fields
 
     def __getattr__(self, field_name: str):
+        if field_name.startswith("__"):
+            # The optional special methods, like __setstate__ of pickle
+            raise AttributeError(field_name)
         return self.instance_fields[field_name]
 
     def __eq__(self, other: "ModelBase"):
@@ -78,7 +354,9 @@ class ModelBase:
             additional_table_lines = cls._additional_table_lines
         except AttributeError:
             additional_table_lines = None
-        return TableData(name, fields, additional_table_lines)
+        return TableData(
+            name, fields, additional_table_lines, tuple(cls._indexes)
+        )
 
     def __str__(self):
         arguments = ", ".join(
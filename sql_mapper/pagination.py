@@ -0,0 +1,327 @@
+import base64
+import binascii
+import json
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING, Collection, Dict, FrozenSet, Iterable, Iterator, List,
+    Optional, Sequence, Tuple, Type, Union
+)
+
+from sql_mapper import exceptions
+from sql_mapper.bulk_loading import get_primary_key
+from sql_mapper.model_base import ModelBase
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+DESCENDING_PREFIX = "-"
+NOT_NULL_PATTERN = re.compile(r"\bNOT\s+NULL\b|\bPRIMARY\s+KEY\b", re.I)
+
+# (field name, descending)
+OrderField = Tuple[str, bool]
+
+
+def parse_order_by(
+        model: Type[ModelBase], order_by: Union[str, Sequence[str]],
+        unique: bool = False) -> Tuple[OrderField, ...]:
+    """
+    Field names, descending if they start with "-". The fields of the
+    primary key of the model that are not there are added to the end (in the
+    direction of the last field), so the order is total. A model without a
+    primary key raises OrderNotUnique, unless unique is true (the caller
+    knows the order fields are unique)
+    """
+    if isinstance(order_by, str):
+        order_by = (order_by,)
+    order = []
+    for field_name in order_by:
+        descending = field_name.startswith(DESCENDING_PREFIX)
+        if descending:
+            field_name = field_name[len(DESCENDING_PREFIX):]
+        if field_name not in model._fields:
+            raise exceptions.UnknownField(field_name=field_name)
+        order.append((field_name, descending))
+    if not order:
+        raise exceptions.OrderNotSpecified(model_name=model.__name__)
+    ordered_fields = {field_name for field_name, _ in order}
+    last_descending = order[-1][1]
+    primary_key = get_primary_key(model)
+    if not primary_key and not unique:
+        raise exceptions.OrderNotUnique(model_name=model.__name__)
+    for field_name in primary_key:
+        if field_name not in ordered_fields:
+            order.append((field_name, last_descending))
+    return tuple(order)
+
+
+def make_order_clause(order: Sequence[OrderField]) -> str:
+    return ",".join(
+        field_name + (" DESC" if descending else "")
+        for field_name, descending in order
+    )
+
+
+def get_nullable_fields(model: Type[ModelBase]) -> FrozenSet[str]:
+    """
+    The fields that may be NULL: the ones that are not declared NOT NULL and
+    are not a part of the primary key
+    """
+    primary_key = get_primary_key(model)
+    return frozenset(
+        field_name for field_name, sql_type in model._fields.items()
+        if field_name not in primary_key and not (
+            isinstance(sql_type, str)
+            and NOT_NULL_PATTERN.search(sql_type)
+        )
+    )
+
+
+def make_seek_condition(
+        order: Sequence[OrderField], nullable: Collection[str] = (),
+        null: Collection[str] = ()) -> Tuple[str, List[int]]:
+    """
+    The condition of the rows after the one with the given values of the
+    order fields, and the indexes of those values for every "?" of it.
+    nullable are the fields that may be NULL and null are the ones that are
+    NULL in the given values. NULLs go first in the ascending order and last
+    in the descending one (like in SQLite), so "a>?" never skips them.
+
+    If none of the fields may be NULL and every field has the same direction
+    it is a row value comparison (like "(a,b)>(?,?)"), which SQLite turns
+    into a seek of an index on them
+    """
+    if nullable or null:
+        return _make_nullable_seek_condition(order, nullable, null)
+    directions = {descending for _, descending in order}
+    if len(directions) == 1:
+        operator = "<" if order[0][1] else ">"
+        if len(order) == 1:
+            return f"{order[0][0]}{operator}?", [0]
+        field_names = ",".join(field_name for field_name, _ in order)
+        marks = ",".join("?" for _ in order)
+        return (
+            f"({field_names}){operator}({marks})", list(range(len(order)))
+        )
+    # a>? OR (a=? AND b<?) OR ...
+    alternatives = []
+    indexes = []
+    for position, (field_name, descending) in enumerate(order):
+        conditions = [
+            f"{equal_field_name}=?"
+            for equal_field_name, _ in order[:position]
+        ]
+        conditions.append(f"{field_name}{'<' if descending else '>'}?")
+        indexes.extend(range(position + 1))
+        alternatives.append("(" + " AND ".join(conditions) + ")")
+    return " OR ".join(alternatives), indexes
+
+
+def _make_nullable_seek_condition(
+        order: Sequence[OrderField], nullable: Collection[str],
+        null: Collection[str]) -> Tuple[str, List[int]]:
+    # a>? OR (a=? AND b>?) OR ..., with "IS NULL" in place of the NULL
+    # values
+    alternatives = []
+    indexes = []
+    equal_conditions: List[str] = []
+    equal_indexes: List[int] = []
+    for position, (field_name, descending) in enumerate(order):
+        if field_name in null:
+            # Only the non-NULL values are after NULL in the ascending order,
+            # nothing is after it in the descending one
+            after = None if descending else f"{field_name} IS NOT NULL"
+            after_indexes = []
+        else:
+            after = f"{field_name}{'<' if descending else '>'}?"
+            if descending and field_name in nullable:
+                after = f"{after} OR {field_name} IS NULL"
+                if equal_conditions:
+                    after = f"({after})"
+            after_indexes = [position]
+        if after is not None:
+            alternatives.append(
+                "(" + " AND ".join(equal_conditions + [after]) + ")"
+            )
+            indexes.extend(equal_indexes + after_indexes)
+        if field_name in null:
+            equal_conditions.append(f"{field_name} IS NULL")
+        else:
+            equal_conditions.append(f"{field_name}=?")
+            equal_indexes.append(position)
+    if not alternatives:
+        return "0", []
+    return " OR ".join(alternatives), indexes
+
+
+def encode_cursor(order: Sequence[OrderField], values: Sequence) -> str:
+    """
+    An opaque URL-safe token of the values of the order fields of the last
+    row of a page. The values should be JSON serializable
+    """
+    data = json.dumps(
+        [[list(order_field) for order_field in order], list(values)],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(order: Sequence[OrderField], cursor: str) -> list:
+    """
+    The values of a cursor made by encode_cursor() for the same order
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, values = json.loads(data)
+    except (ValueError, TypeError, binascii.Error):
+        raise exceptions.InvalidCursor(cursor) from None
+    if [tuple(order_field) for order_field in cursor_order] != list(order):
+        raise exceptions.InvalidCursor(cursor)
+    return values
+
+
+@dataclass
+class Page:
+    rows: list
+    # The cursor of the next page, None if this page is the last one
+    cursor: Optional[str]
+
+
+class Paginator:
+    """
+    Pages of the rows of the table of a model in keyset (seek) order: every
+    page is selected by "WHERE (order fields) > (the ones of the last row)
+    ORDER BY ... LIMIT", so with an index on the order fields a deep page
+    costs the same as the first one, unlike OFFSET. See
+    AbstractSQLExecutor.paginate()
+
+    The order fields that may be NULL (see get_nullable_fields) get "IS NULL"
+    branches in the condition, so no row is skipped, but the condition is
+    not a row value comparison then (declare the fields NOT NULL for the
+    fastest seek)
+    """
+
+    def __init__(
+            self, sql_executor: "AbstractSQLExecutor",
+            model: Type[ModelBase], order_by: Union[str, Sequence[str]],
+            page_size: int = 100, where: Optional[str] = None,
+            parameters: Iterable = (), cursor: Optional[str] = None,
+            prefetch: bool = False, unique: bool = False):
+        self.sql_executor = sql_executor
+        self.model = model
+        self.order = parse_order_by(model, order_by, unique)
+        self.page_size = page_size
+        self.parameters = list(parameters)
+        self.cursor = cursor
+        self.prefetch = prefetch
+        if cursor is not None:
+            decode_cursor(self.order, cursor)
+        self._order_fields = tuple(field_name for field_name, _ in self.order)
+        self._nullable_fields = (
+            get_nullable_fields(model) & set(self._order_fields)
+        )
+        tablename = model.get_tablename()
+        self._select = f"SELECT {','.join(model._fields)} FROM {tablename}"
+        self._order_clause = (
+            f" ORDER BY {make_order_clause(self.order)} LIMIT ?"
+        )
+        self._where = f"({where})" if where else ""
+        self._first_statement = (
+            self._select + (f" WHERE {self._where}" if where else "")
+            + self._order_clause
+        )
+        # By the fields that are NULL in the cursor
+        self._next_statements: Dict[
+            FrozenSet[str], Tuple[str, List[int]]
+        ] = {}
+
+    def _get_next_statement(
+            self, null: FrozenSet[str]) -> Tuple[str, List[int]]:
+        next_statement = self._next_statements.get(null)
+        if next_statement is None:
+            seek_condition, seek_indexes = make_seek_condition(
+                self.order, self._nullable_fields, null
+            )
+            where = self._where
+            next_statement = self._next_statements[null] = (
+                f"{self._select} WHERE {where + ' AND ' if where else ''}"
+                f"({seek_condition}){self._order_clause}",
+                seek_indexes
+            )
+        return next_statement
+
+    def fetch_page(self, cursor: Optional[str] = None) -> Page:
+        """
+        The page after the cursor (the first page without it). One more
+        row than the page size is selected to know if there is a next page
+        """
+        if cursor is None:
+            statement = self._first_statement
+            parameters = self.parameters + [self.page_size + 1]
+        else:
+            values = decode_cursor(self.order, cursor)
+            statement, seek_indexes = self._get_next_statement(frozenset(
+                field_name
+                for field_name, value in zip(self._order_fields, values)
+                if value is None
+            ))
+            parameters = self.parameters + [
+                values[index] for index in seek_indexes
+            ] + [self.page_size + 1]
+        rows = list(
+            self.sql_executor.execute(statement, parameters, self.model)
+        )
+        if len(rows) <= self.page_size:
+            return Page(rows, None)
+        del rows[self.page_size:]
+        return Page(rows, self._make_cursor(rows[-1]))
+
+    def _make_cursor(self, row: ModelBase) -> str:
+        instance_fields = row.instance_fields
+        values = tuple(
+            instance_fields.get(field_name)
+            for field_name in self._order_fields
+        )
+        type_adapters = self.sql_executor.type_adapters
+        if type_adapters is not None:
+            convert = type_adapters.get_fields_converter(
+                self.model, self._order_fields
+            )
+            if convert is not None:
+                values = convert(values)
+        return encode_cursor(self.order, values)
+
+    def __iter__(self) -> Iterator[Page]:
+        """
+        Pages from the cursor the paginator was made with. .cursor is the
+        cursor of the next page after every yielded one, so an interrupted
+        iteration can be resumed with it.
+
+        With prefetch the next page is fetched on a background thread while
+        the current one is consumed, so the executor should be usable from
+        another thread (like PooledSQLiteSQLExecutor)
+        """
+        if not self.prefetch:
+            while True:
+                page = self.fetch_page(self.cursor)
+                self.cursor = page.cursor
+                yield page
+                if page.cursor is None:
+                    return
+        with ThreadPoolExecutor(
+            1, thread_name_prefix="sql_mapper_prefetch"
+        ) as thread:
+            next_page: Future = thread.submit(self.fetch_page, self.cursor)
+            while True:
+                page = next_page.result()
+                if page.cursor is not None:
+                    next_page = thread.submit(self.fetch_page, page.cursor)
+                self.cursor = page.cursor
+                yield page
+                if page.cursor is None:
+                    return
+
+    def iterate_rows(self) -> Iterator:
+        for page in self:
+            yield from page.rows
@@ -0,0 +1,191 @@
+import collections
+import itertools
+import math
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+)
+from dataclasses import dataclass
+from typing import (
+    Any, Callable, Deque, Iterator, List, Optional, Sequence, Tuple, Type
+)
+
+from sql_mapper.abstract_sql_executor import hydrate
+from sql_mapper.model_base import ModelBase
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+from sql_mapper.type_adapters import TypeAdapters
+
+# The read only executor of a worker process
+_worker_executor: Optional[SQLiteSQLExecutor] = None
+
+
+@dataclass(frozen=True)
+class Partition:
+    """
+    Rows with lower <= partition key < upper
+    """
+    lower: int
+    upper: int
+
+
+def make_partitions(
+        lowest_key: int, highest_key: int, amount: int) -> List[Partition]:
+    """
+    Splits the keys from lowest_key to highest_key (inclusive) into amount
+    ranges of about the same size
+    """
+    keys_amount = highest_key - lowest_key + 1
+    amount = max(min(amount, keys_amount), 1)
+    size = math.ceil(keys_amount / amount)
+    return [
+        Partition(lower, min(lower + size, highest_key + 1))
+        for lower in range(lowest_key, highest_key + 1, size)
+    ]
+
+
+def _open_worker_executor(
+        file_path: str, type_adapters: Optional[TypeAdapters]):
+    global _worker_executor
+    _worker_executor = SQLiteSQLExecutor.new(file_path, read_only=True)
+    _worker_executor.type_adapters = type_adapters
+
+
+def _scan_partition(
+        sql_statement: str, parameters: Sequence, partition: Partition,
+        model: Optional[Type[ModelBase]],
+        map_batch: Optional[Callable[[list], Any]]) -> Any:
+    """
+    Runs in a worker process. Without map_batch the rows are returned as
+    tuples (converted by the type adapters, if there are any), which are
+    a lot cheaper to send back than the instances of the model
+    """
+    arguments = list(parameters) + [partition.lower, partition.upper]
+    if map_batch is not None:
+        return map_batch(list(
+            _worker_executor.execute(sql_statement, arguments, model)
+        ))
+    rows = _worker_executor.execute(sql_statement, arguments)
+    if model is None:
+        return list(rows)
+    convert = _worker_executor._get_row_converter(model)
+    if convert is None:
+        return list(rows)
+    fields_amount = len(model._fields)
+    return [
+        convert(row) if len(row) == fields_amount else row for row in rows
+    ]
+
+
+def get_key_range(
+        file_path: str, table: str, partition_key: str
+) -> Optional[Tuple[int, int]]:
+    sql_executor = SQLiteSQLExecutor.new(file_path, read_only=True)
+    try:
+        [(lowest_key, highest_key)] = sql_executor.execute(
+            f"SELECT MIN({partition_key}), MAX({partition_key}) FROM {table}"
+        )
+    finally:
+        sql_executor.close()
+    if lowest_key is None:
+        return None
+    return lowest_key, highest_key
+
+
+def parallel_scan(
+        file_path: str, sql_statement: str, parameters: Sequence = (),
+        model: Optional[Type[ModelBase]] = None, table: Optional[str] = None,
+        partition_key: str = "rowid", processes: Optional[int] = None,
+        partitions: Optional[int] = None, partition_size: int = 10000,
+        ordered: bool = True,
+        map_batch: Optional[Callable[[list], Any]] = None,
+        type_adapters: Optional[TypeAdapters] = None) -> Iterator:
+    """
+    Executes a read query over an SQLite database on a pool of processes,
+    every one of which has its own read only connection. The keys of the
+    table (rowid or an integer column) are split into partitions, and the
+    query is executed once for every partition with its bounds as the last
+    two parameters:
+
+    rows = parallel_scan(
+        "database.sqlite3",
+        "SELECT * FROM a WHERE c > ? AND rowid >= ? AND rowid < ?", [0],
+        model=A
+    )
+
+    The table is the one of the model by default. Without map_batch the rows
+    (or the instances of the model) are yielded, partition by partition in
+    the order of the keys if ordered is true, or as soon as they are ready
+    otherwise. The workers send back plain tuples, which are mapped to the
+    model in this process as they are yielded. With map_batch the rows of
+    every partition are mapped to the model in the worker, passed to
+    map_batch there and only what it returns is sent back and yielded, which
+    is the way to use all the cores for heavy work (map_batch should be
+    picklable, like a module level function).
+
+    There are 4 partitions per process by default, but a partition spans at
+    most partition_size keys, so big tables get more of them. Only 2
+    partitions per process are in flight at once, so with a unique partition
+    key (like rowid) at most processes * 2 * partition_size rows are held in
+    memory, whatever the size of the table
+    """
+    if table is None:
+        table = model.get_tablename()
+    processes = processes or os.cpu_count() or 1
+    key_range = get_key_range(file_path, table, partition_key)
+    if key_range is None:
+        return
+    lowest_key, highest_key = key_range
+    partitions_list = make_partitions(lowest_key, highest_key, max(
+        partitions or processes * 4,
+        math.ceil((highest_key - lowest_key + 1) / partition_size)
+    ))
+    if model is not None and model._wraps_rows:
+        # Lazy rows are wrapped here, the worker needs the model itself
+        worker_model = model._model
+    else:
+        worker_model = model
+    with ProcessPoolExecutor(
+        processes, initializer=_open_worker_executor,
+        initargs=(file_path, type_adapters)
+    ) as pool:
+        results = _run_partitions(
+            pool, processes * 2, ordered, [
+                (
+                    _scan_partition, sql_statement, parameters, partition,
+                    worker_model, map_batch
+                )
+                for partition in partitions_list
+            ]
+        )
+        for result in results:
+            if map_batch is not None:
+                yield result
+            elif model is None:
+                yield from result
+            else:
+                yield from hydrate(model, result)
+
+
+def _run_partitions(
+        pool: ProcessPoolExecutor, max_in_flight: int, ordered: bool,
+        tasks: List[tuple]) -> Iterator:
+    """
+    Yields the results of the tasks (in their order, if ordered is true)
+    keeping at most max_in_flight of them submitted at once
+    """
+    tasks = iter(tasks)
+    in_flight: Deque[Future] = collections.deque(
+        pool.submit(*task) for task in itertools.islice(tasks, max_in_flight)
+    )
+    while in_flight:
+        if ordered:
+            future = in_flight.popleft()
+        else:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            in_flight.remove(future)
+        result = future.result()
+        task = next(tasks, None)
+        if task is not None:
+            in_flight.append(pool.submit(*task))
+        yield result
@@ -0,0 +1,150 @@
+import functools
+import itertools
+from typing import (
+    TYPE_CHECKING, Iterable, List, Optional, Sequence, Type, Union
+)
+
+from sql_mapper import exceptions
+from sql_mapper.model_base import ModelBase, get_model
+from sql_mapper.query_compiler import BoundArguments, CompiledQuery
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+
+class PreparedStatement:
+    """
+    A statement with a fixed query text: every parameter mark is bound either
+    to plain values or to instances of one model, which always use all the
+    fields of the model in the ._fields order. The fields an instance
+    doesn't have are bound as NULLs (so A(c="b") inserts a NULL b, it doesn't
+    leave it to the column default), and instances of other models are
+    rejected with WrongArgumentModel. So the text is the same for every call
+    and the database connector can reuse its compiled statement.
+
+    Get it from AbstractSQLExecutor.prepare()
+    """
+
+    def __init__(
+            self, sql_executor: "AbstractSQLExecutor",
+            compiled_query: CompiledQuery,
+            model: Optional[Type[ModelBase]] = None):
+        self.sql_executor = sql_executor
+        self.compiled_query = compiled_query
+        self.model = model
+        self._field_names = [
+            None if shape is None else shape[1]
+            for shape in compiled_query.shapes
+        ]
+        self._models = [
+            None if shape is None else shape[0]
+            for shape in compiled_query.shapes
+        ]
+
+    @property
+    def query(self) -> str:
+        return self.compiled_query.query
+
+    def bind(self, arguments: Sequence) -> BoundArguments:
+        if len(arguments) != len(self._field_names):
+            raise exceptions.WrongArgumentsAmount(
+                expected_amount=len(self._field_names),
+                given_amount=len(arguments)
+            )
+        type_adapters = self.sql_executor.type_adapters
+        new_arguments = []
+        for position, (argument, field_names, model) in enumerate(zip(
+            arguments, self._field_names, self._models
+        )):
+            if field_names is None:
+                new_arguments.append(argument)
+                continue
+            argument_class = argument.__class__
+            if argument_class is not model and (
+                not isinstance(argument, ModelBase)
+                or get_model(argument_class) is not model
+            ):
+                raise exceptions.WrongArgumentModel(
+                    position, model.__name__, repr(argument)
+                )
+            instance_fields = argument.instance_fields
+            values = [
+                instance_fields.get(field_name) for field_name in field_names
+            ]
+            if type_adapters is not None:
+                convert = type_adapters.get_fields_converter(
+                    model, field_names
+                )
+                if convert is not None:
+                    values = convert(values)
+            new_arguments.extend(values)
+        return self.compiled_query.pack(new_arguments)
+
+    def __call__(
+            self, *arguments
+    ) -> Iterable[Union[Sequence, ModelBase]]:
+        """
+        Executes the statement with the arguments (one argument for every
+        parameter mark)
+        """
+        sql_executor = self.sql_executor
+        if sql_executor._hooks:
+            return sql_executor._instrument(
+                self.query, 0.0, functools.partial(
+                    sql_executor._run_sql_statement, self.query,
+                    self.bind(arguments)
+                ),
+                self.model
+            )
+        rows = sql_executor._run_sql_statement(
+            self.query, self.bind(arguments)
+        )
+        if self.model:
+            return self.sql_executor._hydrate(self.model, rows)
+        return rows
+
+    def execute_many(self, arguments_lists: Iterable[Sequence]) -> List:
+        """
+        Executes the statement once for every arguments list. Statements that
+        return nothing are executed in one batch
+        """
+        sql_executor = self.sql_executor
+        if self.compiled_query.is_batchable:
+            arguments_lists = list(arguments_lists)
+            run = functools.partial(
+                sql_executor._run_many_sql_statement, self.query,
+                map(self.bind, arguments_lists)
+            )
+            if sql_executor._hooks:
+                sql_executor._instrument(self.query, 0.0, run, None)
+            else:
+                run()
+            return [() for _ in arguments_lists]
+        if sql_executor._hooks:
+            return [
+                sql_executor._instrument(
+                    self.query, 0.0, functools.partial(
+                        self._stream_rows, self.bind(arguments)
+                    ),
+                    self.model
+                )
+                for arguments in arguments_lists
+            ]
+        return [
+            sql_executor._iterate_chunks(
+                sql_executor._run_stream_sql_statement(
+                    self.query, self.bind(arguments),
+                    sql_executor.stream_chunk_size
+                ),
+                self.model
+            )
+            for arguments in arguments_lists
+        ]
+
+    def _stream_rows(self, arguments: BoundArguments) -> Iterable[Sequence]:
+        sql_executor = self.sql_executor
+        return itertools.chain.from_iterable(
+            sql_executor._run_stream_sql_statement(
+                self.query, arguments, sql_executor.stream_chunk_size
+            )
+        )
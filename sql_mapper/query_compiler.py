@@ -0,0 +1,343 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import (
+    Any, Dict, Hashable, Optional, Sequence, Tuple, Type, Iterable, List,
+    Union
+)
+
+from sql_mapper import exceptions
+from sql_mapper.dialects import Dialect
+from sql_mapper.model_base import ModelBase, get_model
+from sql_mapper.type_adapters import TypeAdapters
+
+BATCHABLE_STATEMENT_PATTERN = re.compile(
+    r"\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE
+)
+RETURNING_PATTERN = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+READ_STATEMENT_PATTERN = re.compile(
+    r"\s*(SELECT|VALUES|EXPLAIN)\b", re.IGNORECASE
+)
+
+# None for a plain argument, (model class, field names) for a model instance,
+# (model class, field names, amount of models) for a sequence of models
+ArgumentShape = Optional[Tuple]
+# A list for positional parameter marks, a dict for named ones
+BoundArguments = Union[list, Dict[str, Any]]
+
+
+def make_model_fragment(
+        model: Type[ModelBase], field_names: Sequence[str],
+        new_parameter_mark: Union[str, Sequence[str]],
+        rows_amount: int = 1) -> str:
+    """
+    Makes the "tablename(field1,field2)VALUES(?,?)" part that replaces a
+    parameter mark bound to a model instance (or the
+    "tablename(field1,field2)VALUES(?,?),(?,?)" part, if there are multiple
+    rows). new_parameter_mark may be a sequence of marks too, one for every
+    value of every row
+    """
+    tablename = model.get_tablename()
+    if not tablename:
+        raise exceptions.TablenameNotSpecifiedOnInsertion(
+            model_name=model.__name__
+        )
+    if isinstance(new_parameter_mark, str):
+        row = "(" + ",".join(
+            new_parameter_mark for _ in range(len(field_names))
+        ) + ")"
+        rows = ",".join(row for _ in range(rows_amount))
+    else:
+        fields_amount = len(field_names)
+        rows = ",".join(
+            "(" + ",".join(
+                new_parameter_mark[start:start + fields_amount]
+            ) + ")"
+            for start in range(0, fields_amount * rows_amount, fields_amount)
+        )
+    return tablename + "(" + ",".join(field_names) + ")VALUES" + rows
+
+
+def is_models_sequence(argument: Any) -> bool:
+    return (
+        isinstance(argument, (list, tuple)) and len(argument) != 0
+        and isinstance(argument[0], ModelBase)
+    )
+
+
+def is_read_statement(statement: str) -> bool:
+    """
+    Tells if the statement only reads from the database (it is a guess, but a
+    good one: SELECT, VALUES and EXPLAIN statements are considered reads)
+    """
+    return READ_STATEMENT_PATTERN.match(statement) is not None
+
+
+def get_argument_shape(argument: Any) -> ArgumentShape:
+    if isinstance(argument, ModelBase):
+        return argument.__class__, tuple(argument.instance_fields)
+    if is_models_sequence(argument):
+        # Hydrated rows (and tracked instances of a session) are of the
+        # classes generated for their model, see model_base.get_model
+        first_class = argument[0].__class__
+        model = get_model(first_class)
+        field_names = tuple(argument[0].instance_fields)
+        for row in argument:
+            row_class = row.__class__
+            if (
+                row_class is not first_class
+                and get_model(row_class) is not model
+            ) or tuple(row.instance_fields) != field_names:
+                raise exceptions.DifferentModelsInOneSequence(
+                    first_model=str(argument[0]), other_model=str(row)
+                )
+        return model, field_names, len(argument)
+    return None
+
+
+_SHAPED_TYPES = (ModelBase, list, tuple)
+
+
+def get_arguments_shape(arguments: Sequence) -> Tuple[ArgumentShape, ...]:
+    return tuple([
+        get_argument_shape(argument)
+        if isinstance(argument, _SHAPED_TYPES) else None
+        for argument in arguments
+    ])
+
+
+class CompiledQuery:
+    """
+    A query with every parameter mark already substituted. The only thing
+    that is left to do on execution is to bind the arguments, which are
+    expected to have the same shape as the ones the query was compiled for.
+    If the query has named parameter marks, the arguments are bound to a
+    dict of the parameter_names
+    """
+
+    def __init__(
+            self, query: str, shapes: Tuple[ArgumentShape, ...],
+            parameter_names: Optional[Tuple[str, ...]] = None):
+        self.query = query
+        self.shapes = shapes
+        self.parameter_names = parameter_names
+        self._only_plain_arguments = not any(shapes)
+        # Only statements that return no rows can be passed to the driver's
+        # executemany
+        self.is_batchable = bool(
+            BATCHABLE_STATEMENT_PATTERN.match(query)
+            and not RETURNING_PATTERN.search(query)
+        )
+
+    def bind(
+            self, arguments: Sequence,
+            type_adapters: Optional[TypeAdapters] = None) -> BoundArguments:
+        """
+        The values of the fields of the models are converted by the
+        type_adapters (plain arguments are passed as they are)
+        """
+        if self._only_plain_arguments:
+            if self.parameter_names is not None:
+                return dict(zip(self.parameter_names, arguments))
+            return list(arguments[:len(self.shapes)])
+        new_arguments = []
+        append = new_arguments.append
+        extend = new_arguments.extend
+        for argument, shape in zip(arguments, self.shapes):
+            if shape is None:
+                append(argument)
+                continue
+            convert = None
+            if type_adapters is not None:
+                convert = type_adapters.get_fields_converter(
+                    shape[0], shape[1]
+                )
+            if len(shape) == 2:
+                argument = (argument,)
+            for row in argument:
+                if convert is None:
+                    extend(row.instance_fields.values())
+                else:
+                    extend(convert(row.instance_fields.values()))
+        return self.pack(new_arguments)
+
+    def pack(self, values: list) -> BoundArguments:
+        """
+        The already bound values of the parameters, in a dict if the query
+        has named parameter marks
+        """
+        if self.parameter_names is None:
+            return values
+        return dict(zip(self.parameter_names, values))
+
+
+def compile_query(
+        strings: Iterable, arguments_shape: Tuple[ArgumentShape, ...],
+        new_parameter_mark: str, old_parameter_mark: re.Pattern,
+        dialect: Optional[Dialect] = None
+) -> CompiledQuery:
+    """
+    strings is anything that iterates over BaseFormattableString instances
+    (StringDump is fine too). Every parameter mark consumes the next argument,
+    even if the marks are scattered around different formattable strings.
+
+    With a dialect the marks are found and written by it instead of the
+    old_parameter_mark and the new_parameter_mark
+    """
+    if hasattr(strings, "strings"):
+        strings = strings.strings
+    splitter = old_parameter_mark if dialect is None else dialect
+    marks = new_parameter_mark
+    query_parts = []
+    arguments_amount = len(arguments_shape)
+    argument_index = 0
+    parameters_amount = 0
+    for string in strings:
+        parts = string.get_query_parts(splitter)
+        if dialect is not None:
+            parts = [dialect.escape(part) for part in parts]
+        query_parts.append(parts[0])
+        for part in parts[1:]:
+            if argument_index == arguments_amount:
+                raise exceptions.NotEnoughArguments(
+                    given_amount=arguments_amount
+                )
+            shape = arguments_shape[argument_index]
+            if dialect is not None:
+                marks = dialect.make_marks(
+                    parameters_amount, get_parameters_amount((shape,))
+                )
+                parameters_amount += len(marks)
+            if shape is None:
+                query_parts.append(marks if dialect is None else marks[0])
+            elif len(shape) == 2:
+                query_parts.append(
+                    make_model_fragment(shape[0], shape[1], marks)
+                )
+            else:
+                query_parts.append(make_model_fragment(
+                    shape[0], shape[1], marks, shape[2]
+                ))
+            query_parts.append(part)
+            argument_index += 1
+    parameter_names = None
+    if dialect is not None and dialect.is_named:
+        parameter_names = dialect.get_parameter_names(parameters_amount)
+    return CompiledQuery(
+        "".join(query_parts), arguments_shape[:argument_index],
+        parameter_names
+    )
+
+
+def count_parameter_marks(
+        strings: Iterable, old_parameter_mark: Union[re.Pattern, Dialect]
+) -> int:
+    if hasattr(strings, "strings"):
+        strings = strings.strings
+    return sum(
+        len(string.get_query_parts(old_parameter_mark)) - 1
+        for string in strings
+    )
+
+
+def get_parameters_amount(arguments_shape: Tuple[ArgumentShape, ...]) -> int:
+    """
+    Returns the amount of parameters the driver will get after binding
+    """
+    parameters_amount = 0
+    for shape in arguments_shape:
+        if shape is None:
+            parameters_amount += 1
+        elif len(shape) == 2:
+            parameters_amount += len(shape[1])
+        else:
+            parameters_amount += len(shape[1]) * shape[2]
+    return parameters_amount
+
+
+def split_models_sequence(
+        arguments: Sequence, max_parameters_amount: Optional[int]
+) -> List[Sequence]:
+    """
+    If the arguments contain one sequence of models and there are too many
+    parameters for one statement, splits the arguments into multiple
+    arguments lists with the sequence of models cut into chunks. Returns a
+    list with only the passed arguments otherwise
+    """
+    if max_parameters_amount is None:
+        return [arguments]
+    sequence_indexes = [
+        index for index, argument in enumerate(arguments)
+        if is_models_sequence(argument)
+    ]
+    if len(sequence_indexes) != 1:
+        return [arguments]
+    arguments_shape = get_arguments_shape(arguments)
+    if get_parameters_amount(arguments_shape) <= max_parameters_amount:
+        return [arguments]
+    index = sequence_indexes[0]
+    _, field_names, rows_amount = arguments_shape[index]
+    other_parameters_amount = get_parameters_amount(
+        arguments_shape[:index] + arguments_shape[index + 1:]
+    )
+    rows_per_chunk = max(
+        (max_parameters_amount - other_parameters_amount)
+        // max(len(field_names), 1),
+        1
+    )
+    models = arguments[index]
+    return [
+        (
+            *arguments[:index], models[start:start + rows_per_chunk],
+            *arguments[index + 1:]
+        )
+        for start in range(0, rows_amount, rows_per_chunk)
+    ]
+
+
+class CompiledQueriesCache:
+    """
+    Least recently used cache of compiled queries. Keys are whatever is
+    hashable and identifies the query text, the arguments shape and the
+    parameter marks. It may be shared by threads (the executors of a pool
+    are), so the order of the entries is changed under a lock
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._compiled_queries: "OrderedDict[Hashable, CompiledQuery]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CompiledQuery]:
+        with self._lock:
+            try:
+                compiled_query = self._compiled_queries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._compiled_queries.move_to_end(key)
+            self.hits += 1
+            return compiled_query
+
+    def put(self, key: Hashable, compiled_query: CompiledQuery):
+        with self._lock:
+            self._compiled_queries[key] = compiled_query
+            self._compiled_queries.move_to_end(key)
+            if len(self._compiled_queries) > self.max_size:
+                self._compiled_queries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._compiled_queries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._compiled_queries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._compiled_queries
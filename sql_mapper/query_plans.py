@@ -0,0 +1,228 @@
+import logging
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple,
+    Type
+)
+
+from sql_mapper.dialects import Dialect, split_parameter_marks
+from sql_mapper.instrumentation import QueryEvent, QueryHook
+from sql_mapper.model_base import ModelBase
+from sql_mapper.query_compiler import BoundArguments
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+FULL_SCAN = "full_scan"
+TEMP_B_TREE = "temp_b_tree"
+AUTOMATIC_INDEX = "automatic_index"
+
+EXPLAINABLE_STATEMENT_PATTERN = re.compile(
+    r"\s*(SELECT|VALUES|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE
+)
+# "SCAN a", "SCAN a AS b USING INDEX c" (and "SCAN TABLE a" of SQLite
+# versions prior to 3.36.0), but not "SCAN CONSTANT ROW" or subqueries
+_SCAN_PATTERN = re.compile(r"SCAN (?:TABLE )?(?!CONSTANT ROW)([\w$]+)")
+_SEARCH_PATTERN = re.compile(r"SEARCH (?:TABLE )?([\w$]+)")
+_TEMP_B_TREE_PATTERN = re.compile(r"\bUSE TEMP B-TREE\b")
+_AUTOMATIC_INDEX_PATTERN = re.compile(
+    r"\bAUTOMATIC (?:PARTIAL )?COVERING INDEX\b"
+)
+
+
+def count_unbound_parameters(statement: str) -> int:
+    """
+    Counts the "?" marks of the statement outside of its literals, quoted
+    identifiers and comments
+    """
+    return len(split_parameter_marks(statement, bracket_identifiers=True)) - 1
+
+
+def make_unbound_parameters(
+        statement: str, dialect: Optional[Dialect] = None) -> BoundArguments:
+    """
+    NULLs for the parameters of an already compiled statement: a list for
+    positional marks, a dict by the names (or the indexes) of the named (or
+    numbered) marks of the dialect, which is how sqlite3 binds them
+    """
+    if dialect is None or dialect.mark == "?":
+        return [None] * count_unbound_parameters(statement)
+    keys = dialect.find_keys(statement)
+    if dialect.is_positional:
+        return [None] * len(keys)
+    return dict.fromkeys(keys)
+
+
+@dataclass
+class PlanWarning:
+    kind: str  # FULL_SCAN, TEMP_B_TREE or AUTOMATIC_INDEX
+    detail: str
+    # The table the warning is about, None if it is about the whole
+    # statement (temporary B-trees are)
+    table: Optional[str]
+    models: Tuple[Type[ModelBase], ...]
+
+
+@dataclass
+class QueryPlan:
+    statement: str
+    fingerprint: str
+    # Rows of EXPLAIN QUERY PLAN: (id, parent, notused, detail)
+    rows: List[Sequence] = field(default_factory=list)
+    warnings: List[PlanWarning] = field(default_factory=list)
+    error: Optional[BaseException] = None
+    # How many times the statements with this fingerprint were executed
+    # since the plan was captured
+    executions: int = 1
+
+
+def get_models_by_tables(
+        models: Optional[Iterable[Type[ModelBase]]] = None
+) -> Dict[str, Tuple[Type[ModelBase], ...]]:
+    """
+    Models by their lowercase tablenames. Every subclass of ModelBase is
+    used if the models are not given
+    """
+    if models is None:
+        models = []
+        subclasses = ModelBase.__subclasses__()
+        while subclasses:
+            subclass = subclasses.pop()
+            subclasses.extend(subclass.__subclasses__())
+            if "_is_row_class" not in vars(subclass):
+                models.append(subclass)
+    models_by_tables: Dict[str, Tuple[Type[ModelBase], ...]] = {}
+    for model in models:
+        tablename = model.get_tablename()
+        if tablename:
+            tablename = tablename.lower()
+            models_by_tables[tablename] = (
+                models_by_tables.get(tablename, ()) + (model,)
+            )
+    return models_by_tables
+
+
+def analyze_plan(
+        rows: Sequence[Sequence],
+        models_by_tables: Dict[str, Tuple[Type[ModelBase], ...]]
+) -> List[PlanWarning]:
+    warnings = []
+    tables = []
+    for row in rows:
+        detail = row[-1]
+        match = _SCAN_PATTERN.match(detail) or _SEARCH_PATTERN.match(detail)
+        table = match.group(1) if match else None
+        if table is not None:
+            tables.append(table)
+        if table is not None and detail.startswith("SCAN"):
+            warnings.append(PlanWarning(
+                FULL_SCAN, detail, table,
+                models_by_tables.get(table.lower(), ())
+            ))
+        if _AUTOMATIC_INDEX_PATTERN.search(detail):
+            warnings.append(PlanWarning(
+                AUTOMATIC_INDEX, detail, table,
+                models_by_tables.get((table or "").lower(), ())
+            ))
+    for row in rows:
+        detail = row[-1]
+        if _TEMP_B_TREE_PATTERN.search(detail):
+            models = []
+            for table in tables:
+                for model in models_by_tables.get(table.lower(), ()):
+                    if model not in models:
+                        models.append(model)
+            warnings.append(PlanWarning(
+                TEMP_B_TREE, detail, None, tuple(models)
+            ))
+    return warnings
+
+
+class QueryPlanInspector(QueryHook):
+    """
+    Captures the query plan of every distinct statement (by fingerprint, see
+    instrumentation.fingerprint) the first time it is executed, and warns
+    about full table scans, temporary B-trees (sorting or grouping without
+    an index) and automatic indexes (SQLite makes them when there is no
+    index for a join). Only the statements of the executor the inspector is
+    added to are inspected:
+
+    sql_executor.add_hook(QueryPlanInspector(sql_executor))
+
+    The plans are captured with NULLs in place of the parameters, which is
+    almost always the plan SQLite uses for the real values. With a
+    sample_rate below 1 only that part of the executions of unseen
+    statements is inspected, so a production instance pays for EXPLAIN
+    rarely. The warnings are logged to the logger (if it is not None) and
+    kept in .plans, and .get_warnings() tells how often each of them happens
+    """
+
+    def __init__(
+            self, sql_executor: "AbstractSQLExecutor",
+            models: Optional[Iterable[Type[ModelBase]]] = None,
+            sample_rate: float = 1.0,
+            logger: Optional[logging.Logger] = logging.getLogger(
+                "sql_mapper.query_plans"
+            ),
+            get_random: Callable[[], float] = random.random):
+        self.sql_executor = sql_executor
+        self.models = None if models is None else tuple(models)
+        self.sample_rate = sample_rate
+        self.logger = logger
+        self.get_random = get_random
+        self.plans: Dict[str, QueryPlan] = {}
+        self._lock = threading.Lock()
+
+    def after_query(self, event: QueryEvent):
+        plan = self.plans.get(event.fingerprint)
+        if plan is not None:
+            plan.executions += 1
+            return
+        if (
+            event.error is not None
+            or not EXPLAINABLE_STATEMENT_PATTERN.match(event.statement)
+            or (
+                self.sample_rate < 1
+                and self.get_random() >= self.sample_rate
+            )
+        ):
+            return
+        plan = self.inspect(event.statement, event.fingerprint)
+        with self._lock:
+            if event.fingerprint in self.plans:
+                return
+            self.plans[event.fingerprint] = plan
+        if self.logger is not None:
+            for warning in plan.warnings:
+                self.logger.warning(
+                    "%s (%s): %s", warning.kind, warning.detail,
+                    plan.statement
+                )
+
+    def inspect(self, statement: str, statement_fingerprint: str) -> QueryPlan:
+        plan = QueryPlan(statement, statement_fingerprint)
+        try:
+            plan.rows = self.sql_executor.explain_query_plan(statement)
+        except Exception as error:
+            # Not every statement can be explained without its parameters
+            plan.error = error
+            return plan
+        plan.warnings = analyze_plan(
+            plan.rows, get_models_by_tables(self.models)
+        )
+        return plan
+
+    def get_warnings(self) -> List[Tuple[PlanWarning, QueryPlan]]:
+        """
+        Every warning with its plan, the most executed first
+        """
+        warnings = [
+            (warning, plan)
+            for plan in list(self.plans.values())
+            for warning in plan.warnings
+        ]
+        warnings.sort(key=lambda warning: -warning[1].executions)
+        return warnings
@@ -0,0 +1,318 @@
+import re
+import sys
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+)
+
+from sql_mapper import exceptions
+from sql_mapper.bulk_loading import get_primary_key
+from sql_mapper.model_base import ModelBase, Related, get_model
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+FOREIGN_KEY_PATTERN = re.compile(
+    r"\bFOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+([\w$\"`\[\]]+)"
+    r"\s*(?:\(([^)]*)\))?", re.I
+)
+COLUMN_REFERENCES_PATTERN = re.compile(
+    r"\bREFERENCES\s+([\w$\"`\[\]]+)\s*(?:\(([^)]*)\))?", re.I
+)
+# Relationships are nested with it in the paths of prefetch()
+PATH_SEPARATOR = "."
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    fields: Tuple[str, ...]
+    # The table is lowercase and unquoted
+    table: str
+    # Empty if the foreign key references the primary key of the table
+    references: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Relationship:
+    """
+    A resolved Related: the instances of .model are stitched to the ones of
+    .related by .fields == .related_fields
+    """
+    name: str
+    model: Type[ModelBase]
+    related: Type[ModelBase]
+    fields: Tuple[str, ...]
+    related_fields: Tuple[str, ...]
+    many: bool
+
+
+def _split_names(names: Optional[str]) -> Tuple[str, ...]:
+    if not names:
+        return ()
+    return tuple(
+        name.strip().split()[0] for name in names.split(",") if name.strip()
+    )
+
+
+def _unquote(name: str) -> str:
+    return name.strip("\"`[]").lower()
+
+
+def get_foreign_keys(model: Type[ModelBase]) -> Tuple[ForeignKey, ...]:
+    """
+    The foreign keys of "FOREIGN KEY (...) REFERENCES table(...)" in the
+    ._additional_table_lines of the model and the ones declared with
+    "REFERENCES table(...)" in the types of its fields
+    """
+    foreign_keys = [
+        ForeignKey(
+            _split_names(match.group(1)), _unquote(match.group(2)),
+            _split_names(match.group(3))
+        )
+        for match in FOREIGN_KEY_PATTERN.finditer(
+            getattr(model, "_additional_table_lines", None) or ""
+        )
+    ]
+    for field_name, sql_type in model._fields.items():
+        if not isinstance(sql_type, str):
+            continue
+        match = COLUMN_REFERENCES_PATTERN.search(sql_type)
+        if match:
+            foreign_keys.append(ForeignKey(
+                (field_name,), _unquote(match.group(1)),
+                _split_names(match.group(2))
+            ))
+    return tuple(foreign_keys)
+
+
+def _is_model(value) -> bool:
+    return (
+        isinstance(value, type) and issubclass(value, ModelBase)
+        and "_is_row_class" not in vars(value)
+    )
+
+
+def _find_model(
+        model: Type[ModelBase], name: str) -> Optional[Type[ModelBase]]:
+    """
+    The model with the name in the module of the declaring model, or the
+    only model with that name anywhere else (AmbiguousRelatedModel is raised
+    if there are several of them)
+    """
+    module = sys.modules.get(model.__module__)
+    found = getattr(module, name, None)
+    if _is_model(found):
+        return found
+    found_models = []
+    subclasses = ModelBase.__subclasses__()
+    while subclasses:
+        subclass = subclasses.pop()
+        subclasses.extend(subclass.__subclasses__())
+        if _is_model(subclass) and subclass.__name__ == name:
+            found_models.append(subclass)
+    if len(found_models) > 1:
+        raise exceptions.AmbiguousRelatedModel(
+            model_name=model.__name__, related_model_name=name,
+            modules=sorted(
+                found_model.__module__ for found_model in found_models
+            )
+        )
+    return found_models[0] if found_models else None
+
+
+def _references(
+        model: Type[ModelBase], referenced: Type[ModelBase],
+        foreign_key_fields: Optional[Tuple[str, ...]]
+) -> List[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    (fields, referenced fields) of every foreign key of the model to the
+    table of the referenced model
+    """
+    tablename = (referenced.get_tablename() or "").lower()
+    return [
+        (
+            foreign_key.fields,
+            foreign_key.references or get_primary_key(referenced)
+        )
+        for foreign_key in get_foreign_keys(model)
+        if foreign_key.table == tablename and (
+            foreign_key_fields is None
+            or foreign_key.fields == foreign_key_fields
+        )
+    ]
+
+
+_relationships_cache: Dict[Tuple[Type[ModelBase], str], Relationship] = {}
+
+
+def get_relationship(model: Type[ModelBase], name: str) -> Relationship:
+    model = get_model(model)
+    try:
+        return _relationships_cache[model, name]
+    except KeyError:
+        pass
+    related_declaration: Optional[Related] = model._relationships.get(name)
+    if related_declaration is None:
+        raise exceptions.UnknownRelationship(
+            model_name=model.__name__, relationship_name=name
+        )
+    related = related_declaration.model
+    if isinstance(related, str):
+        related_name = related
+        related = _find_model(model, related)
+        if related is None:
+            raise exceptions.ForeignKeyNotFound(
+                model_name=model.__name__, related_model_name=related_name
+            )
+    foreign_key = related_declaration.foreign_key
+    candidates = []
+    if related_declaration.many in (None, True):
+        candidates.extend(
+            Relationship(name, model, related, fields, related_fields, True)
+            for related_fields, fields in _references(
+                related, model, foreign_key
+            )
+        )
+    if related_declaration.many in (None, False):
+        candidates.extend(
+            Relationship(name, model, related, fields, related_fields, False)
+            for fields, related_fields in _references(
+                model, related, foreign_key
+            )
+        )
+    if (
+        len(candidates) != 1
+        or not candidates[0].fields or not candidates[0].related_fields
+    ):
+        raise exceptions.ForeignKeyNotFound(
+            model_name=model.__name__, related_model_name=related.__name__
+        )
+    relationship = _relationships_cache[model, name] = candidates[0]
+    return relationship
+
+
+def _get_key(instance: ModelBase, fields: Tuple[str, ...]) -> Optional[tuple]:
+    instance_fields = instance.instance_fields
+    key = tuple(instance_fields.get(field_name) for field_name in fields)
+    return None if None in key else key
+
+
+def _select_related(
+        sql_executor: "AbstractSQLExecutor", relationship: Relationship,
+        keys: List[tuple]) -> List[ModelBase]:
+    """
+    The instances of the related model with the related fields in the keys,
+    selected by "WHERE f IN (?,...)" (or "WHERE (f,g) IN (VALUES (?,?),...)"
+    for the keys of several fields) in chunks that fit the parameters limit
+    """
+    related = relationship.related
+    related_fields = relationship.related_fields
+    fields_amount = len(related_fields)
+    chunk_size = sql_executor.default_load_batch_size
+    if sql_executor.max_parameters_amount:
+        chunk_size = max(
+            sql_executor.max_parameters_amount // fields_amount, 1
+        )
+    convert = None
+    if sql_executor.type_adapters is not None:
+        convert = sql_executor.type_adapters.get_fields_converter(
+            relationship.model, relationship.fields
+        )
+    select = (
+        f"SELECT {','.join(related._fields)} FROM {related.get_tablename()} "
+    )
+    statements: Dict[int, str] = {}
+    instances = []
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        statement = statements.get(len(chunk))
+        if statement is None:
+            if fields_amount == 1:
+                condition = (
+                    f"{related_fields[0]} IN "
+                    f"({','.join('?' for _ in chunk)})"
+                )
+            else:
+                row = "(" + ",".join("?" for _ in related_fields) + ")"
+                condition = (
+                    f"({','.join(related_fields)}) IN "
+                    f"(VALUES {','.join(row for _ in chunk)})"
+                )
+            statement = statements[len(chunk)] = select + "WHERE " + condition
+        parameters = []
+        for key in chunk:
+            parameters.extend(key if convert is None else convert(key))
+        instances.extend(sql_executor.execute(statement, parameters, related))
+    return instances
+
+
+def _prefetch_relationship(
+        sql_executor: "AbstractSQLExecutor", instances: List[ModelBase],
+        relationship: Relationship) -> List[ModelBase]:
+    """
+    Loads the relationship of the instances and returns the related
+    instances
+    """
+    keys = {}
+    for instance in instances:
+        key = _get_key(instance, relationship.fields)
+        if key is not None:
+            keys[key] = None
+    related_instances = (
+        _select_related(sql_executor, relationship, list(keys))
+        if keys else []
+    )
+    # The hash index of the related instances by their related fields
+    index: Dict[tuple, list] = {}
+    for related_instance in related_instances:
+        index.setdefault(
+            _get_key(related_instance, relationship.related_fields), []
+        ).append(related_instance)
+    name = relationship.name
+    for instance in instances:
+        related = index.get(_get_key(instance, relationship.fields), ())
+        if relationship.many:
+            instance.__dict__[name] = list(related)
+        else:
+            instance.__dict__[name] = related[0] if related else None
+    return related_instances
+
+
+def _get_loaded(
+        instances: List[ModelBase], relationship: Relationship
+) -> List[ModelBase]:
+    related_instances = {}
+    for instance in instances:
+        related = instance.__dict__[relationship.name]
+        if not relationship.many:
+            related = () if related is None else (related,)
+        for related_instance in related:
+            related_instances[id(related_instance)] = related_instance
+    return list(related_instances.values())
+
+
+def prefetch(
+        sql_executor: "AbstractSQLExecutor", instances: Iterable[ModelBase],
+        paths: Sequence[str]) -> List[ModelBase]:
+    """
+    See AbstractSQLExecutor.prefetch()
+    """
+    instances = list(instances)
+    if not instances:
+        return instances
+    model = get_model(instances[0].__class__)
+    for path in paths:
+        level_model, level_instances = model, instances
+        for name in path.split(PATH_SEPARATOR):
+            relationship = get_relationship(level_model, name)
+            if all(name in instance.__dict__ for instance in level_instances):
+                # Loaded by a previous path
+                level_instances = _get_loaded(level_instances, relationship)
+            else:
+                level_instances = _prefetch_relationship(
+                    sql_executor, level_instances, relationship
+                )
+            level_model = relationship.related
+            if not level_instances:
+                break
+    return instances
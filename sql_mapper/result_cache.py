@@ -0,0 +1,182 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Sequence, Set
+)
+
+_NAME = r"(?:[\w$]+|\"[^\"]+\"|`[^`]+`|\[[^\]]+\])"
+_TABLE_NAME = r"(" + _NAME + r"(?:\." + _NAME + r")?)"
+WORD_PATTERN = re.compile(r"[\w$]+")
+WRITTEN_TABLES_PATTERN = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO"
+    r"|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM"
+    r"|(?:DROP|ALTER)\s+TABLE(?:\s+IF\s+EXISTS)?)\s+" + _TABLE_NAME,
+    re.IGNORECASE
+)
+
+
+def _normalize_table_name(table_name: str) -> str:
+    # Schema names are dropped: "main.a" and "a" are the same table for us
+    table_name = table_name.rsplit(".", 1)[-1]
+    return table_name.strip("\"`[]").lower()
+
+
+@lru_cache(maxsize=1024)
+def get_read_tables(query: str) -> FrozenSet[str]:
+    """
+    Every word of the query is considered a table name it may read from. It
+    is a lot more than needed, but no table will be missed (even the ones in
+    subqueries or in comma-separated lists)
+    """
+    return frozenset(WORD_PATTERN.findall(query.lower()))
+
+
+@lru_cache(maxsize=1024)
+def get_written_tables(query: str) -> FrozenSet[str]:
+    return frozenset(
+        _normalize_table_name(table_name)
+        for table_name in WRITTEN_TABLES_PATTERN.findall(query)
+    )
+
+
+def estimate_size(rows: Sequence[Sequence]) -> int:
+    """
+    Approximate amount of bytes the rows take
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row:
+            size += sys.getsizeof(value)
+    return size
+
+
+@dataclass
+class _CacheEntry:
+    rows: tuple
+    tables: FrozenSet[str]
+    expires_at: float
+    size: int
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int
+    misses: int
+    invalidations: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class ResultCache:
+    """
+    Least recently used cache of the rows of read queries, bounded by the
+    amount of entries and by their approximate size in bytes. Entries expire
+    after their TTL and are invalidated when something writes to the tables
+    the query reads from. It may be shared by threads, every method takes a
+    lock
+    """
+
+    def __init__(
+            self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+            default_ttl: float = 60.0,
+            clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._keys_by_table: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.expires_at <= self.clock():
+                self._remove(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.rows
+
+    def put(
+            self, key: Hashable, rows: Sequence[Sequence],
+            tables: Iterable[str], ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        rows = tuple(rows)
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        tables = frozenset(tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                rows, tables, self.clock() + ttl, size
+            )
+            self._bytes += size
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+            while (
+                len(self._entries) > self.max_entries
+                or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate_tables(self, tables: Iterable[str]):
+        with self._lock:
+            for table in tables:
+                for key in self._keys_by_table.pop(table, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        # The lock should be held by the caller
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    @property
+    def stats(self) -> ResultCacheStats:
+        with self._lock:
+            return ResultCacheStats(
+                hits=self._hits, misses=self._misses,
+                invalidations=self._invalidations,
+                evictions=self._evictions, entries=len(self._entries),
+                bytes=self._bytes
+            )
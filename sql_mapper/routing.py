@@ -0,0 +1,284 @@
+import dataclasses
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Type
+
+from sql_mapper import exceptions
+from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+from sql_mapper.model_base import ModelBase
+from sql_mapper.query_compiler import is_read_statement
+from sql_mapper.query_plans import make_unbound_parameters
+from sql_mapper.sql_executors import SQLiteDurabilityProfile, SQLiteSQLExecutor
+
+ROUND_ROBIN = "round_robin"
+LEAST_BUSY = "least_busy"
+STRATEGIES = (ROUND_ROBIN, LEAST_BUSY)
+
+
+@dataclass
+class BackendMetrics:
+    name: str
+    statements: int = 0
+    # Statements that wait for the backend or are executed on it right now
+    in_flight: int = 0
+    errors: int = 0
+    # Time the backend was busy executing statements and fetching rows
+    total_time: float = 0.0
+    max_time: float = 0.0
+    # Time the statements waited for the backend
+    total_wait_time: float = 0.0
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.statements if self.statements else 0.0
+
+    @property
+    def average_wait_time(self) -> float:
+        return (
+            self.total_wait_time / self.statements if self.statements else 0.0
+        )
+
+
+class Backend:
+    """
+    An executor a routing executor sends the statements to, one at a time
+    """
+
+    def __init__(self, sql_executor: AbstractSQLExecutor, name: str):
+        self.sql_executor = sql_executor
+        self.metrics = BackendMetrics(name)
+        self.lock = threading.Lock()
+
+
+class RoutingSQLExecutor(AbstractSQLExecutor):
+    """
+    Splits the statements between a primary executor and the executors of
+    its read replicas. Reads (see query_compiler.is_read_statement) go to the
+    replicas, chosen in turn (ROUND_ROBIN) or by the fewest statements in
+    flight (LEAST_BUSY). Everything else goes to the primary, and so do
+    commit(), rollback(), create_tables() and transactions.
+
+    Reads stick to the primary inside a transaction and after a write until
+    it is committed or rolled back, so they always see the changes made
+    through this executor. The replicas may lag behind otherwise.
+
+    Every backend executes one statement at a time (like one connection, the
+    rows are fetched before it is free, the streamed ones chunk by chunk), so
+    the read throughput of several threads grows with the number of
+    replicas. They may be executors of the
+    same replica file, see .new(). The compiled queries, the hooks, the
+    result cache and the type adapters of this executor are used, not the
+    ones of the backends. .metrics tells the load and the latency of every
+    backend
+    """
+
+    def __init__(
+            self, primary: AbstractSQLExecutor,
+            replicas: Sequence[AbstractSQLExecutor] = (),
+            strategy: str = ROUND_ROBIN):
+        if strategy not in STRATEGIES:
+            raise exceptions.UnknownRoutingStrategy(strategy)
+        self.strategy = strategy
+        self.primary = Backend(primary, "primary")
+        self.replicas = [
+            Backend(replica, f"replica_{index}")
+            for index, replica in enumerate(replicas)
+        ]
+        self.new_parameter_mark = primary.new_parameter_mark
+        self.old_parameter_mark = primary.old_parameter_mark
+        self.dialect = primary.dialect
+        limits = [
+            backend.sql_executor.max_parameters_amount
+            for backend in self.backends
+            if backend.sql_executor.max_parameters_amount
+        ]
+        self.max_parameters_amount = min(limits) if limits else None
+        self._lock = threading.Lock()
+        self._turns = itertools.count()
+        # A write was made on the primary and it is not committed yet
+        self._primary_changed = False
+
+    @classmethod
+    def new(
+            cls, file_path: str, replica_file_path: Optional[str] = None,
+            replicas_amount: int = 4, strategy: str = ROUND_ROBIN,
+            durability: Optional[SQLiteDurabilityProfile] = None
+    ) -> "RoutingSQLExecutor":
+        """
+        SQLite executors of the primary database file and replicas_amount read
+        only executors of the replica file (the primary file itself by
+        default, which is handy in the WAL mode)
+        """
+        return cls(
+            SQLiteSQLExecutor.new(
+                file_path, durability=durability, check_same_thread=False
+            ), [
+                SQLiteSQLExecutor.new(
+                    replica_file_path or file_path, read_only=True,
+                    check_same_thread=False
+                )
+                for _ in range(replicas_amount)
+            ],
+            strategy
+        )
+
+    @property
+    def backends(self) -> List[Backend]:
+        return [self.primary] + self.replicas
+
+    @property
+    def metrics(self) -> Dict[str, BackendMetrics]:
+        with self._lock:
+            return {
+                backend.metrics.name: dataclasses.replace(backend.metrics)
+                for backend in self.backends
+            }
+
+    def _choose_backend(self, statement: str) -> Backend:
+        """
+        Chooses the backend of the statement and counts the statement in its
+        .in_flight
+        """
+        replicas = self.replicas
+        with self._lock:
+            if (
+                not replicas or self._transaction_depth
+                or self._primary_changed or not is_read_statement(statement)
+            ):
+                backend = self.primary
+            elif self.strategy == ROUND_ROBIN:
+                backend = replicas[next(self._turns) % len(replicas)]
+            else:
+                # Starting from the next one in turn, so the ties are
+                # spread too
+                start = next(self._turns) % len(replicas)
+                backend = min(
+                    replicas[start:] + replicas[:start],
+                    key=lambda replica: replica.metrics.in_flight
+                )
+            backend.metrics.in_flight += 1
+            if backend is self.primary and not is_read_statement(statement):
+                self._primary_changed = True
+        return backend
+
+    @contextmanager
+    def _hold(self, backend: Backend) -> Iterator[AbstractSQLExecutor]:
+        """
+        Waits for the backend (which should be counted in .in_flight
+        already) and measures how long it is held
+        """
+        started_waiting_at = time.perf_counter()
+        with backend.lock:
+            started_at = time.perf_counter()
+            failed = False
+            try:
+                yield backend.sql_executor
+            except Exception:
+                failed = True
+                raise
+            finally:
+                busy_time = time.perf_counter() - started_at
+                with self._lock:
+                    metrics = backend.metrics
+                    metrics.in_flight -= 1
+                    metrics.statements += 1
+                    if failed:
+                        metrics.errors += 1
+                    metrics.total_wait_time += started_at - started_waiting_at
+                    metrics.total_time += busy_time
+                    metrics.max_time = max(metrics.max_time, busy_time)
+
+    def _execute_sql_statement(
+            self, statement: str, parameters: list) -> Iterable[Sequence]:
+        with self._hold(self._choose_backend(statement)) as sql_executor:
+            # Fetched right here, the backend is free after that
+            return list(
+                sql_executor._execute_sql_statement(statement, parameters)
+            )
+
+    def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        with self._hold(self._choose_backend(statement)) as sql_executor:
+            sql_executor._execute_many_sql_statement(statement, parameters)
+
+    def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        if not is_read_statement(statement):
+            return [self._execute_sql_statement(statement, parameters)]
+        chunks = self._stream_on_backend(
+            self._choose_backend(statement), statement, parameters,
+            chunk_size
+        )
+        next(chunks)  # Executing the statement right now
+        return chunks
+
+    def _stream_on_backend(
+            self, backend: Backend, statement: str, parameters: list,
+            chunk_size: int) -> Iterator[Optional[Sequence[Sequence]]]:
+        """
+        Holds the backend while the statement is executed and while every
+        chunk is fetched, not between the chunks, so the thread iterating
+        over the rows may execute other statements on the same backend
+        """
+        with self._hold(backend) as sql_executor:
+            chunks = iter(sql_executor._stream_sql_statement(
+                statement, parameters, chunk_size
+            ))
+        yield None
+        try:
+            while True:
+                with backend.lock:
+                    started_at = time.perf_counter()
+                    chunk = next(chunks, None)
+                    busy_time = time.perf_counter() - started_at
+                with self._lock:
+                    backend.metrics.total_time += busy_time
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                with backend.lock:
+                    close()
+
+    def _run_on_primary(self, method_name: str, *arguments):
+        with self._lock:
+            self.primary.metrics.in_flight += 1
+        with self._hold(self.primary) as sql_executor:
+            return getattr(sql_executor, method_name)(*arguments)
+
+    def commit(self):
+        self._run_on_primary("commit")
+        self._primary_changed = False
+
+    def rollback(self):
+        self._run_on_primary("rollback")
+        self._primary_changed = False
+        self._after_rollback()
+
+    def _begin_transaction(self):
+        self._run_on_primary("_begin_transaction")
+
+    def explain_query_plan(
+            self, statement: str, parameters: Optional[list] = None
+    ) -> List[Sequence]:
+        if parameters is None:
+            # The statement is compiled with the dialect of this executor
+            parameters = make_unbound_parameters(statement, self.dialect)
+        return self._run_on_primary(
+            "explain_query_plan", statement, parameters
+        )
+
+    def create_tables(self, *tables: Type[ModelBase]):
+        self._run_on_primary("create_tables", *tables)
+
+    def close(self):
+        for backend in self.backends:
+            close = getattr(backend.sql_executor, "close", None)
+            if close is not None:
+                close()
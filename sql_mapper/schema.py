@@ -0,0 +1,160 @@
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Tuple, Type
+
+from sql_mapper import exceptions
+from sql_mapper.model_base import Index, ModelBase
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_IF_NOT_EXISTS_PATTERN = re.compile(r"\bIF\s+NOT\s+EXISTS\s+", re.I)
+
+
+def make_create_table_statement(table: Type[ModelBase]) -> str:
+    table_data = table.get_table_data()
+    if not table_data.name:
+        raise exceptions.TablenameNotSpecifiedOnTableCreation(
+            model_name=table.__name__
+        )
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table_data.name} ("
+        + ",".join(
+            f"{field_name} {field_value}"
+            for field_name, field_value in table_data.fields.items()
+        )
+        + (
+            f",{table_data.additional_table_lines}"
+            if table_data.additional_table_lines else
+            ""
+        ) + ")"
+    )
+
+
+def make_create_index_statement(
+        tablename: str, index: Index, if_not_exists: bool = True) -> str:
+    return (
+        f"CREATE {'UNIQUE ' if index.unique else ''}INDEX "
+        f"{'IF NOT EXISTS ' if if_not_exists else ''}"
+        f"{index.get_name(tablename)} ON {tablename}({','.join(index.fields)})"
+        + (f" WHERE {index.where}" if index.where else "")
+    )
+
+
+def make_create_statements(table: Type[ModelBase]) -> List[str]:
+    """
+    CREATE TABLE statement of the table and CREATE INDEX statements of its
+    indexes
+    """
+    table_data = table.get_table_data()
+    return [make_create_table_statement(table)] + [
+        make_create_index_statement(table_data.name, index)
+        for index in table_data.indexes
+    ]
+
+
+def _normalize_statement(statement: str) -> str:
+    statement = _IF_NOT_EXISTS_PATTERN.sub("", statement)
+    return _WHITESPACE_PATTERN.sub(" ", statement).strip().lower()
+
+
+@dataclass
+class SchemaDiff:
+    """
+    What the database lacks to match the models, and the statements that
+    add it (in the order they should be executed). Changed indexes are
+    dropped and created again. Nothing is ever removed from the tables
+    """
+    missing_tables: List[str] = field(default_factory=list)
+    missing_columns: List[Tuple[str, str]] = field(default_factory=list)
+    missing_indexes: List[str] = field(default_factory=list)
+    changed_indexes: List[str] = field(default_factory=list)
+    statements: List[str] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.statements)
+
+
+def get_schema_diff(
+        sql_executor: "AbstractSQLExecutor", *tables: Type[ModelBase]
+) -> SchemaDiff:
+    """
+    Compares the tables of the models to the ones of an SQLite database
+    (sqlite_master and PRAGMA table_info/index_list). Keep in mind that
+    SQLite can't add a column with a PRIMARY KEY or UNIQUE constraint, or a
+    NOT NULL column without a default value
+    """
+    diff = SchemaDiff()
+    existing_tables = {
+        name.lower() for name, in sql_executor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    for table in tables:
+        table_data = table.get_table_data()
+        if not table_data.name:
+            raise exceptions.TablenameNotSpecifiedOnTableCreation(
+                model_name=table.__name__
+            )
+        tablename = table_data.name
+        if tablename.lower() not in existing_tables:
+            diff.missing_tables.append(tablename)
+            diff.statements.extend(make_create_statements(table))
+            continue
+        columns = {
+            name.lower() for name, in sql_executor.execute(
+                "SELECT name FROM pragma_table_info(?)", [tablename]
+            )
+        }
+        for field_name, sql_type in table_data.fields.items():
+            if field_name.lower() not in columns:
+                diff.missing_columns.append((tablename, field_name))
+                diff.statements.append(
+                    f"ALTER TABLE {tablename} ADD COLUMN {field_name} "
+                    f"{sql_type or ''}".rstrip()
+                )
+        # Only the indexes created by CREATE INDEX, not the ones of the
+        # constraints
+        existing_indexes: Dict[str, str] = {
+            name.lower(): statement
+            for name, statement in sql_executor.execute(
+                "SELECT index_list.name, master.sql "
+                "FROM pragma_index_list(?) AS index_list "
+                "JOIN sqlite_master AS master "
+                "ON master.name = index_list.name "
+                "WHERE index_list.origin = 'c'", [tablename]
+            )
+        }
+        for index in table_data.indexes:
+            index_name = index.get_name(tablename)
+            statement = make_create_index_statement(tablename, index)
+            existing_statement = existing_indexes.get(index_name.lower())
+            if existing_statement is None:
+                diff.missing_indexes.append(index_name)
+            elif (
+                _normalize_statement(existing_statement)
+                != _normalize_statement(statement)
+            ):
+                diff.changed_indexes.append(index_name)
+                diff.statements.append(f"DROP INDEX {index_name}")
+            else:
+                continue
+            diff.statements.append(statement)
+    return diff
+
+
+def migrate(
+        sql_executor: "AbstractSQLExecutor", *tables: Type[ModelBase]
+) -> SchemaDiff:
+    """
+    Executes the statements of the schema diff, each one in its own
+    transaction. So on a database in the WAL mode (see
+    sql_executors.PooledSQLiteSQLExecutor) the readers are blocked by none of
+    them, and the writers wait only for one index build at a time
+    """
+    diff = get_schema_diff(sql_executor, *tables)
+    for statement in diff.statements:
+        with sql_executor.transaction():
+            sql_executor.execute(statement)
+    return diff
@@ -0,0 +1,365 @@
+from typing import (
+    TYPE_CHECKING, Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple,
+    Type, TypeVar
+)
+
+from sql_mapper import exceptions
+from sql_mapper.bulk_loading import get_primary_key
+from sql_mapper.model_base import ModelBase, get_model
+
+if TYPE_CHECKING:
+    from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+
+GenericModel = TypeVar("GenericModel", bound=ModelBase)
+
+
+def _make_tracked_field_property(field_name: str) -> property:
+    def get_field(self):
+        return self._fields.get(field_name)
+
+    def set_field(self, value):
+        self._fields[field_name] = value
+        self._dirty_fields.add(field_name)
+
+    return property(get_field, set_field)
+
+
+def _new_instance(model: Type[ModelBase]) -> ModelBase:
+    return model.__new__(model)
+
+
+def _make_tracked_class(cls: Type[ModelBase]) -> Type[ModelBase]:
+    """
+    Makes a subclass of the class that remembers which fields are assigned
+    (in the ._dirty_fields set, which every instance should have). It adds
+    no slots, so the class of an instance can be replaced with it
+    """
+    namespace = {
+        "_is_row_class": True, "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__, "__doc__": cls.__doc__
+    }
+    if "_is_row_class" not in vars(cls):
+        # Instances of a usual model keep their fields in the ._fields dict
+        for field_name in cls._fields:
+            namespace[field_name] = _make_tracked_field_property(field_name)
+
+        def __reduce__(self):
+            # Unpickled as an untracked instance of the model, the tracked
+            # class can't be pickled by its name
+            state = dict(self.__dict__)
+            state.pop("_dirty_fields", None)
+            return _new_instance, (cls,), state
+
+        namespace["__reduce__"] = __reduce__
+    else:
+        field_names = frozenset(cls._fields)
+        set_attribute = cls.__setattr__
+
+        def __setattr__(self, name: str, value: Any):
+            set_attribute(self, name, value)
+            if name in field_names:
+                self._dirty_fields.add(name)
+
+        namespace["__setattr__"] = __setattr__
+    return type(cls.__name__, (cls,), namespace)
+
+
+def track(instance: ModelBase):
+    """
+    Makes the assignments of the fields of the instance tracked
+    """
+    cls = instance.__class__
+    try:
+        tracked_class = cls.__dict__["_tracked_class"]
+    except KeyError:
+        tracked_class = _make_tracked_class(cls)
+        cls._tracked_class = tracked_class
+        tracked_class._tracked_class = tracked_class
+    instance.__dict__["_dirty_fields"] = set()
+    instance.__class__ = tracked_class
+
+
+class Session:
+    """
+    Identity map and unit of work over an executor. Every instance the
+    session loads or adds is kept by its model and primary key (see
+    bulk_loading.get_primary_key), so loading the same row again gives the
+    same instance (with its unflushed changes). Assignments to the fields of
+    those instances are tracked, and .flush() writes the new, changed and
+    deleted instances in one transaction, in batches of statements of the
+    same shape:
+
+    with Session(sql_executor) as session:
+        a = session.get(A, 1)
+        a.c = "new"
+        session.add(A(2, "b"))
+    # Flushed here
+
+    Instances of models without a primary key can only be added. The rows
+    of the loaded instances are updated and deleted by the primary key they
+    were loaded with, so it may be changed too
+    """
+
+    def __init__(self, sql_executor: "AbstractSQLExecutor"):
+        self.sql_executor = sql_executor
+        self.identity_map: Dict[
+            Tuple[Type[ModelBase], Hashable], ModelBase
+        ] = {}
+        # The identities of the instances of the identity map by their ids
+        self._identities: Dict[
+            int, Tuple[Type[ModelBase], Hashable]
+        ] = {}
+        self._new: List[ModelBase] = []
+        self._new_ids: Set[int] = set()
+        self._deleted: List[ModelBase] = []
+        self._keys: Dict[Type[ModelBase], Tuple[str, ...]] = {}
+
+    def __enter__(self) -> "Session":
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is None:
+            self.flush()
+
+    def _get_key_fields(
+            self, model: Type[ModelBase], required: bool = True
+    ) -> Tuple[str, ...]:
+        try:
+            key_fields = self._keys[model]
+        except KeyError:
+            key_fields = self._keys[model] = get_primary_key(model)
+        if required and not key_fields:
+            raise exceptions.PrimaryKeyNotSpecified(model_name=model.__name__)
+        return key_fields
+
+    def _get_identity(
+            self, instance: ModelBase
+    ) -> Optional[Tuple[Type[ModelBase], Hashable]]:
+        model = get_model(instance.__class__)
+        key_fields = self._get_key_fields(model, required=False)
+        if not key_fields:
+            return None
+        instance_fields = instance.instance_fields
+        key = tuple(
+            instance_fields.get(field_name) for field_name in key_fields
+        )
+        if None in key:
+            return None
+        return model, key
+
+    def _merge(self, instance: GenericModel) -> GenericModel:
+        """
+        The instance of the identity map with the same key, or the instance
+        itself (which is tracked and added to the identity map then)
+        """
+        identity = self._get_identity(instance)
+        if identity is not None:
+            known_instance = self.identity_map.get(identity)
+            if known_instance is not None:
+                return known_instance
+            self._remember(instance, identity)
+        track(instance)
+        return instance
+
+    def _remember(
+            self, instance: ModelBase,
+            identity: Tuple[Type[ModelBase], Hashable]):
+        self.identity_map[identity] = instance
+        self._identities[id(instance)] = identity
+
+    def _forget(self, instance: ModelBase):
+        identity = self._identities.pop(id(instance), None)
+        if identity is not None:
+            del self.identity_map[identity]
+
+    def query(
+            self, sql_statement, parameters: Iterable = (),
+            model: Type[GenericModel] = None) -> List[GenericModel]:
+        """
+        Like AbstractSQLExecutor.execute(), but the rows that are already in
+        the identity map are replaced with the instances from it
+        """
+        return [
+            self._merge(instance) for instance in self.sql_executor.execute(
+                sql_statement, parameters, model
+            )
+        ]
+
+    def get(
+            self, model: Type[GenericModel], *key: Any
+    ) -> Optional[GenericModel]:
+        """
+        The instance with the primary key from the identity map, or from the
+        database (None if there is no such row)
+        """
+        instance = self.identity_map.get((get_model(model), key))
+        if instance is not None:
+            return instance
+        key_fields = self._get_key_fields(get_model(model))
+        conditions = " AND ".join(
+            f"{field_name} = ?" for field_name in key_fields
+        )
+        instances = self.query(
+            f"SELECT {','.join(model._fields)} "
+            f"FROM {model.get_tablename()} WHERE {conditions}", key, model
+        )
+        return instances[0] if instances else None
+
+    def add(self, instance: ModelBase):
+        """
+        The instance will be inserted on the next .flush()
+        """
+        instance_id = id(instance)
+        if instance_id in self._new_ids or instance_id in self._identities:
+            return  # It is already in the session
+        track(instance)
+        self._new.append(instance)
+        self._new_ids.add(instance_id)
+
+    def delete(self, instance: ModelBase):
+        """
+        The row of the instance will be deleted on the next .flush()
+        """
+        if id(instance) in self._new_ids:
+            self._new.remove(instance)
+            self._new_ids.remove(id(instance))
+            return
+        self._get_key_fields(get_model(instance.__class__))
+        self._deleted.append(instance)
+
+    @property
+    def dirty(self) -> List[ModelBase]:
+        """
+        Loaded instances with assigned fields
+        """
+        return [
+            instance for instance in self.identity_map.values()
+            if instance._dirty_fields and id(instance) not in self._new_ids
+        ]
+
+    def flush(self):
+        """
+        Inserts the new instances (one multi-row INSERT per model and set of
+        given fields, so the columns an instance doesn't have get their
+        defaults), updates the changed fields of the loaded ones (one batch
+        per model and set of changed fields) and deletes the deleted ones
+        (one batch per model), all in one transaction
+        """
+        sql_executor = self.sql_executor
+        inserts: Dict[Tuple[Type[ModelBase], Tuple[str, ...]], List] = {}
+        for instance in self._new:
+            key = (
+                get_model(instance.__class__), tuple(instance.instance_fields)
+            )
+            inserts.setdefault(key, []).append(instance)
+        updates: Dict[Tuple[Type[ModelBase], Tuple[str, ...]], List] = {}
+        dirty = self.dirty
+        for instance in dirty:
+            model = get_model(instance.__class__)
+            field_names = tuple(
+                field_name for field_name in model._fields
+                if field_name in instance._dirty_fields
+            )
+            updates.setdefault((model, field_names), []).append(instance)
+        deletes: Dict[Type[ModelBase], List[ModelBase]] = {}
+        for instance in self._deleted:
+            deletes.setdefault(
+                get_model(instance.__class__), []
+            ).append(instance)
+        with sql_executor.transaction():
+            for (model, field_names), instances in inserts.items():
+                if field_names:
+                    sql_executor.execute("INSERT INTO ?", [instances])
+                    continue
+                for _ in instances:
+                    sql_executor.execute(
+                        f"INSERT INTO {model.get_tablename()} DEFAULT VALUES"
+                    )
+            for (model, field_names), instances in updates.items():
+                key_fields = self._get_key_fields(model)
+                assignments = ",".join(
+                    f"{field_name} = ?" for field_name in field_names
+                )
+                conditions = " AND ".join(
+                    f"{field_name} = ?" for field_name in key_fields
+                )
+                sql_executor.execute_many(
+                    f"UPDATE {model.get_tablename()} SET {assignments} "
+                    f"WHERE {conditions}", [
+                        self._get_values(instance, field_names)
+                        + self._get_original_key(instance, key_fields)
+                        for instance in instances
+                    ]
+                )
+            for model, instances in deletes.items():
+                key_fields = self._get_key_fields(model)
+                conditions = " AND ".join(
+                    f"{field_name} = ?" for field_name in key_fields
+                )
+                sql_executor.execute_many(
+                    f"DELETE FROM {model.get_tablename()} WHERE {conditions}",
+                    [
+                        self._get_original_key(instance, key_fields)
+                        for instance in instances
+                    ]
+                )
+        for instance in self._new:
+            instance._dirty_fields.clear()
+            identity = self._get_identity(instance)
+            if identity is not None and identity not in self.identity_map:
+                self._remember(instance, identity)
+        for instance in self._deleted:
+            self._forget(instance)
+        for instance in dirty:
+            instance._dirty_fields.clear()
+            identity = self._get_identity(instance)
+            if identity != self._identities.get(id(instance)):
+                # The primary key is changed
+                self._forget(instance)
+                if identity is not None:
+                    self._remember(instance, identity)
+        self._new.clear()
+        self._new_ids.clear()
+        self._deleted.clear()
+
+    def _get_original_key(
+            self, instance: ModelBase, key_fields: Tuple[str, ...]) -> list:
+        """
+        The values of the primary key the instance was loaded with (or the
+        current ones, if it wasn't loaded by this session)
+        """
+        identity = self._identities.get(id(instance))
+        if identity is None:
+            return self._get_values(instance, key_fields)
+        return self._convert(identity[0], key_fields, list(identity[1]))
+
+    def _get_values(
+            self, instance: ModelBase, field_names: Tuple[str, ...]) -> list:
+        """
+        Values of the fields converted by the type adapters of the executor
+        """
+        instance_fields = instance.instance_fields
+        return self._convert(
+            get_model(instance.__class__), field_names,
+            [instance_fields.get(field_name) for field_name in field_names]
+        )
+
+    def _convert(
+            self, model: Type[ModelBase], field_names: Tuple[str, ...],
+            values: list) -> list:
+        type_adapters = self.sql_executor.type_adapters
+        if type_adapters is not None:
+            convert = type_adapters.get_fields_converter(model, field_names)
+            if convert is not None:
+                values = list(convert(values))
+        return values
+
+    def clear(self):
+        """
+        Forgets every instance (the unflushed changes are lost)
+        """
+        self.identity_map.clear()
+        self._identities.clear()
+        self._new.clear()
+        self._new_ids.clear()
+        self._deleted.clear()
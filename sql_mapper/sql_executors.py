@@ -1,49 +1,339 @@
+import pathlib
 import sqlite3
-from typing import Sequence, Iterable, Type
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import (
+    Sequence, Iterable, Type, Optional, Iterator, List, Callable
+)
 
-from sql_mapper import exceptions
 from sql_mapper.abstract_sql_executor import AbstractSQLExecutor
+from sql_mapper.connection_pool import ConnectionPool
+from sql_mapper.dialects import SQLITE
 from sql_mapper.model_base import ModelBase
+from sql_mapper.query_compiler import is_read_statement
+from sql_mapper.query_plans import make_unbound_parameters
+from sql_mapper.schema import make_create_statements
+from sql_mapper.transactions import AutoCommitPolicy
+
+
+@dataclass
+class SQLiteDurabilityProfile:
+    """
+    PRAGMAs that trade durability for speed, applied to every connection of
+    an executor when it is created (None means "leave the default").
+    cache_size is in pages if it is positive and in KiB if it is negative,
+    like in SQLite itself
+    """
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    cache_size: Optional[int] = None
+
+    def apply(self, connection: sqlite3.Connection):
+        if self.journal_mode is not None:
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        if self.synchronous is not None:
+            connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        if self.cache_size is not None:
+            connection.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+
+
+# Every commit survives a power loss
+DURABLE = SQLiteDurabilityProfile(journal_mode="WAL", synchronous="FULL")
+# The database can't be corrupted, but the last commits may be lost on a
+# power loss
+BALANCED = SQLiteDurabilityProfile(journal_mode="WAL", synchronous="NORMAL")
+# For bulk loads that can be repeated from scratch if something goes wrong
+FAST = SQLiteDurabilityProfile(
+    journal_mode="WAL", synchronous="OFF", cache_size=-64 * 1024
+)
 
 
 class SQLiteSQLExecutor(AbstractSQLExecutor):
     new_parameter_mark = "?"
+    dialect = SQLITE
+    # SQLITE_MAX_VARIABLE_NUMBER of SQLite versions prior to 3.32.0, the real
+    # limit is taken from the connection if Python allows it
+    max_parameters_amount = 999
 
     def _execute_sql_statement(
             self, statement: str, parameters: list) -> Iterable[Sequence]:
         return self.cursor.execute(statement, parameters)
 
+    def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        self.cursor.executemany(statement, parameters)
+
+    def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        cursor = self.connection.cursor()
+        cursor.execute(statement, parameters)
+        return self._fetch_chunks(cursor, chunk_size)
+
+    @staticmethod
+    def _fetch_chunks(
+            cursor: sqlite3.Cursor, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
     def __init__(
             self, connection: sqlite3.Connection,
             cursor: sqlite3.Cursor):
         self.connection = connection
         self.cursor = cursor
+        self.max_parameters_amount = get_max_parameters_amount(
+            connection, self.max_parameters_amount
+        )
 
     def commit(self):
         self.connection.commit()
 
+    def rollback(self):
+        self.connection.rollback()
+        self._after_rollback()
+
+    def explain_query_plan(
+            self, statement: str, parameters: Optional[list] = None
+    ) -> List[Sequence]:
+        # On its own cursor, so the rows of .cursor are not lost
+        if parameters is None:
+            parameters = make_unbound_parameters(statement, self.dialect)
+        return self.connection.execute(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).fetchall()
+
+    def _begin_transaction(self):
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+
+    def close(self):
+        self.connection.close()
+
     @classmethod
-    def new(cls, file_path: str):
-        connection = sqlite3.connect(file_path)
+    def new(
+            cls, file_path: str, cached_statements: int = 128,
+            durability: Optional[SQLiteDurabilityProfile] = None,
+            read_only: bool = False, check_same_thread: bool = True):
+        """
+        cached_statements is the size of the connection's cache of compiled
+        statements (make it bigger if you have a lot of prepared statements),
+        durability is a set of PRAGMAs to apply (see DURABLE, BALANCED and
+        FAST). A read only executor can't change the database at all.
+        Without check_same_thread the executor may be used by other threads
+        than the one it is made by (but only by one of them at a time)
+        """
+        if read_only:
+            connection = sqlite3.connect(
+                f"{pathlib.Path(file_path).absolute().as_uri()}?mode=ro",
+                cached_statements=cached_statements, uri=True,
+                check_same_thread=check_same_thread
+            )
+        else:
+            connection = sqlite3.connect(
+                file_path, cached_statements=cached_statements,
+                check_same_thread=check_same_thread
+            )
+        if durability is not None:
+            durability.apply(connection)
         return cls(connection, connection.cursor())
 
     def create_tables(self, *tables: Type[ModelBase]):
         for table in tables:
-            table_data = table.get_table_data()
-            if not table_data.name:
-                raise exceptions.TablenameNotSpecifiedOnTableCreation(
-                    model_name=table.__name__
-                )
-            sql_statement = (
-                f"CREATE TABLE IF NOT EXISTS {table_data.name} ("
-                + ",".join(
-                    f"{field_name} {field_value}"
-                    for field_name, field_value in table_data.fields.items()
-                )
-                + (
-                    f",{table_data.additional_table_lines}"
-                    if table_data.additional_table_lines else
-                    ""
-                ) + ")"
+            for statement in make_create_statements(table):
+                self.cursor.execute(statement)
+
+
+class PooledSQLiteSQLExecutor(AbstractSQLExecutor):
+    """
+    An SQLite executor that can be shared between threads. Reads (see
+    query_compiler.is_read_statement) are executed on a pool of reader
+    connections, everything else is executed on the single writer connection,
+    one statement at a time (the writers wait in a queue). The database is
+    switched to the WAL mode, so the readers don't block the writer.
+
+    The rows are fetched completely before the connection is returned to the
+    pool (except for .stream(), which holds a reader connection until the
+    rows are fetched). The readers see only the committed changes.
+
+    Transactions are per thread: a thread in a transaction holds the writer
+    connection until it is committed or rolled back, so the writes of the
+    other threads wait for it instead of joining it, and the reads of the
+    thread are executed on the writer connection too, so they see the
+    changes of the transaction
+    """
+    new_parameter_mark = "?"
+    dialect = SQLITE
+    max_parameters_amount = 999
+
+    def __init__(
+            self, file_path: str, pool_size: int = 4,
+            timeout: Optional[float] = None,
+            durability: Optional[SQLiteDurabilityProfile] = None):
+        self.file_path = file_path
+        self.durability = durability
+        self.writer_pool = ConnectionPool(
+            self._connect, size=1, timeout=timeout
+        )
+        with self.writer_pool.checkout() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            self.max_parameters_amount = get_max_parameters_amount(
+                connection, self.max_parameters_amount
+            )
+        self.reader_pool = ConnectionPool(
+            self._connect, size=pool_size, timeout=timeout
+        )
+        self._thread_data = threading.local()
+
+    @classmethod
+    def new(
+            cls, file_path: str, pool_size: int = 4,
+            timeout: Optional[float] = None,
+            durability: Optional[SQLiteDurabilityProfile] = None):
+        return cls(file_path, pool_size, timeout, durability)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        if self.durability is not None:
+            self.durability.apply(connection)
+        return connection
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        """
+        lastrowid of the last write made by the current thread
+        """
+        return getattr(self._thread_data, "lastrowid", None)
+
+    @property
+    def _transaction_depth(self) -> int:
+        return getattr(self._thread_data, "transaction_depth", 0)
+
+    @_transaction_depth.setter
+    def _transaction_depth(self, depth: int):
+        self._thread_data.transaction_depth = depth
+
+    @property
+    def _auto_commit_policy(self) -> Optional[AutoCommitPolicy]:
+        return getattr(self._thread_data, "auto_commit_policy", None)
+
+    @_auto_commit_policy.setter
+    def _auto_commit_policy(self, policy: Optional[AutoCommitPolicy]):
+        self._thread_data.auto_commit_policy = policy
+
+    @contextmanager
+    def _writer_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        The writer connection, which the thread may hold for its transaction
+        already
+        """
+        connection = getattr(self._thread_data, "connection", None)
+        if connection is not None:
+            yield connection
+            return
+        with self.writer_pool.checkout() as connection:
+            yield connection
+
+    def _execute_sql_statement(
+            self, statement: str, parameters: list) -> Iterable[Sequence]:
+        if (
+            is_read_statement(statement)
+            and getattr(self._thread_data, "connection", None) is None
+        ):
+            with self.reader_pool.checkout() as connection:
+                return connection.execute(statement, parameters).fetchall()
+        with self._writer_connection() as connection:
+            cursor = connection.execute(statement, parameters)
+            self._thread_data.lastrowid = cursor.lastrowid
+            return cursor.fetchall()
+
+    def _execute_many_sql_statement(
+            self, statement: str, parameters: Iterable[list]):
+        with self._writer_connection() as connection:
+            connection.executemany(statement, parameters)
+
+    def _stream_sql_statement(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterable[Sequence[Sequence]]:
+        connection = getattr(self._thread_data, "connection", None)
+        if connection is not None:
+            return SQLiteSQLExecutor._fetch_chunks(
+                connection.execute(statement, parameters), chunk_size
             )
-            self.cursor.execute(sql_statement)
+        if not is_read_statement(statement):
+            return [self._execute_sql_statement(statement, parameters)]
+        chunks = self._stream_on_reader(statement, parameters, chunk_size)
+        next(chunks)  # Executing the statement right now
+        return chunks
+
+    def _stream_on_reader(
+            self, statement: str, parameters: list, chunk_size: int
+    ) -> Iterator[Optional[Sequence[Sequence]]]:
+        with self.reader_pool.checkout() as connection:
+            cursor = connection.execute(statement, parameters)
+            yield None
+            yield from SQLiteSQLExecutor._fetch_chunks(cursor, chunk_size)
+
+    def _finish_transaction(
+            self, finish: Callable[[sqlite3.Connection], None]):
+        """
+        Commits or rolls back on the writer connection and returns it to the
+        pool, if the thread holds it for a transaction
+        """
+        checkout = getattr(self._thread_data, "checkout", None)
+        if checkout is None:
+            with self.writer_pool.checkout() as connection:
+                finish(connection)
+            return
+        connection = self._thread_data.connection
+        self._thread_data.connection = self._thread_data.checkout = None
+        with checkout:
+            finish(connection)
+
+    def commit(self):
+        self._finish_transaction(sqlite3.Connection.commit)
+
+    def rollback(self):
+        self._finish_transaction(sqlite3.Connection.rollback)
+        self._after_rollback()
+
+    def _begin_transaction(self):
+        if getattr(self._thread_data, "connection", None) is None:
+            checkout = ExitStack()
+            connection = checkout.enter_context(self.writer_pool.checkout())
+            self._thread_data.connection = connection
+            self._thread_data.checkout = checkout
+        connection = self._thread_data.connection
+        if not connection.in_transaction:
+            try:
+                connection.execute("BEGIN")
+            except BaseException:
+                self._finish_transaction(sqlite3.Connection.rollback)
+                raise
+
+    def create_tables(self, *tables: Type[ModelBase]):
+        with self._writer_connection() as connection:
+            for table in tables:
+                for statement in make_create_statements(table):
+                    connection.execute(statement)
+
+    def close(self):
+        for pool in (self.writer_pool, self.reader_pool):
+            for connection in pool.connections:
+                connection.close()
+
+
+def get_max_parameters_amount(
+        connection: sqlite3.Connection, default: int) -> int:
+    try:
+        return connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    except AttributeError:  # Python < 3.11
+        return default
+
@@ -1,10 +1,9 @@
 import re
 import typing
 from abc import ABC, abstractmethod
-from typing import Union, List, Iterable
+from typing import Union, List, Iterable, Tuple
 
-from sql_mapper import exceptions
-from sql_mapper.model_base import ModelBase
+from sql_mapper.query_compiler import compile_query, get_arguments_shape
 
 QUESTION_MARK_PATTERN = re.compile(r"\?")
 
@@ -21,79 +20,30 @@ class BaseFormattableString(ABC):
         return type(other) == type(self) and other.query == self.query
 
     @abstractmethod
-    def reformat_query(
-            self, old_arguments: Iterable, new_arguments: list,
-            new_parameter_mark: str,
-            old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
-    ) -> str:
+    def get_query_parts(
+            self, old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
+    ) -> List[str]:
         """
-        Makes a query that can be passed to the database connector, replacing
-        every BaseModel instance with its values and its corresponding
-        question mark with something like "tablename (field1, field2, field3)
-        VALUES (?,?,?)" (depends on the database connector).
-
-        So,
-
-        old query:
-            "INSERT INTO ?", instance_of_model
-        new query:
-            "INSERT INTO tablename (field1, field2, ...) VALUES (?, ?, ...)",
-            values_from_instance_of_model
+        Splits the query by the parameter marks, so there is a parameter mark
+        between every two neighbouring parts
         """
         pass
 
 
 class FormattableString(BaseFormattableString):
 
-    @staticmethod
-    def _new_query_parameter_marks_generator(
-            old_arguments: Iterable, new_arguments: list,
-            new_parameter_mark: str):
-        """
-        Yields new parameter marks, which will replace old parameter marks.
-        Also appends additional new arguments to new_arguments (passed list).
-        """
-        for argument in old_arguments:
-            if isinstance(argument, ModelBase):
-                new_arguments.extend(argument.instance_fields.values())
-                tablename = argument.get_tablename()
-                if not tablename:
-                    raise exceptions.TablenameNotSpecifiedOnInsertion(
-                        model_name=argument.__class__.__name__
-                    )
-                yield (
-                    tablename + "(" + ",".join(argument.instance_fields.keys())
-                    + ")VALUES(" + ",".join(
-                        new_parameter_mark
-                        for _ in range(len(argument.instance_fields))
-                    ) + ")"
-                )
-            else:
-                new_arguments.append(argument)
-                yield new_parameter_mark
-
-    def reformat_query(
-            self, old_arguments: Iterable, new_arguments: list,
-            new_parameter_mark: str,
-            old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
-    ):
-        parameter_marks_generator = self._new_query_parameter_marks_generator(
-            old_arguments, new_arguments, new_parameter_mark
-        )
-        new_query = old_parameter_mark.sub(
-            lambda match: next(parameter_marks_generator), self.query
-        )
-        return new_query
+    def get_query_parts(
+            self, old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
+    ) -> List[str]:
+        return old_parameter_mark.split(self.query)
 
 
 class UnformattableString(BaseFormattableString):
 
-    def reformat_query(
-            self, old_arguments: Iterable, new_arguments: list,
-            new_parameter_mark: str,
-            old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
-    ) -> str:
-        return self.query
+    def get_query_parts(
+            self, old_parameter_mark: re.Pattern = QUESTION_MARK_PATTERN
+    ) -> List[str]:
+        return [self.query]
 
 
 class NewQueryStringWithArguments(typing.NamedTuple):
@@ -137,15 +87,19 @@ class StringDump:
         new arguments:
             values_from_instance_of_model
         """
-        new_arguments = []
-        new_query = "".join(
-            string.reformat_query(
-                old_arguments, new_arguments, new_parameter_mark,
-                old_parameter_mark
-            )
-            for string in self.strings
+        old_arguments = tuple(old_arguments)
+        compiled_query = compile_query(
+            self, get_arguments_shape(old_arguments), new_parameter_mark,
+            old_parameter_mark
+        )
+        return NewQueryStringWithArguments(
+            compiled_query.query, compiled_query.bind(old_arguments)
+        )
+
+    def get_cache_key(self) -> Tuple[Tuple[type, str], ...]:
+        return tuple(
+            (string.__class__, string.query) for string in self.strings
         )
-        return NewQueryStringWithArguments(new_query, new_arguments)
 
     def __str__(self):
         return "[" + ", ".join(str(string) for string in self.strings) + "]"
@@ -0,0 +1,33 @@
+import time
+from typing import Optional
+
+
+class AutoCommitPolicy:
+    """
+    Tells when a long transaction should be committed (and begun again):
+    after every commit_every statements, or after commit_interval seconds
+    since the last commit, whichever comes first
+    """
+
+    def __init__(
+            self, commit_every: Optional[int] = None,
+            commit_interval: Optional[float] = None):
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.commits = 0
+        self.reset()
+
+    def reset(self):
+        self.statements = 0
+        self.started_at = time.monotonic()
+
+    def is_due(self) -> bool:
+        if self.statements == 0:
+            return False
+        return bool(
+            (self.commit_every and self.statements >= self.commit_every)
+            or (
+                self.commit_interval is not None
+                and time.monotonic() - self.started_at >= self.commit_interval
+            )
+        )
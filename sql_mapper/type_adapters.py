@@ -0,0 +1,203 @@
+import datetime
+import decimal
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import (
+    Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple, Type
+)
+
+from sql_mapper.model_base import ModelBase
+
+_TYPE_NAME_PATTERN = re.compile(r"\s*(\w+)")
+
+Converter = Callable[[Any], Any]
+ValuesConverter = Callable[[Iterable], tuple]
+
+
+def get_type_name(sql_type) -> Optional[str]:
+    """
+    Only the first word of the declared type matters, so "INTEGER NOT NULL"
+    is an INTEGER and "DECIMAL(10, 2)" is a DECIMAL
+    """
+    if not isinstance(sql_type, str):
+        return None
+    match = _TYPE_NAME_PATTERN.match(sql_type)
+    return match.group(1).upper() if match else None
+
+
+@dataclass(frozen=True)
+class TypeAdapter:
+    """
+    to_python converts the values of the rows, to_sql converts the values of
+    the fields of the models passed as arguments. NULLs are never converted
+    """
+    to_python: Optional[Converter] = None
+    to_sql: Optional[Converter] = None
+
+
+def _to_bool(value) -> bool:
+    return bool(value)
+
+
+def _to_int(value) -> int:
+    return int(value)
+
+
+def _to_decimal(value) -> decimal.Decimal:
+    # str() keeps 0.1 from becoming 0.1000000000000000055511151231257827
+    return decimal.Decimal(str(value))
+
+
+def _to_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _date_to_sql(value: datetime.date) -> str:
+    return value.isoformat()
+
+
+def _datetime_to_sql(value: datetime.datetime) -> str:
+    return value.isoformat(sep=" ")
+
+
+_DATE_ADAPTER = TypeAdapter(datetime.date.fromisoformat, _date_to_sql)
+_DATETIME_ADAPTER = TypeAdapter(
+    datetime.datetime.fromisoformat, _datetime_to_sql
+)
+_DECIMAL_ADAPTER = TypeAdapter(_to_decimal, str)
+_BOOLEAN_ADAPTER = TypeAdapter(_to_bool, _to_int)
+
+STANDARD_TYPE_ADAPTERS = {
+    "DATE": _DATE_ADAPTER,
+    "DATETIME": _DATETIME_ADAPTER, "TIMESTAMP": _DATETIME_ADAPTER,
+    "DECIMAL": _DECIMAL_ADAPTER, "NUMERIC": _DECIMAL_ADAPTER,
+    "BOOLEAN": _BOOLEAN_ADAPTER, "BOOL": _BOOLEAN_ADAPTER,
+    "JSON": TypeAdapter(json.loads, _to_json),
+}
+
+
+def make_values_converter(
+        converters: Sequence[Optional[Converter]]
+) -> Optional[ValuesConverter]:
+    """
+    Generates a function that converts a whole row (an iterable with one
+    value for every converter) in one pass. The values without a converter are
+    passed as is. Returns None if there is nothing to convert
+    """
+    if not any(converters):
+        return None
+    namespace = {}
+    names = []
+    expressions = []
+    for index, converter in enumerate(converters):
+        name = f"value_{index}"
+        names.append(name)
+        if converter is None:
+            expressions.append(name)
+        else:
+            namespace[f"convert_{index}"] = converter
+            expressions.append(
+                f"{name} if {name} is None else convert_{index}({name})"
+            )
+    # The trailing commas make it work for one value too
+    unpacking = "".join(f"{name}, " for name in names)
+    packing = "".join(f"{expression}, " for expression in expressions)
+    source = (
+        f"def convert(row):\n"
+        f"    {unpacking}= row\n"
+        f"    return ({packing})\n"
+    )
+    exec(source, namespace)
+    return namespace["convert"]
+
+
+class TypeAdapters:
+    """
+    Registry of the adapters by the declared SQL types of the fields (see
+    get_type_name). Set it as the .type_adapters of an executor and the
+    fields of the models will be converted on the way in and out:
+
+    sql_executor.type_adapters = TypeAdapters()
+    sql_executor.type_adapters.register("POINT", TypeAdapter(...))
+
+    Without the adapters argument the STANDARD_TYPE_ADAPTERS are used. The
+    converters are compiled once per model and cached. The cache is shared
+    by the threads: hits are plain dict lookups, misses and .register() take
+    a lock, so a converter compiled from the old adapters is never cached
+    after a .register()
+    """
+
+    def __init__(self, adapters: Optional[Dict[str, TypeAdapter]] = None):
+        if adapters is None:
+            adapters = STANDARD_TYPE_ADAPTERS
+        self._adapters: Dict[str, TypeAdapter] = {}
+        self._converters: Dict[Hashable, Optional[ValuesConverter]] = {}
+        self._lock = threading.Lock()
+        for sql_type, adapter in adapters.items():
+            self.register(sql_type, adapter)
+
+    def __getstate__(self):
+        # The generated converters can't be pickled, they are generated
+        # again after unpickling
+        return {"_adapters": self._adapters}
+
+    def __setstate__(self, state: dict):
+        self._adapters = state["_adapters"]
+        self._converters = {}
+        self._lock = threading.Lock()
+
+    def register(self, sql_type: str, adapter: TypeAdapter):
+        with self._lock:
+            self._adapters[get_type_name(sql_type)] = adapter
+            self._converters.clear()
+
+    def get(self, sql_type) -> Optional[TypeAdapter]:
+        return self._adapters.get(get_type_name(sql_type))
+
+    def get_python_converters(
+            self, model: Type[ModelBase]) -> Tuple[Optional[Converter], ...]:
+        """
+        to_python of every field of the model (None if it has no adapter)
+        """
+        return tuple(
+            getattr(self.get(sql_type), "to_python", None)
+            for sql_type in model._fields.values()
+        )
+
+    def get_row_converter(
+            self, model: Type[ModelBase]) -> Optional[ValuesConverter]:
+        """
+        Converts a row with a value for every field of the model, None if
+        none of the fields has to be converted
+        """
+        key = (model, None)
+        try:
+            return self._converters[key]
+        except KeyError:
+            with self._lock:
+                converter = self._converters[key] = make_values_converter(
+                    self.get_python_converters(model)
+                )
+            return converter
+
+    def get_fields_converter(
+            self, model: Type[ModelBase], field_names: Tuple[str, ...]
+    ) -> Optional[ValuesConverter]:
+        """
+        Converts the values of the fields (in the field_names order) of an
+        instance of the model to SQL, None if none of them has to be
+        converted
+        """
+        key = (model, field_names)
+        try:
+            return self._converters[key]
+        except KeyError:
+            fields = model._fields
+            with self._lock:
+                converter = self._converters[key] = make_values_converter([
+                    getattr(self.get(fields.get(field_name)), "to_sql", None)
+                    for field_name in field_names
+                ])
+            return converter
@@ -0,0 +1,131 @@
+import asyncio
+
+from sql_mapper import ModelBase
+from sql_mapper.abstract_sql_executor import EmptyAsyncIterable
+from sql_mapper.async_sql_executors import AsyncSQLiteSQLExecutor
+from sql_mapper.instrumentation import StatisticsAggregator
+from sql_mapper.result_cache import ResultCache
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+async def _collect(rows):
+    return [row async for row in rows]
+
+
+def test_async_sql_executor():
+
+    async def main():
+        sql_executor = AsyncSQLiteSQLExecutor.new(":memory:")
+        await sql_executor.create_tables(A)
+        results = await sql_executor.execute_many(
+            "INSERT INTO ?", ([A(i, str(i))] for i in range(1, 101))
+        )
+        assert len(results) == 100
+        assert await _collect(results[0]) == []
+        await sql_executor.commit()
+        counts = await asyncio.gather(*(
+            sql_executor.execute("SELECT COUNT(*) FROM a WHERE b <= ?", [i])
+            for i in range(10)
+        ))
+        assert [await _collect(rows) for rows in counts] == [
+            [(i,)] for i in range(10)
+        ]
+        rows = await sql_executor.stream(
+            "SELECT * FROM a", model=A, chunk_size=30
+        )
+        assert await _collect(rows) == [A(i, str(i)) for i in range(1, 101)]
+        rows = await sql_executor.execute("SELECT c FROM a WHERE b = 2")
+        assert await _collect(rows) == [("2",)]
+        columns = await sql_executor.execute_columns(
+            "SELECT * FROM a WHERE b < 4", model=A
+        )
+        assert columns["c"] == ["1", "2", "3"]
+        pages = [
+            page async for page in sql_executor.paginate(
+                A, "-b", page_size=40, prefetch=True
+            )
+        ]
+        assert [len(page.rows) for page in pages] == [40, 40, 20]
+        assert pages[1].rows[0] == A(60, "60")
+        await sql_executor.close()
+
+    asyncio.run(main())
+
+
+def test_pooled_async_sql_executor(tmp_path):
+
+    async def main():
+        sql_executor = AsyncSQLiteSQLExecutor.new(
+            str(tmp_path / "database.sqlite3"), pool_size=3,
+            max_concurrency=4
+        )
+        await sql_executor.create_tables(A)
+        await sql_executor.execute("INSERT INTO ?", [
+            [A(i, str(i)) for i in range(1, 11)]
+        ])
+        await sql_executor.commit()
+        streams = await asyncio.gather(*(
+            sql_executor.stream("SELECT b FROM a", chunk_size=3)
+            for _ in range(3)
+        ))
+        assert [len(await _collect(rows)) for rows in streams] == [10] * 3
+        await sql_executor.close()
+
+    asyncio.run(main())
+
+
+def test_async_prepared_and_cached():
+
+    async def main():
+        sql_executor = AsyncSQLiteSQLExecutor.new(":memory:")
+        sql_executor.result_cache = ResultCache(default_ttl=10)
+        await sql_executor.create_tables(A)
+        insert = sql_executor.prepare("INSERT INTO ?", A)
+        assert await _collect(await insert(A(1, "a"))) == []
+        await insert.execute_many([[A(2, "b")], [A(3, "c")]])
+        select = sql_executor.prepare("SELECT * FROM a WHERE b > ?", model=A)
+        assert await _collect(await select(1)) == [A(2, "b"), A(3, "c")]
+
+        async def count():
+            return await _collect(
+                await sql_executor.execute_cached("SELECT COUNT(*) FROM a")
+            )
+
+        assert await count() == [(3,)]
+        assert await count() == [(3,)]
+        assert sql_executor.sync_executor.result_cache.stats.hits == 1
+        await insert(A(4, "d"))
+        assert await count() == [(4,)]
+        await sql_executor.close()
+
+    asyncio.run(main())
+
+
+def test_async_hooks():
+
+    async def main():
+        sql_executor = AsyncSQLiteSQLExecutor.new(":memory:")
+        statistics = StatisticsAggregator()
+        sql_executor.add_hook(statistics)
+        await sql_executor.create_tables(A)
+        await sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+        rows = await sql_executor.execute("SELECT * FROM a WHERE b > 0")
+        assert await _collect(rows) == [(1, "a")]
+        sql_executor.remove_hook(statistics)
+        await sql_executor.execute("SELECT * FROM a WHERE b > 0")
+        query_statistics = statistics.get_statistics()
+        assert query_statistics["SELECT * FROM a WHERE b > ?"].count == 1
+        assert query_statistics["SELECT * FROM a WHERE b > ?"].rows == 1
+        await sql_executor.close()
+
+    asyncio.run(main())
+
+
+def test_empty_async_iterable():
+    assert asyncio.run(_collect(EmptyAsyncIterable())) == []
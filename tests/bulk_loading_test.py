@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.bulk_loading import get_primary_key, make_conflict_clause
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+class B(ModelBase):
+    _tablename = "b"
+    id: int = "INTEGER PRIMARY KEY"
+    name: str = "TEXT"
+
+
+class C(ModelBase):
+    _tablename = "c"
+    d: int = "INTEGER"
+
+
+def test_get_primary_key():
+    assert get_primary_key(A) == ("b",)
+    assert get_primary_key(B) == ("id",)
+    assert get_primary_key(C) == ()
+    assert make_conflict_clause(C, None) == ""
+    assert make_conflict_clause(C, "ignore") == " ON CONFLICT DO NOTHING"
+    assert make_conflict_clause(A, "update") == (
+        " ON CONFLICT(b) DO UPDATE SET c=excluded.c"
+    )
+    with pytest.raises(exceptions.ConflictKeyNotSpecified):
+        make_conflict_clause(C, "update")
+    with pytest.raises(exceptions.UnknownConflictAction):
+        make_conflict_clause(A, "replace")
+
+
+@pytest.mark.parametrize("staging", [False, True])
+def test_load(staging):
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.max_parameters_amount = 10
+    sql_executor.create_tables(A)
+    reports = []
+    progress = sql_executor.load(
+        A, (A(number, "old") for number in range(20)), staging=staging,
+        progress=reports.append, progress_interval=0
+    )
+    assert (progress.rows, progress.batches) == (20, 4)
+    assert progress.finished and progress.rows_per_second > 0
+    assert len(reports) == 5 and reports[-1] is progress
+
+    with pytest.raises(exceptions.RowLengthMismatch):
+        sql_executor.load(A, [(100, "new"), (101,)], staging=staging)
+    with pytest.raises(sqlite3.IntegrityError):
+        sql_executor.load(A, [(0, "new")], staging=staging)
+    sql_executor.load(
+        A, [(0, "new"), A(b=1)], on_conflict="ignore", staging=staging
+    )
+    sql_executor.load(
+        A, [(2, "new"), (20, "new")], on_conflict="update", staging=staging
+    )
+    with pytest.raises(exceptions.MissingFieldsOnUpdate) as error:
+        sql_executor.load(A, [A(b=3)], on_conflict="update", staging=staging)
+    assert error.value.field_names == ["c"]
+    rows = list(sql_executor.execute("SELECT * FROM a ORDER BY b"))
+    assert len(rows) == 21
+    assert rows[:3] == [(0, "old"), (1, "old"), (2, "new")]
+    assert rows[-1] == (20, "new")
+    assert list(sql_executor.execute(
+        "SELECT COUNT(*) FROM sqlite_temp_master"
+    )) == [(0,)]
@@ -0,0 +1,57 @@
+from array import array
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class Measurement(ModelBase):
+    _tablename = "measurements"
+    id: int = "INTEGER"
+    value: float = "REAL"
+    label: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (id)"
+
+
+def _new_sql_executor():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(Measurement)
+    sql_executor.execute("INSERT INTO ?", [[
+        Measurement(i, i / 2, str(i)) for i in range(1, 6)
+    ]])
+    return sql_executor
+
+
+def test_execute_columns():
+    sql_executor = _new_sql_executor()
+    columns = sql_executor.execute_columns(
+        "SELECT * FROM measurements", model=Measurement, chunk_size=2
+    )
+    assert list(columns) == ["id", "value", "label"]
+    assert columns["id"] == array("q", [1, 2, 3, 4, 5])
+    assert columns["value"] == array("d", [0.5, 1, 1.5, 2, 2.5])
+    assert columns["label"] == ["1", "2", "3", "4", "5"]
+    sql_executor.execute("INSERT INTO ?", [Measurement(label="6")])
+    columns = sql_executor.execute_columns(
+        "SELECT * FROM measurements", model=Measurement, chunk_size=2
+    )
+    assert columns["value"] == [0.5, 1, 1.5, 2, 2.5, None]
+    with pytest.raises(exceptions.ColumnsAmountMismatch):
+        sql_executor.execute_columns(
+            "SELECT id FROM measurements", model=Measurement
+        )
+    with pytest.raises(exceptions.ColumnsModelNotSpecified):
+        sql_executor.execute_columns("DELETE FROM measurements")
+    assert list(sql_executor.execute(
+        "SELECT COUNT(*) FROM measurements"
+    )) == [(6,)]
+
+
+def test_execute_columns_as_numpy():
+    numpy = pytest.importorskip("numpy")
+    columns = _new_sql_executor().execute_columns(
+        "SELECT * FROM measurements", model=Measurement, as_numpy=True
+    )
+    assert columns["id"].dtype == numpy.int64
+    assert columns["value"].tolist() == [0.5, 1, 1.5, 2, 2.5]
@@ -0,0 +1,99 @@
+import re
+
+from sql_mapper import ModelBase, raw
+from sql_mapper.dialects import (
+    DOLLAR, FORMAT, NAMED, NUMERIC, PYFORMAT, SQLITE, split_parameter_marks
+)
+from sql_mapper.query_compiler import compile_query, get_arguments_shape
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+from sql_mapper.string_dump import FormattableString, QUESTION_MARK_PATTERN
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+
+
+def _compile(statement: str, arguments: list, dialect):
+    compiled_query = compile_query(
+        [FormattableString(statement)], get_arguments_shape(arguments), "?",
+        QUESTION_MARK_PATTERN, dialect
+    )
+    return compiled_query.query, compiled_query.bind(arguments)
+
+
+def test_split_parameter_marks():
+    assert split_parameter_marks("SELECT 1") == ["SELECT 1"]
+    assert split_parameter_marks("a=? AND b=?") == ["a=", " AND b=", ""]
+    assert split_parameter_marks(
+        "SELECT '?', \"?\", `?`, [?] -- ?\n FROM a /* ? */ WHERE b = ?"
+    ) == [
+        "SELECT '?', \"?\", `?`, [", "] -- ?\n FROM a /* ? */ WHERE b = ", ""
+    ]
+    assert split_parameter_marks(
+        "SELECT [?], 'it''s ?' WHERE b = ?", bracket_identifiers=True
+    ) == ["SELECT [?], 'it''s ?' WHERE b = ", ""]
+
+
+def test_dialects():
+    statement = "INSERT INTO ? SELECT ?, '?' -- ?\n WHERE ?"
+    arguments = [A(1, "a"), 2, 3]
+    assert _compile(statement, arguments, NUMERIC) == (
+        "INSERT INTO a(b,c)VALUES(:1,:2) SELECT :3, '?' -- ?\n WHERE :4",
+        [1, "a", 2, 3]
+    )
+    assert _compile(statement, arguments, DOLLAR)[0] == (
+        "INSERT INTO a(b,c)VALUES($1,$2) SELECT $3, '?' -- ?\n WHERE $4"
+    )
+    assert _compile(statement, arguments, NAMED) == (
+        "INSERT INTO a(b,c)VALUES(:p1,:p2) SELECT :p3, '?' -- ?\n WHERE :p4",
+        {"p1": 1, "p2": "a", "p3": 2, "p4": 3}
+    )
+    assert _compile(
+        "INSERT INTO ? WHERE c LIKE '%a'", [[A(1, "a"), A(2, "b")]], FORMAT
+    ) == (
+        "INSERT INTO a(b,c)VALUES(%s,%s),(%s,%s) WHERE c LIKE '%%a'",
+        [1, "a", 2, "b"]
+    )
+    assert PYFORMAT.rewrite("SELECT ?, '%' WHERE b = ?") == (
+        "SELECT %(p1)s, '%%' WHERE b = %(p2)s"
+    )
+    assert SQLITE.rewrite("SELECT [?] WHERE b = ?") == (
+        "SELECT [?] WHERE b = ?"
+    )
+
+
+def test_sqlite_executor_dialects():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO a VALUES (?, '?')", [1])
+    sql_executor.dialect = NAMED
+    sql_executor.execute("INSERT INTO ?", [[A(2, "b"), A(3, "c")]])
+    sql_executor.load(A, [(4, "d"), A(5, "e")])
+    select = sql_executor.prepare(
+        "SELECT * FROM a WHERE b > ? AND " + raw("c != '?'"), model=A
+    )
+    assert list(select(2)) == [A(3, "c"), A(4, "d"), A(5, "e")]
+    assert select.bind([2]) == {"p1": 2}
+    insert = sql_executor.prepare("INSERT INTO ?", A)
+    assert insert.bind([A(6, "f")]) == {"p1": 6, "p2": "f"}
+    insert.execute_many([[A(6, "f")], [A(7, "g")]])
+    assert list(sql_executor.execute(
+        "SELECT c FROM a WHERE b IN (?, ?, ?)", [1, 2, 7]
+    )) == [("?",), ("b",), ("g",)]
+
+
+def test_subclass_parameter_marks():
+
+    class FormatSQLiteSQLExecutor(SQLiteSQLExecutor):
+        old_parameter_mark = re.compile("%s")
+
+    assert SQLiteSQLExecutor.dialect is SQLITE
+    assert FormatSQLiteSQLExecutor.dialect is None
+    sql_executor = FormatSQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO %s", [A(1, "a")])
+    assert list(sql_executor.execute("SELECT c FROM a WHERE b = %s", [1])) == [
+        ("a",)
+    ]
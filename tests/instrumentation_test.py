@@ -0,0 +1,87 @@
+from sql_mapper import ModelBase
+from sql_mapper.instrumentation import (
+    QueryHook, StatisticsAggregator, SlowQueryLog, fingerprint
+)
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+
+
+class RecordingHook(QueryHook):
+
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_query(self, event):
+        self.before.append(event.fingerprint)
+
+    def after_query(self, event):
+        self.after.append((event.fingerprint, event.rows))
+
+
+def test_hooks():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    hook = RecordingHook()
+    statistics = StatisticsAggregator()
+    slow_query_log = SlowQueryLog(threshold=0, logger=None)
+    for added_hook in (hook, statistics, slow_query_log):
+        sql_executor.add_hook(added_hook)
+    sql_executor.execute("INSERT INTO ?", [[A(1, "a"), A(2, "b")]])
+    assert hook.after == [("INSERT INTO a(b,c)VALUES(...)", 0)]
+    rows = sql_executor.execute("SELECT * FROM a WHERE b > 0", model=A)
+    assert hook.before[-1] == "SELECT * FROM a WHERE b > ?"
+    assert len(hook.after) == 1  # The rows are not fetched yet
+    assert list(rows) == [A(1, "a"), A(2, "b")]
+    assert hook.after[-1] == ("SELECT * FROM a WHERE b > ?", 2)
+    assert list(sql_executor.stream("SELECT * FROM a WHERE b > 1")) == [
+        (2, "b")
+    ]
+    sql_executor.execute_many("INSERT INTO ?", [[A(3, "c")], [A(4, "d")]])
+    assert list(sql_executor.prepare("SELECT c FROM a WHERE b = ?")(4)) == [
+        ("d",)
+    ]
+    assert [rows for _, rows in hook.after] == [0, 2, 1, 0, 1]
+    event_statistics = statistics.get_statistics()
+    assert event_statistics["SELECT * FROM a WHERE b > ?"].count == 2
+    assert event_statistics["SELECT * FROM a WHERE b > ?"].rows == 3
+    assert (
+        event_statistics["INSERT INTO a(b,c)VALUES(...)"].p99
+        >= event_statistics["INSERT INTO a(b,c)VALUES(...)"].p50
+    )
+    assert len(slow_query_log.entries) == 5
+    sql_executor.remove_hook(hook)
+    sql_executor.execute("SELECT 1")
+    assert len(hook.after) == 5
+
+
+def test_prepared_execute_many():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    statistics = StatisticsAggregator()
+    sql_executor.add_hook(statistics)
+    insert = sql_executor.prepare("INSERT INTO a VALUES (?, ?)")
+    insert.execute_many([(i, str(i)) for i in range(10)])
+    select = sql_executor.prepare("SELECT * FROM a WHERE b < ?", model=A)
+    results = select.execute_many([(1,), (3,)])
+    assert [list(rows) for rows in results] == [
+        [A(0, "0")], [A(0, "0"), A(1, "1"), A(2, "2")]
+    ]
+    event_statistics = statistics.get_statistics()
+    assert event_statistics[fingerprint(insert.query)].count == 1
+    assert event_statistics[fingerprint(select.query)].count == 2
+    assert event_statistics[fingerprint(select.query)].rows == 4
+
+
+def test_fingerprint():
+    assert fingerprint(
+        "SELECT  *\n FROM a -- comment\n WHERE c = 'it''s' AND b IN (?, ?)"
+    ) == "SELECT * FROM a WHERE c = ? AND b IN (...)"
+    assert fingerprint("INSERT INTO a(b)VALUES(?),(?),(?)") == (
+        "INSERT INTO a(b)VALUES(...)"
+    )
@@ -0,0 +1,112 @@
+import pickle
+
+from sql_mapper import ModelBase, lazy
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+
+
+class Receiver(ModelBase):
+    _tablename = "receiver"
+    self: int = "INTEGER"
+    c: str = "TEXT"
+
+
+def test_row_class():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+    [row] = sql_executor.execute("SELECT * FROM a", model=A)
+    assert isinstance(row, A)
+    assert type(row).__slots__ == ("b", "c")
+    assert (row.b, row.c) == (1, "a")
+    assert row.instance_fields == {"b": 1, "c": "a"}
+    assert row == A(1, "a")
+    assert str(row) == "A(b=1, c='a')"
+    # Rows with fewer columns are mapped by the usual constructor
+    [row] = sql_executor.execute("SELECT c FROM a", model=A)
+    assert row.instance_fields == {"b": "a"}
+
+
+def test_lazy_rows():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [[A(1, "a"), A(2, "b")]])
+    assert lazy(lazy(A)) is lazy(A)
+    rows = list(sql_executor.execute("SELECT * FROM a", model=lazy(A)))
+    assert [type(row).__slots__ for row in rows] == [("_row",), ("_row",)]
+    assert isinstance(rows[0], A)
+    assert rows[0]._row == (1, "a")
+    assert (rows[1].b, rows[1].c) == (2, "b")
+    assert rows[0] == A(1, "a")
+    assert str(rows[0]) == "A(b=1, c='a')"
+
+    row = rows[0]
+    wrapped_row = row._row
+    row.c = "c"
+    assert wrapped_row == (1, "a")
+    assert row.instance_fields == {"b": 1, "c": "c"}
+    model = row.to_model()
+    assert type(model) is A._row_class
+    assert model.instance_fields == {"b": 1, "c": "c"}
+    # Lazy rows can be passed as arguments like usual instances
+    sql_executor.execute("INSERT INTO ?", [row])
+    assert list(sql_executor.execute("SELECT c FROM a WHERE b = 1")) == [
+        ("a",), ("c",)
+    ]
+    [row] = sql_executor.execute("SELECT c FROM a LIMIT 1", model=lazy(A))
+    assert row.instance_fields == {"b": "a"}
+
+
+def test_pickled_rows():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [[A(1, "a"), A(2, "b")]])
+    row, lazy_row = sql_executor.execute(
+        "SELECT * FROM a", model=lazy(A)
+    )
+    row = row.to_model()
+    row.__dict__["d"] = [3]
+    unpickled_row, unpickled_lazy_row = pickle.loads(
+        pickle.dumps([row, lazy_row])
+    )
+    assert type(unpickled_row) is A._row_class
+    assert unpickled_row == A(1, "a")
+    assert unpickled_row.__dict__ == {"d": [3]}
+    assert type(unpickled_lazy_row) is lazy(A)
+    assert unpickled_lazy_row == A(2, "b")
+    assert pickle.loads(pickle.dumps(A(c="d"))) == A(c="d")
+    # A hydrated row and an instance made by hand are of the same model
+    sql_executor.execute("INSERT INTO ?", [[row, A(3, "c")]])
+    assert len(list(sql_executor.execute("SELECT * FROM a"))) == 4
+
+
+def test_inherited_fields():
+
+    class B(A):
+        c: str = "VARCHAR"
+        d: int = "INTEGER"
+
+        def method(self):
+            pass
+
+    assert B._fields == {"b": "INTEGER", "c": "VARCHAR", "d": "INTEGER"}
+    assert A._fields == {"b": "INTEGER", "c": "TEXT"}
+    assert "_generated_row_class" not in vars(B)
+    assert B._row_class is not A._row_class
+    assert type(B._row_class(1, "a", 2)).__slots__ == ("b", "c", "d")
+    assert B._row_class._row_class is B._row_class
+
+
+def test_field_named_self():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(Receiver)
+    sql_executor.execute("INSERT INTO ?", [Receiver(1, "a")])
+    [row] = sql_executor.execute("SELECT * FROM receiver", model=Receiver)
+    assert type(row) is Receiver._row_class
+    assert row.instance_fields == {"self": 1, "c": "a"}
+    assert pickle.loads(pickle.dumps(row)) == Receiver(1, "a")
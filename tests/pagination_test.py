@@ -0,0 +1,120 @@
+import sqlite3
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.pagination import (
+    make_order_clause, make_seek_condition, parse_order_by
+)
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+@pytest.fixture
+def sql_executor():
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    sql_executor = SQLiteSQLExecutor(connection, connection.cursor())
+    sql_executor.create_tables(A)
+    sql_executor.execute_many(
+        "INSERT INTO a VALUES (?, ?)",
+        [(number, "xyz"[number % 3]) for number in range(25)]
+    )
+    return sql_executor
+
+
+def test_seek_condition():
+    assert parse_order_by(A, "c") == (("c", False), ("b", False))
+    assert make_seek_condition(parse_order_by(A, "-b")) == ("b<?", [0])
+    assert make_seek_condition(parse_order_by(A, ["c", "b"])) == (
+        "(c,b)>(?,?)", [0, 1]
+    )
+    assert make_seek_condition(parse_order_by(A, ["-c", "b"])) == (
+        "(c<?) OR (c=? AND b>?)", [0, 0, 1]
+    )
+    assert make_seek_condition(parse_order_by(A, "-c"), {"c"}, {"c"}) == (
+        "(c IS NULL AND b<?)", [1]
+    )
+    assert make_seek_condition(parse_order_by(A, "c"), {"c"}, {"c"}) == (
+        "(c IS NOT NULL) OR (c IS NULL AND b>?)", [1]
+    )
+    assert make_seek_condition(parse_order_by(A, "-c"), {"c"}) == (
+        "(c<? OR c IS NULL) OR (c=? AND b<?)", [0, 0, 1]
+    )
+    with pytest.raises(exceptions.UnknownField):
+        parse_order_by(A, "d")
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_paginate(sql_executor, prefetch):
+    expected = sorted(
+        sql_executor.execute("SELECT * FROM a WHERE b > ?", [2], A),
+        key=lambda a: (-ord(a.c), a.b)
+    )
+    paginator = sql_executor.paginate(
+        A, ["-c", "b"], page_size=5, where="b > ?", parameters=[2],
+        prefetch=prefetch
+    )
+    pages = list(paginator)
+    assert [len(page.rows) for page in pages] == [5, 5, 5, 5, 2]
+    assert [a for page in pages for a in page.rows] == expected
+    assert pages[-1].cursor is None and paginator.cursor is None
+
+    resumed = sql_executor.paginate(
+        A, ["-c", "b"], page_size=5, where="b > ?", parameters=[2],
+        cursor=pages[2].cursor, prefetch=prefetch
+    )
+    assert list(resumed.iterate_rows()) == expected[15:]
+    with pytest.raises(exceptions.InvalidCursor):
+        sql_executor.paginate(A, "b", cursor=pages[2].cursor)
+    with pytest.raises(exceptions.InvalidCursor):
+        sql_executor.paginate(A, "b", cursor="nonsense")
+
+
+class Unkeyed(ModelBase):
+    _tablename = "unkeyed"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+
+
+class Nullable(ModelBase):
+    _tablename = "nullable"
+    id: int = "INTEGER PRIMARY KEY"
+    v: int = "INTEGER"
+
+
+def test_order_without_primary_key(sql_executor):
+    sql_executor.create_tables(Unkeyed)
+    sql_executor.load(Unkeyed, [(number, "xyz"[number % 3]) for number in (
+        range(30)
+    )])
+    with pytest.raises(exceptions.OrderNotUnique):
+        sql_executor.paginate(Unkeyed, "c", page_size=4)
+    rows = sql_executor.paginate(
+        Unkeyed, "b", page_size=4, unique=True
+    ).iterate_rows()
+    assert [row.b for row in rows] == list(range(30))
+
+
+@pytest.mark.parametrize("order_by", [
+    "v", "-v", ["v", "-id"], ["-v", "id"]
+])
+def test_paginate_nulls(sql_executor, order_by):
+    sql_executor.create_tables(Nullable)
+    sql_executor.load(Nullable, [
+        (number, None if number % 2 else number % 7) for number in range(20)
+    ])
+    order = parse_order_by(Nullable, order_by)
+    expected = list(sql_executor.execute(
+        f"SELECT * FROM nullable ORDER BY {make_order_clause(order)}",
+        model=Nullable
+    ))
+    rows = list(sql_executor.paginate(
+        Nullable, order_by, page_size=3
+    ).iterate_rows())
+    assert rows == expected and len(rows) == 20
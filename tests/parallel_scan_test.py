@@ -0,0 +1,61 @@
+import datetime
+
+from sql_mapper import ModelBase, lazy
+from sql_mapper.parallel_scan import Partition, make_partitions, parallel_scan
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+from sql_mapper.type_adapters import TypeAdapters
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: datetime.date = "DATE"
+
+
+def sum_b(rows):
+    return sum(row.b for row in rows)
+
+
+def test_make_partitions():
+    assert make_partitions(1, 10, 3) == [
+        Partition(1, 5), Partition(5, 9), Partition(9, 11)
+    ]
+    assert make_partitions(5, 5, 4) == [Partition(5, 6)]
+
+
+def test_parallel_scan(tmp_path):
+    file_path = str(tmp_path / "database.sqlite3")
+    sql_executor = SQLiteSQLExecutor.new(file_path)
+    sql_executor.create_tables(A)
+    sql_executor.load(A, (
+        (number, datetime.date(2000, 1, 1 + number % 28))
+        for number in range(1000)
+    ))
+    statement = "SELECT * FROM a WHERE b % ? = 0 AND rowid >= ? AND rowid < ?"
+
+    rows = list(parallel_scan(
+        file_path, statement, [2], model=A, processes=2, partitions=7,
+        type_adapters=TypeAdapters()
+    ))
+    assert [row.b for row in rows] == list(range(0, 1000, 2))
+    assert rows[1].c == datetime.date(2000, 1, 3)
+
+    rows = parallel_scan(
+        file_path, statement, [3], model=lazy(A), processes=2, ordered=False
+    )
+    assert sorted(row.b for row in rows) == list(range(0, 1000, 3))
+
+    sums = parallel_scan(
+        file_path, "SELECT * FROM a WHERE b >= ? AND b < ?", model=A,
+        processes=2, map_batch=sum_b, partition_key="b"
+    )
+    assert sum(sums) == sum(range(1000))
+    lengths = parallel_scan(
+        file_path, "SELECT * FROM a WHERE b >= ? AND b < ?", model=A,
+        processes=2, partition_size=100, map_batch=len, partition_key="b"
+    )
+    assert list(lengths) == [100] * 10
+    assert list(parallel_scan(
+        file_path, "SELECT b FROM a WHERE b >= ? AND b < ?",
+        table="a", partition_key="b", processes=1
+    )) == [(number,) for number in range(1000)]
@@ -0,0 +1,46 @@
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+class B(ModelBase):
+    _tablename = "b"
+    d: int = "INTEGER"
+    e: str = "TEXT"
+
+
+def test_prepared_statement():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    insert = sql_executor.prepare("INSERT INTO ?", A)
+    assert insert.query == "INSERT INTO a(b,c)VALUES(?,?)"
+    insert(A(1, "a"))
+    insert(A(c="b"))
+    assert insert.bind([A(c="c")]) == [None, "c"]
+    insert.execute_many([A(c=str(number))] for number in range(3, 6))
+    select = sql_executor.prepare("SELECT * FROM a WHERE b > ?", model=A)
+    assert list(select(3)) == [A(4, "4"), A(5, "5")]
+    results = select.execute_many([[3], [4]])
+    assert [list(result) for result in results] == [
+        [A(4, "4"), A(5, "5")], [A(5, "5")]
+    ]
+    with pytest.raises(exceptions.WrongArgumentsAmount):
+        select(1, 2)
+    with pytest.raises(exceptions.WrongArgumentsAmount):
+        sql_executor.prepare("SELECT ?", None, None)
+    # Rows of the model are its instances too
+    insert(next(iter(sql_executor.execute("SELECT 6, '6'", model=A))))
+    with pytest.raises(exceptions.WrongArgumentModel) as error:
+        insert(B(7, "7"))
+    assert error.value.position == 0
+    with pytest.raises(exceptions.WrongArgumentModel):
+        insert((7, "7"))
+    assert list(sql_executor.execute("SELECT MAX(b) FROM a")) == [(6,)]
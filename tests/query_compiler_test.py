@@ -0,0 +1,92 @@
+import pytest
+
+from sql_mapper import ModelBase, exceptions, raw
+from sql_mapper.query_compiler import CompiledQueriesCache, CompiledQuery
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+def test_compiled_queries_cache():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    cache = sql_executor.compiled_queries_cache
+    sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+    sql_executor.execute("INSERT INTO ?", [A(2, "b")])
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Different fields were given, so the shape is different
+    sql_executor.execute("INSERT INTO ?", [A(c="c")])
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert list(sql_executor.execute("SELECT * FROM a WHERE b > ?", [1])) == [
+        (2, "b"), (3, "c")
+    ]
+
+
+def test_compiled_queries_cache_eviction():
+    cache = CompiledQueriesCache(max_size=2)
+    cache.put("a", CompiledQuery("a", ()))
+    cache.put("b", CompiledQuery("b", ()))
+    assert cache.get("a").query == "a"
+    cache.put("c", CompiledQuery("c", ()))
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_parameter_marks_around_raw_parts():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    query, arguments = sql_executor._prepare_query_and_arguments(
+        "SELECT ?, " + raw("'?'") + ", ?", [1, 2]
+    )
+    assert query == "SELECT ?, '?', ?"
+    assert arguments == [1, 2]
+    with pytest.raises(exceptions.NotEnoughArguments) as e:
+        sql_executor.execute("SELECT ?, ?", [1])
+    assert (
+        str(e.value) ==
+        "query has more parameter marks than the 1 arguments that were given"
+    )
+
+
+def test_sequence_of_models():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    query, arguments = sql_executor._prepare_query_and_arguments(
+        raw("INSERT OR IGNORE INTO ") + "? " + raw("-- ?"),
+        [[A(1, "a"), A(2, "b")]]
+    )
+    assert query == "INSERT OR IGNORE INTO a(b,c)VALUES(?,?),(?,?) -- ?"
+    assert arguments == [1, "a", 2, "b"]
+    with pytest.raises(exceptions.DifferentModelsInOneSequence):
+        sql_executor.execute("INSERT INTO ?", [[A(1, "a"), A(c="b")]])
+
+
+def test_sequence_of_models_is_split_by_parameters_limit():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.max_parameters_amount = 10
+    sql_executor.create_tables(A)
+    queries_and_arguments = sql_executor._prepare_queries_and_arguments(
+        "INSERT INTO ?", [[A(i, str(i)) for i in range(12)]]
+    )
+    assert [
+        len(arguments) for _, arguments in queries_and_arguments
+    ] == [10, 10, 4]
+    sql_executor.execute("INSERT INTO ?", [[A(i, str(i)) for i in range(12)]])
+    assert list(sql_executor.execute("SELECT COUNT(*) FROM a")) == [(12,)]
+
+
+def test_batch_over_parameters_limit():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.max_parameters_amount = 10
+    sql_executor.create_tables(A)
+    parameters = [
+        [[A(i, str(i)) for i in range(start, start + 6)]]
+        for start in (0, 6)
+    ]
+    # 12 parameters in one statement, so the statements are split instead
+    assert sql_executor._compile_batch("INSERT INTO ?", parameters) is None
+    sql_executor.execute_many("INSERT INTO ?", parameters)
+    assert list(sql_executor.execute("SELECT COUNT(*) FROM a")) == [(12,)]
@@ -0,0 +1,96 @@
+from sql_mapper import Index, ModelBase
+from sql_mapper.dialects import DOLLAR, FORMAT, NAMED
+from sql_mapper.query_plans import (
+    AUTOMATIC_INDEX, FULL_SCAN, TEMP_B_TREE, QueryPlanInspector,
+    count_unbound_parameters, make_unbound_parameters
+)
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _indexes = (Index("b"),)
+
+
+class D(ModelBase):
+    _tablename = "d"
+    e: int = "INTEGER"
+
+
+def test_count_unbound_parameters():
+    assert count_unbound_parameters(
+        "SELECT '?', \"?\" -- ?\n FROM a /* ? */ WHERE b = ? AND c = ?"
+    ) == 2
+
+
+def test_make_unbound_parameters():
+    statement = "SELECT ':p9' -- :p8\n FROM a WHERE b = :p1 AND c = :p2"
+    assert make_unbound_parameters(statement, NAMED) == {
+        "p1": None, "p2": None
+    }
+    assert make_unbound_parameters("SELECT $1, '$2', $3", DOLLAR) == {
+        "1": None, "3": None
+    }
+    assert make_unbound_parameters("SELECT %s, '%s', %s", FORMAT) == [
+        None, None
+    ]
+
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.dialect = NAMED
+    inspector = QueryPlanInspector(sql_executor, models=[A], logger=None)
+    sql_executor.add_hook(inspector)
+    list(sql_executor.execute("SELECT * FROM a WHERE c = ?", ["x"]))
+    [plan] = inspector.plans.values()
+    assert plan.error is None
+    assert [warning.kind for warning in plan.warnings] == [FULL_SCAN]
+
+
+def test_query_plan_inspector():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A, D)
+    inspector = QueryPlanInspector(sql_executor, models=[A, D], logger=None)
+    sql_executor.add_hook(inspector)
+
+    list(sql_executor.execute("SELECT * FROM a WHERE b = ?", [1]))
+    list(sql_executor.execute("SELECT * FROM a WHERE b = 2"))
+    [plan] = inspector.plans.values()
+    assert plan.executions == 2
+    assert plan.warnings == []
+
+    list(sql_executor.execute("SELECT * FROM a WHERE c > ? ORDER BY c", [1]))
+    list(sql_executor.execute(
+        "SELECT * FROM a JOIN d ON d.e = a.b + 1 WHERE a.c = ?", ["x"]
+    ))
+    kinds = {
+        (warning.kind, warning.table, warning.models)
+        for warning, _ in inspector.get_warnings()
+    }
+    assert (FULL_SCAN, "a", (A,)) in kinds
+    assert (TEMP_B_TREE, None, (A,)) in kinds
+    assert (AUTOMATIC_INDEX, "d", (D,)) in kinds
+
+    # Writes are inspected too, the other statements are not
+    sql_executor.execute("UPDATE a SET c = ? WHERE c = ?", ["x", "y"])
+    sql_executor.execute("CREATE TABLE f (g INTEGER)")
+    assert len(inspector.plans) == 4
+
+
+def test_sampling():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    randoms = iter([0.9, 0.1])
+    inspector = QueryPlanInspector(
+        sql_executor, sample_rate=0.5, logger=None,
+        get_random=lambda: next(randoms)
+    )
+    sql_executor.add_hook(inspector)
+    list(sql_executor.execute("SELECT * FROM a"))
+    assert inspector.plans == {}
+    list(sql_executor.execute("SELECT * FROM a"))
+    [plan] = inspector.plans.values()
+    [warning] = plan.warnings
+    # Every model is used if they are not given
+    assert warning.kind == FULL_SCAN and A in warning.models
@@ -0,0 +1,121 @@
+import pytest
+
+from sql_mapper import ModelBase, Related, exceptions, lazy
+from sql_mapper.relationships import (
+    ForeignKey, get_foreign_keys, get_relationship
+)
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class Book(ModelBase):
+    _tablename = "books"
+    id: int = "INTEGER"
+    title: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (id)"
+    _relationships = {
+        "links": Related("BookToAuthor"), "reviews": Related("Review")
+    }
+
+
+class Author(ModelBase):
+    _tablename = "authors"
+    id: int = "INTEGER"
+    name: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (id)"
+    _relationships = {"links": Related("BookToAuthor")}
+
+
+class BookToAuthor(ModelBase):
+    _tablename = "books_to_authors"
+    book_id: int = "INTEGER"
+    author_id: int = "INTEGER"
+    _additional_table_lines = (
+        "FOREIGN KEY (book_id) REFERENCES books(id),"
+        "FOREIGN KEY (author_id) REFERENCES authors(id)"
+    )
+    _relationships = {"book": Related(Book), "author": Related(Author)}
+
+
+class Review(ModelBase):
+    _tablename = "reviews"
+    book_id: int = "INTEGER REFERENCES books"
+    edition: int = "INTEGER"
+    _relationships = {"unknown": Related("NotAModel")}
+
+
+@pytest.fixture
+def sql_executor():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(Book, Author, BookToAuthor, Review)
+    sql_executor.load(Book, [
+        (number, f"Book {number}") for number in range(5)
+    ])
+    sql_executor.load(Author, [(1, "Michael Z."), (2, "Anna S.")])
+    sql_executor.load(BookToAuthor, [(0, 1), (1, 1), (1, 2), (2, 2)])
+    sql_executor.load(Review, [(0, 1), (0, 2)])
+    return sql_executor
+
+
+def test_get_foreign_keys():
+    assert get_foreign_keys(BookToAuthor) == (
+        ForeignKey(("book_id",), "books", ("id",)),
+        ForeignKey(("author_id",), "authors", ("id",))
+    )
+    assert get_foreign_keys(Review) == (ForeignKey(("book_id",), "books"),)
+
+
+def test_prefetch(sql_executor):
+    sql_executor.max_parameters_amount = 2
+    books = list(sql_executor.execute(
+        "SELECT * FROM books ORDER BY id", model=Book
+    ))
+    with pytest.raises(exceptions.RelationshipNotLoaded):
+        books[0].links
+    assert sql_executor.prefetch(
+        books, "links.author", "links.book", "reviews"
+    ) == books
+    assert [
+        [link.author.name for link in book.links] for book in books
+    ] == [["Michael Z."], ["Michael Z.", "Anna S."], ["Anna S."], [], []]
+    assert books[1].links[0].book == books[1]
+    assert [review.edition for review in books[0].reviews] == [1, 2]
+    assert books[1].reviews == []
+
+    authors = sql_executor.prefetch(
+        sql_executor.execute("SELECT * FROM authors", model=lazy(Author)),
+        "links.book"
+    )
+    assert [link.book.title for link in authors[1].links] == [
+        "Book 1", "Book 2"
+    ]
+    with pytest.raises(exceptions.UnknownRelationship):
+        sql_executor.prefetch(books, "author")
+    with pytest.raises(exceptions.ForeignKeyNotFound):
+        sql_executor.prefetch(sql_executor.execute(
+            "SELECT * FROM reviews", model=Review
+        ), "unknown")
+
+
+def test_related_model_names():
+
+    def make_twin():
+        class Twin(ModelBase):
+            _tablename = "twins"
+            id: int = "INTEGER"
+            _additional_table_lines = "PRIMARY KEY (id)"
+
+        return Twin
+
+    twins = [make_twin(), make_twin()]
+
+    class Sibling(ModelBase):
+        _tablename = "siblings"
+        twin_id: int = "INTEGER REFERENCES twins(id)"
+        _relationships = {"twin": Related("Twin")}
+
+    # BookToAuthor of this module, not the one of docs_example_test
+    assert get_relationship(Book, "links").related is BookToAuthor
+    assert get_relationship(Author, "links").related is BookToAuthor
+    with pytest.raises(exceptions.AmbiguousRelatedModel):
+        get_relationship(Sibling, "twin")
+    assert len(twins) == 2
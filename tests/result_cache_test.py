@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sql_mapper import ModelBase
+from sql_mapper.result_cache import ResultCache, get_written_tables
+from sql_mapper.routing import RoutingSQLExecutor
+from sql_mapper.sql_executors import (
+    PooledSQLiteSQLExecutor, SQLiteSQLExecutor
+)
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+class Clock:
+    time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_result_cache():
+    clock = Clock()
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.result_cache = ResultCache(default_ttl=10, clock=clock)
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+
+    def select():
+        return list(sql_executor.execute_cached(
+            "SELECT * FROM a WHERE b > ?", [0], model=A
+        ))
+
+    assert select() == [A(1, "a")]
+    # Not invalidated: the cache doesn't know about this write
+    sql_executor.connection.execute("INSERT INTO a VALUES (2, 'b')")
+    assert select() == [A(1, "a")]
+    stats = sql_executor.result_cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+    assert stats.bytes > 0
+    clock.time = 11
+    assert select() == [A(1, "a"), A(2, "b")]
+    sql_executor.execute("INSERT INTO ?", [A(3, "c")])
+    assert sql_executor.result_cache.stats.invalidations == 1
+    assert select() == [A(1, "a"), A(2, "b"), A(3, "c")]
+    assert list(sql_executor.execute_cached(
+        "SELECT COUNT(*) FROM a", ttl=0
+    )) == [(3,)]
+    assert sql_executor.result_cache.stats.entries == 1
+
+
+def test_result_cache_limits():
+    cache = ResultCache(max_entries=2)
+    for key in "xyz":
+        cache.put(key, [(1,)], {"a"})
+    assert cache.get("x") is None
+    assert cache.stats.evictions == 1
+    cache = ResultCache(max_bytes=200)
+    cache.put("x", [(1,)], {"a"})
+    cache.put("y", [("a" * 1000,)], {"a"})
+    assert (cache.get("x"), cache.get("y")) == (((1,),), None)
+
+
+def test_shared_result_cache():
+    cache = ResultCache(max_entries=8)
+
+    def use(thread_number):
+        for number in range(2000):
+            key = (thread_number + number) % 16
+            if cache.get(key) is None:
+                cache.put(key, [(key,)], {"a", str(key)})
+            if number % 100 == 0:
+                cache.invalidate_tables([str(key)])
+
+    with ThreadPoolExecutor(8) as threads:
+        list(threads.map(use, range(8)))
+    stats = cache.stats
+    assert stats.hits + stats.misses == 16000
+    assert stats.entries <= 8
+
+
+def test_written_tables():
+    assert get_written_tables("INSERT INTO a(b,c)VALUES(?,?)") == {"a"}
+    assert get_written_tables('UPDATE OR IGNORE "A" SET b = 1') == {"a"}
+    assert get_written_tables("DELETE FROM main.[a] WHERE b = 1") == {"a"}
+    assert get_written_tables("SELECT * FROM a") == set()
+
+
+@pytest.mark.parametrize("new_sql_executor", [
+    lambda path: SQLiteSQLExecutor.new(path),
+    lambda path: PooledSQLiteSQLExecutor.new(path, 2),
+    lambda path: RoutingSQLExecutor.new(path, replicas_amount=1),
+])
+def test_rollback_clears_result_cache(tmp_path, new_sql_executor):
+    sql_executor = new_sql_executor(str(tmp_path / "database.sqlite3"))
+    sql_executor.result_cache = ResultCache()
+    sql_executor.create_tables(A)
+    sql_executor.commit()
+    sql_executor._begin_transaction()
+    sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+
+    def count():
+        return list(sql_executor.execute_cached("SELECT COUNT(*) FROM a"))
+
+    assert count() == [(1,)]
+    sql_executor.rollback()
+    assert count() == [(0,)]
+    sql_executor.close()
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.routing import LEAST_BUSY, RoutingSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+@pytest.fixture
+def file_path():
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "database.sqlite3")
+
+
+def _statements(sql_executor: RoutingSQLExecutor) -> dict:
+    return {
+        name: metrics.statements
+        for name, metrics in sql_executor.metrics.items()
+    }
+
+
+def test_routing(file_path):
+    sql_executor = RoutingSQLExecutor.new(file_path, replicas_amount=2)
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [A(1, "a")])
+    # Not committed yet, so only the primary sees it
+    assert list(sql_executor.execute("SELECT * FROM a", model=A)) == [
+        A(1, "a")
+    ]
+    sql_executor.commit()
+    assert _statements(sql_executor) == {
+        "primary": 4, "replica_0": 0, "replica_1": 0
+    }
+    for _ in range(4):
+        assert list(sql_executor.execute("SELECT c FROM a")) == [("a",)]
+    assert list(sql_executor.stream("SELECT c FROM a")) == [("a",)]
+    assert _statements(sql_executor) == {
+        "primary": 4, "replica_0": 3, "replica_1": 2
+    }
+    with sql_executor.transaction():
+        sql_executor.execute("UPDATE a SET c = 'b'")
+        assert list(sql_executor.execute("SELECT c FROM a")) == [("b",)]
+    assert _statements(sql_executor)["primary"] == 8
+    with pytest.raises(sqlite3.OperationalError):
+        sql_executor.execute("SELECT d FROM a")
+    metrics = sql_executor.metrics["replica_1"]
+    assert (metrics.errors, metrics.in_flight) == (1, 0)
+    assert metrics.average_time > 0
+    sql_executor.close()
+    with pytest.raises(exceptions.UnknownRoutingStrategy):
+        RoutingSQLExecutor.new(file_path, strategy="random")
+
+
+def test_execute_while_streaming(file_path):
+    sql_executor = RoutingSQLExecutor.new(file_path, replicas_amount=1)
+    sql_executor.create_tables(A)
+    sql_executor.load(A, [(number, str(number)) for number in range(10)])
+    sql_executor.commit()
+    rows = []
+    for (number,) in sql_executor.stream(
+        "SELECT b FROM a ORDER BY b", chunk_size=3
+    ):
+        # On the same replica, in the same thread
+        rows.append((number, *sql_executor.execute("SELECT COUNT(*) FROM a")))
+    assert rows == [(number, (10,)) for number in range(10)]
+    assert sql_executor.metrics["replica_0"].in_flight == 0
+    sql_executor.close()
+
+
+def test_least_busy(file_path):
+    sql_executor = RoutingSQLExecutor.new(
+        file_path, replicas_amount=3, strategy=LEAST_BUSY
+    )
+    sql_executor.create_tables(A)
+    sql_executor.load(A, [(number, str(number)) for number in range(100)])
+    with ThreadPoolExecutor(4) as threads:
+        counts = list(threads.map(
+            lambda _: list(sql_executor.execute("SELECT COUNT(*) FROM a")),
+            range(30)
+        ))
+    assert counts == [[(100,)]] * 30
+    statements = _statements(sql_executor)
+    assert sum(statements.values()) - statements["primary"] == 30
+    assert all(metrics.in_flight == 0 for metrics in (
+        sql_executor.metrics.values()
+    ))
+    sql_executor.close()
@@ -0,0 +1,72 @@
+from sql_mapper import Index, ModelBase
+from sql_mapper.schema import get_schema_diff, migrate
+from sql_mapper.sql_executors import PooledSQLiteSQLExecutor, SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _indexes = (
+        Index("b"), Index(("c", "b"), unique=True, where="b > 0"),
+    )
+
+
+class NewA(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    d: float = "REAL"
+    _indexes = (
+        Index("b"), Index(("c", "b"), where="b > 0"), Index("d", name="d"),
+    )
+
+
+class E(ModelBase):
+    _tablename = "e"
+    f: int = "INTEGER"
+
+
+def test_create_tables():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    assert list(sql_executor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' ORDER BY name"
+    )) == [
+        ("CREATE INDEX ix_a_b ON a(b)",),
+        ("CREATE UNIQUE INDEX ix_a_c_b ON a(c,b) WHERE b > 0",),
+    ]
+    assert not get_schema_diff(sql_executor, A)
+
+
+def test_schema_diff():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    diff = get_schema_diff(sql_executor, NewA, E)
+    assert diff.missing_tables == ["e"]
+    assert diff.missing_columns == [("a", "d")]
+    assert diff.missing_indexes == ["d"]
+    assert diff.changed_indexes == ["ix_a_c_b"]
+    assert diff.statements == [
+        "ALTER TABLE a ADD COLUMN d REAL",
+        "DROP INDEX ix_a_c_b",
+        "CREATE INDEX IF NOT EXISTS ix_a_c_b ON a(c,b) WHERE b > 0",
+        "CREATE INDEX IF NOT EXISTS d ON a(d)",
+        "CREATE TABLE IF NOT EXISTS e (f INTEGER)",
+    ]
+    migrate(sql_executor, NewA, E)
+    assert not get_schema_diff(sql_executor, NewA, E)
+
+
+def test_index_build_with_readers(tmp_path):
+    sql_executor = PooledSQLiteSQLExecutor.new(
+        str(tmp_path / "database.sqlite3"), pool_size=1
+    )
+    sql_executor.create_tables(A)
+    sql_executor.load(A, ((number, str(number)) for number in range(100)))
+    with sql_executor.transaction():
+        sql_executor.execute("CREATE INDEX d ON a(c)")
+        # The index build doesn't block the readers in the WAL mode
+        assert list(sql_executor.execute("SELECT COUNT(*) FROM a")) == [
+            (100,)
+        ]
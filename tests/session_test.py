@@ -0,0 +1,124 @@
+import pickle
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions, lazy
+from sql_mapper.session import Session
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+class B(ModelBase):
+    _tablename = "b"
+    d: int = "INTEGER"
+
+
+@pytest.fixture
+def sql_executor():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A, B)
+    sql_executor.execute_many(
+        "INSERT INTO a VALUES (?, ?)", [(1, "one"), (2, "two"), (3, "three")]
+    )
+    return sql_executor
+
+
+def test_identity_map(sql_executor):
+    session = Session(sql_executor)
+    a = session.get(A, 1)
+    assert a.instance_fields == {"b": 1, "c": "one"}
+    assert session.get(A, 1) is a
+    assert session.get(A, 4) is None
+    a.c = "changed"
+    rows = session.query("SELECT * FROM a ORDER BY b", model=A)
+    assert rows[0] is a and rows[0].c == "changed"
+    assert session.query("SELECT * FROM a WHERE b = 2", model=lazy(A)) == [
+        rows[1]
+    ]
+    assert session.dirty == [a]
+
+
+def test_flush(sql_executor):
+    with Session(sql_executor) as session:
+        first, second, third = session.query(
+            "SELECT * FROM a ORDER BY b", model=lazy(A)
+        )
+        first.c = "first"
+        second.c = "second"
+        session.delete(third)
+        new = A(b=4, c="four")
+        session.add(new)
+        new.c = "new"
+        session.add(B(d=1))
+    assert list(sql_executor.execute("SELECT * FROM a ORDER BY b")) == [
+        (1, "first"), (2, "second"), (4, "new")
+    ]
+    assert list(sql_executor.execute("SELECT * FROM b")) == [(1,)]
+    assert session.get(A, 4) is new and session.get(A, 3) is None
+    assert not session.dirty
+
+    new.c = "changed"
+    assert session.dirty == [new]
+    session.flush()
+    assert list(sql_executor.execute(
+        "SELECT c FROM a WHERE b = 4"
+    )) == [("changed",)]
+    with pytest.raises(exceptions.PrimaryKeyNotSpecified):
+        session.delete(B(d=1))
+
+
+def test_session_membership(sql_executor):
+    a = A(b=4, c="four")
+    Session(sql_executor).add(a)
+    session = Session(sql_executor)
+    session.add(a)
+    session.flush()
+    assert list(sql_executor.execute(
+        "SELECT * FROM a WHERE b = 4"
+    )) == [(4, "four")]
+    unpickled = pickle.loads(pickle.dumps(a))
+    assert type(unpickled) is A and unpickled.instance_fields == {
+        "b": 4, "c": "four"
+    }
+
+
+def test_changed_primary_key(sql_executor):
+    session = Session(sql_executor)
+    a = session.get(A, 1)
+    a.b = 5
+    a.c = "five"
+    session.flush()
+    assert list(sql_executor.execute("SELECT * FROM a ORDER BY b")) == [
+        (2, "two"), (3, "three"), (5, "five")
+    ]
+    assert session.get(A, 5) is a and session.get(A, 1) is None
+    session.delete(a)
+    session.flush()
+    assert list(sql_executor.execute("SELECT b FROM a ORDER BY b")) == [
+        (2,), (3,)
+    ]
+
+
+def test_flush_column_defaults():
+
+    class D(ModelBase):
+        _tablename = "d"
+        b: int = "INTEGER"
+        c: str = "TEXT NOT NULL DEFAULT 'd'"
+
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(D)
+    with Session(sql_executor) as session:
+        session.add(D(b=1))
+        session.add(D(c="e", b=2))
+        session.add(D(b=3, c="f"))
+        session.add(D())
+    assert list(sql_executor.execute("SELECT * FROM d ORDER BY b")) == [
+        (None, "d"), (1, "d"), (2, "e"), (3, "f")
+    ]
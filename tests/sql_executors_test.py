@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sql_mapper import ModelBase
+from sql_mapper.sql_executors import PooledSQLiteSQLExecutor
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+    _additional_table_lines = "PRIMARY KEY (b)"
+
+
+def test_pooled_sql_executor(tmp_path):
+    sql_executor = PooledSQLiteSQLExecutor.new(
+        str(tmp_path / "database.sqlite3"), pool_size=2
+    )
+    sql_executor.create_tables(A)
+    assert list(sql_executor.execute("PRAGMA journal_mode")) == [("wal",)]
+
+    def insert(number):
+        sql_executor.execute("INSERT INTO ?", [A(c=str(number))])
+        return sql_executor.lastrowid
+
+    with ThreadPoolExecutor(8) as thread_pool:
+        row_ids = list(thread_pool.map(insert, range(50)))
+    assert sorted(row_ids) == list(range(1, 51))
+    # Readers see only the committed changes
+    assert list(sql_executor.execute("SELECT COUNT(*) FROM a")) == [(0,)]
+    sql_executor.commit()
+
+    def count(_):
+        return list(sql_executor.execute("SELECT COUNT(*) FROM a"))
+
+    with ThreadPoolExecutor(8) as thread_pool:
+        assert set(map(tuple, thread_pool.map(count, range(50)))) == {
+            ((50,),)
+        }
+    rows = sql_executor.stream("SELECT * FROM a", model=A, chunk_size=7)
+    assert sql_executor.reader_pool.metrics.in_use == 1
+    assert sql_executor.reader_pool.metrics.utilization == 0.5
+    assert len(list(rows)) == 50
+    metrics = sql_executor.reader_pool.metrics
+    assert metrics.in_use == 0
+    assert metrics.checkouts == 52
+    assert metrics.max_wait_time >= metrics.average_wait_time >= 0
+    sql_executor.close()
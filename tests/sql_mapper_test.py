@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 from sql_mapper.model_base import ModelBase
 from sql_mapper.sql_executors import SQLiteSQLExecutor
 from sql_mapper.string_dump import raw
@@ -30,3 +33,75 @@ def test_sql_mapper():
     assert list(sql_executor.execute("SELECT * FROM a", model=A)) == [
         A(1, "a"), A(2, "b"), A(3, "c"), A(4, "d"), A(5, "?")
     ]
+
+
+def test_batched_execute_many():
+
+    class A(ModelBase):
+        _tablename = "a"
+        b: int = "INTEGER"
+        c: str = "TEXT"
+
+    class CountingSQLExecutor(SQLiteSQLExecutor):
+        statements_executed = 0
+
+        def _execute_sql_statement(self, statement, parameters):
+            self.statements_executed += 1
+            return super()._execute_sql_statement(statement, parameters)
+
+        def _stream_sql_statement(self, statement, parameters, chunk_size):
+            self.statements_executed += 1
+            return super()._stream_sql_statement(
+                statement, parameters, chunk_size
+            )
+
+    sql_executor = CountingSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+
+    results = sql_executor.execute_many(
+        "INSERT INTO ?", ([A(i, str(i))] for i in range(100))
+    )
+    assert results == [()] * 100
+    assert sql_executor.statements_executed == 0
+    assert list(sql_executor.execute("SELECT COUNT(*) FROM a")) == [(100,)]
+
+    # Different shapes and queries that return rows are executed one by one
+    sql_executor.execute_many("INSERT INTO ?", ([A(1, "a")], [A(c="b")]))
+    assert sql_executor.statements_executed == 3
+    results = sql_executor.execute_many(
+        "SELECT c FROM a WHERE b = ?", ([1], [2]), model=A
+    )
+    assert sql_executor.statements_executed == 5
+    assert [list(result) for result in results] == [
+        [A("1"), A("a")], [A("2")]
+    ]
+
+
+def test_stream():
+
+    class A(ModelBase):
+        _tablename = "a"
+        b: int = "INTEGER"
+
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(A)
+    sql_executor.execute("INSERT INTO ?", [[A(i) for i in range(10)]])
+    first = sql_executor.stream("SELECT * FROM a", model=A, chunk_size=3)
+    second = sql_executor.stream("SELECT b * 2 FROM a", chunk_size=4)
+    # Interleaved queries don't interfere with each other
+    assert next(first) == A(0)
+    assert next(second) == (0,)
+    sql_executor.execute("SELECT 1")
+    assert list(first) == [A(i) for i in range(1, 10)]
+    assert list(second) == [(i * 2,) for i in range(1, 10)]
+
+
+def test_lazy_submodules():
+    script = (
+        "import sys, sql_mapper\n"
+        "assert 'sqlite3' not in sys.modules\n"
+        "assert 'sql_mapper.abstract_sql_executor' not in sys.modules\n"
+        "assert sql_mapper.sql_executors.SQLiteSQLExecutor\n"
+        "assert sql_mapper.raw is sql_mapper.string_dump.raw\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
@@ -0,0 +1,194 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from sql_mapper import ModelBase, exceptions
+from sql_mapper.abstract_sql_executor import (
+    AbstractAsyncSQLExecutor, AsyncRowsIterator
+)
+from sql_mapper.async_sql_executors import AsyncSQLiteSQLExecutor
+from sql_mapper.schema import make_create_statements
+from sql_mapper.sql_executors import (
+    PooledSQLiteSQLExecutor, SQLiteSQLExecutor, FAST
+)
+
+
+class A(ModelBase):
+    _tablename = "a"
+    b: int = "INTEGER"
+    c: str = "TEXT"
+
+
+def _count(sql_executor) -> int:
+    return list(sql_executor.execute("SELECT COUNT(*) FROM a"))[0][0]
+
+
+def test_transaction(tmp_path):
+    database_path = str(tmp_path / "database.sqlite3")
+    sql_executor = SQLiteSQLExecutor.new(database_path)
+    sql_executor.create_tables(A)
+    other_sql_executor = SQLiteSQLExecutor.new(database_path)
+
+    with sql_executor.transaction():
+        sql_executor.execute("INSERT INTO ?", [A(1, "1")])
+        with sql_executor.transaction():
+            sql_executor.execute("INSERT INTO ?", [A(2, "2")])
+        with pytest.raises(ValueError):
+            with sql_executor.transaction():
+                sql_executor.execute("INSERT INTO ?", [A(3, "3")])
+                raise ValueError()
+        assert _count(other_sql_executor) == 0
+    assert list(other_sql_executor.execute("SELECT b FROM a")) == [
+        (1,), (2,)
+    ]
+
+    with pytest.raises(ValueError):
+        with sql_executor.transaction():
+            sql_executor.execute("INSERT INTO ?", [A(4, "4")])
+            raise ValueError()
+    assert _count(sql_executor) == 2
+
+    with pytest.raises(exceptions.NestedAutoCommit):
+        with sql_executor.transaction():
+            with sql_executor.transaction(commit_every=10):
+                pass
+
+
+def test_pooled_transaction(tmp_path):
+    sql_executor = PooledSQLiteSQLExecutor.new(
+        str(tmp_path / "database.sqlite3")
+    )
+    sql_executor.create_tables(A)
+    other_thread_writes = threading.Thread(
+        target=sql_executor.execute, args=("INSERT INTO ?", [A(2, "2")])
+    )
+    with pytest.raises(ValueError):
+        with sql_executor.transaction():
+            sql_executor.execute("INSERT INTO ?", [A(1, "1")])
+            # The reads of the transaction see its writes
+            assert _count(sql_executor) == 1
+            other_thread_writes.start()
+            other_thread_writes.join(0.2)
+            # The other thread waits for the transaction
+            assert other_thread_writes.is_alive()
+            raise ValueError
+    other_thread_writes.join()
+    assert sql_executor._transaction_depth == 0
+    sql_executor.commit()
+    assert list(sql_executor.execute("SELECT * FROM a")) == [(2, "2")]
+    sql_executor.close()
+
+
+def test_automatic_commits(tmp_path):
+    database_path = str(tmp_path / "database.sqlite3")
+    sql_executor = SQLiteSQLExecutor.new(database_path, durability=FAST)
+    sql_executor.create_tables(A)
+    assert list(sql_executor.execute("PRAGMA synchronous")) == [(0,)]
+    assert list(sql_executor.execute("PRAGMA journal_mode")) == [("wal",)]
+    other_sql_executor = SQLiteSQLExecutor.new(database_path)
+
+    with pytest.raises(ValueError):
+        with sql_executor.transaction(commit_every=10):
+            for number in range(25):
+                sql_executor.execute("INSERT INTO ?", [A(number, "")])
+            assert sql_executor._auto_commit_policy.commits == 2
+            assert _count(other_sql_executor) == 20
+            raise ValueError()
+    # Only the last, uncommitted part is rolled back
+    assert _count(sql_executor) == 20
+    assert sql_executor._auto_commit_policy is None
+
+
+def test_auto_commit_of_loads_and_savepoints(tmp_path):
+    database_path = str(tmp_path / "database.sqlite3")
+    sql_executor = SQLiteSQLExecutor.new(database_path)
+    sql_executor.create_tables(A)
+    other_sql_executor = SQLiteSQLExecutor.new(database_path)
+    with sql_executor.transaction(commit_every=2):
+        for start in range(0, 50, 10):
+            sql_executor.load(
+                A, [(number, "") for number in range(start, start + 10)],
+                batch_size=5
+            )
+        # Committed between the batches
+        assert sql_executor._auto_commit_policy.commits == 4
+        assert _count(other_sql_executor) == 40
+        for number in range(3):
+            with sql_executor.transaction():
+                sql_executor.execute("INSERT INTO ?", [A(50 + number, "")])
+                sql_executor.execute("INSERT INTO ?", [A(60 + number, "")])
+        assert sql_executor._auto_commit_policy.commits == 7
+    assert _count(other_sql_executor) == 56
+
+
+@pytest.mark.parametrize("pool_size", [None, 2])
+def test_async_transaction(tmp_path, pool_size):
+    async def main():
+        sql_executor = AsyncSQLiteSQLExecutor.new(
+            str(tmp_path / "database.sqlite3"), pool_size
+        )
+        await sql_executor.create_tables(A)
+        async with sql_executor.transaction():
+            await sql_executor.execute("INSERT INTO ?", [A(1, "1")])
+        with pytest.raises(ValueError):
+            async with sql_executor.transaction():
+                await sql_executor.execute("INSERT INTO ?", [A(2, "2")])
+                raise ValueError()
+        rows = await sql_executor.execute("SELECT b FROM a")
+        assert [row async for row in rows] == [(1,)]
+        await sql_executor.close()
+
+    asyncio.run(main())
+
+
+class ConnectionAsyncSQLExecutor(AbstractAsyncSQLExecutor):
+    new_parameter_mark = "?"
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.commits = 0
+
+    async def _execute_sql_statement(self, statement: str, parameters: list):
+        return AsyncRowsIterator(
+            self.connection.execute(statement, parameters).fetchall()
+        )
+
+    async def commit(self):
+        self.connection.commit()
+        self.commits += 1
+
+    async def create_tables(self, *tables):
+        for table in tables:
+            for statement in make_create_statements(table):
+                self.connection.execute(statement)
+
+
+def test_abstract_async_transaction():
+    async def count() -> int:
+        rows = await sql_executor.execute("SELECT COUNT(*) FROM a")
+        return [row async for row in rows][0][0]
+
+    async def main():
+        await sql_executor.create_tables(A)
+        with pytest.raises(ValueError):
+            async with sql_executor.transaction():
+                await sql_executor.execute("INSERT INTO ?", [A(1, "1")])
+                with pytest.raises(ValueError):
+                    async with sql_executor.transaction():
+                        await sql_executor.execute(
+                            "INSERT INTO ?", [A(2, "2")]
+                        )
+                        raise ValueError()
+                assert await count() == 1
+                raise ValueError()
+        assert await count() == 0
+        async with sql_executor.transaction(commit_every=2):
+            for index in range(5):
+                await sql_executor.execute("INSERT INTO ?", [A(index, "")])
+        assert sql_executor.commits == 3
+        assert sql_executor._transaction_depth == 0
+
+    sql_executor = ConnectionAsyncSQLExecutor(sqlite3.connect(":memory:"))
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+import asyncio
+import datetime
+import decimal
+import sqlite3
+
+from sql_mapper import ModelBase
+from sql_mapper.abstract_sql_executor import (
+    AbstractAsyncSQLExecutor, AsyncRowsIterator
+)
+from sql_mapper.sql_executors import SQLiteSQLExecutor
+from sql_mapper.type_adapters import (
+    TypeAdapter, TypeAdapters, get_type_name, make_values_converter
+)
+
+
+class Event(ModelBase):
+    _tablename = "events"
+    id: int = "INTEGER"
+    day: datetime.date = "DATE NOT NULL"
+    price: decimal.Decimal = "DECIMAL(10, 2)"
+    done: bool = "BOOLEAN"
+    data: dict = "JSON"
+
+
+def test_get_type_name():
+    assert get_type_name("DECIMAL(10, 2)") == "DECIMAL"
+    assert get_type_name(" integer not null") == "INTEGER"
+    assert get_type_name(None) is None
+
+
+def test_make_values_converter():
+    assert make_values_converter([None, None]) is None
+    convert = make_values_converter([str])
+    assert convert([1]) == ("1",)
+    convert = make_values_converter([None, str, int])
+    assert convert((1, 2, None)) == (1, "2", None)
+
+
+def test_type_adapters():
+    sql_executor = SQLiteSQLExecutor.new(":memory:")
+    sql_executor.create_tables(Event)
+    event = Event(
+        1, datetime.date(2024, 2, 29), decimal.Decimal("1.25"), True,
+        {"a": [1, 2]}
+    )
+    sql_executor.type_adapters = TypeAdapters()
+    sql_executor.execute("INSERT INTO ?", [event])
+    sql_executor.execute_many("INSERT INTO ?", [[
+        Event(2, datetime.date(2024, 3, 1), None, False, None)
+    ]])
+    insert = sql_executor.prepare("INSERT INTO ?", Event)
+    insert(Event(3, datetime.date(2024, 3, 2), done=True))
+    assert list(sql_executor.execute("SELECT * FROM events")) == [
+        (1, "2024-02-29", 1.25, 1, '{"a":[1,2]}'),
+        (2, "2024-03-01", None, 0, None),
+        (3, "2024-03-02", None, 1, None),
+    ]
+
+    events = list(sql_executor.execute("SELECT * FROM events", model=Event))
+    assert events[0].instance_fields == event.instance_fields
+    assert events[1].price is None
+    assert events[2].done is True
+    columns = sql_executor.execute_columns(
+        "SELECT * FROM events", model=Event
+    )
+    assert columns["day"][1] == datetime.date(2024, 3, 1)
+    assert list(columns["id"]) == [1, 2, 3]
+
+    sql_executor.type_adapters.register("INTEGER", TypeAdapter(str, int))
+    assert next(iter(sql_executor.execute(
+        "SELECT * FROM events", model=Event
+    ))).id == "1"
+    sql_executor.type_adapters = None
+    assert next(iter(sql_executor.execute(
+        "SELECT * FROM events", model=Event
+    ))).day == "2024-02-29"
+
+
+class ConnectionAsyncSQLExecutor(AbstractAsyncSQLExecutor):
+    new_parameter_mark = "?"
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    async def _execute_sql_statement(self, statement: str, parameters: list):
+        return AsyncRowsIterator(
+            self.connection.execute(statement, parameters).fetchall()
+        )
+
+    async def commit(self):
+        self.connection.commit()
+
+    async def create_tables(self, *tables):
+        raise NotImplementedError
+
+
+def test_async_type_adapters():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE events (id, day, price, done, data)")
+    sql_executor = ConnectionAsyncSQLExecutor(connection)
+    sql_executor.type_adapters = TypeAdapters()
+    # The same fields in every row, so they are inserted in one batch
+    asyncio.run(sql_executor.execute_many("INSERT INTO ?", [
+        [Event(1, datetime.date(2024, 3, 1), decimal.Decimal(2), True, None)],
+        [Event(2, datetime.date(2024, 3, 2), None, False, {"a": 1})],
+    ]))
+    assert connection.execute("SELECT * FROM events").fetchall() == [
+        (1, "2024-03-01", "2", 1, None), (2, "2024-03-02", None, 0, '{"a":1}')
+    ]